@@ -0,0 +1,33 @@
+"""
+Queryset Annotations for REST API
+Per-row totals and counts computed in the list / detail query, read by the
+serializers instead of one aggregate query per object.
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def related_sum(model, field_name, related_field, output_field=None):
+    """
+    SUM(`model.field_name`) of the rows whose `related_field` points at the
+    outer row, 0 when there are none. A correlated subquery, so several sums
+    on one queryset do not multiply each other like joined Sum() would.
+    """
+    output_field = output_field or DecimalField(max_digits=15, decimal_places=2)
+    total = (
+        model.objects.filter(**{related_field: OuterRef('pk')})
+        .order_by()
+        .values(related_field)
+        .annotate(total=Sum(field_name))
+        .values('total')
+    )
+    return Coalesce(Subquery(total, output_field=output_field), Value(Decimal('0.00')), output_field=output_field)
+
+
+def annotated_value(obj, name, fallback):
+    """The `name` annotation of `obj`, or fallback(obj) on unannotated instances"""
+    if hasattr(obj, name):
+        return getattr(obj, name)
+    return fallback(obj)
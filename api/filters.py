@@ -0,0 +1,23 @@
+"""
+Filter Backends for REST API
+"""
+from rest_framework import filters
+
+from apps.core.search import get_search_index_for_model
+
+
+class IndexedSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter backed by the global search index (see apps.core.search);
+    models without a search index keep the `search_fields` LIKE filter
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        index = get_search_index_for_model(queryset.model)
+        if index is None:
+            return super().filter_queryset(request, queryset, view)
+
+        query = request.query_params.get(self.search_param, '')
+        if not query.strip():
+            return queryset
+        return index.filter(queryset, query)
@@ -2,6 +2,8 @@
 Client Serializers for REST API
 """
 from rest_framework import serializers
+
+from api.annotations import annotated_value
 from apps.clients.models import Client
 
 
@@ -18,7 +20,7 @@ class ClientListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
     def get_contracts_count(self, obj):
-        return obj.contracts.count()
+        return annotated_value(obj, 'contracts_count', lambda obj: obj.contracts.count())
 
 
 class ClientSerializer(serializers.ModelSerializer):
@@ -29,15 +31,17 @@ class ClientSerializer(serializers.ModelSerializer):
     class Meta:
         model = Client
         fields = [
-            'id', 'name', 'email', 'phone', 'mobile', 'address',
-            'city', 'country', 'national_id', 'date_of_birth',
+            'id', 'name', 'email', 'phone', 'address',
+            'city', 'country', 'national_id', 'employer',
             'occupation', 'notes', 'is_active', 'created_at',
             'updated_at', 'contracts_count', 'active_contracts'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
     def get_contracts_count(self, obj):
-        return obj.contracts.count()
+        return annotated_value(obj, 'contracts_count', lambda obj: obj.contracts.count())
 
     def get_active_contracts(self, obj):
-        return obj.contracts.filter(status='active').count()
+        return annotated_value(
+            obj, 'active_contracts_count', lambda obj: obj.contracts.filter(status='active').count()
+        )
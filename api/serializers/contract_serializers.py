@@ -2,6 +2,10 @@
 Contract Serializers for REST API
 """
 from rest_framework import serializers
+from django.db.models import Sum
+
+from api.annotations import annotated_value
+from apps.properties.occupancy import BOOKING_FIELDS, OccupancyTimeline
 from apps.contracts.models import Contract, ContractPayment, ContractRenewal
 
 
@@ -11,8 +15,8 @@ class ContractPaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = ContractPayment
         fields = [
-            'id', 'contract', 'payment_date', 'amount', 'payment_type',
-            'payment_method', 'reference_number', 'notes', 'created_at'
+            'id', 'contract', 'payment_date', 'amount', 'payment_method',
+            'status', 'reference_number', 'notes', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
 
@@ -23,9 +27,8 @@ class ContractRenewalSerializer(serializers.ModelSerializer):
     class Meta:
         model = ContractRenewal
         fields = [
-            'id', 'contract', 'renewal_date', 'new_rent_amount',
-            'new_start_date', 'new_end_date', 'terms_changed',
-            'notes', 'created_at'
+            'id', 'original_contract', 'new_contract', 'renewal_date',
+            'rent_increase', 'notes', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
 
@@ -68,15 +71,41 @@ class ContractSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'contract_number', 'property', 'property_code',
             'property_title', 'client', 'client_name', 'start_date',
-            'end_date', 'rent_amount', 'payment_frequency', 'deposit_amount',
+            'end_date', 'rent_amount', 'payment_frequency', 'security_deposit',
             'terms_and_conditions', 'status', 'is_active', 'created_at',
             'updated_at', 'payments', 'renewals', 'total_paid',
             'remaining_amount'
         ]
         read_only_fields = ['id', 'contract_number', 'created_at', 'updated_at']
 
+    def validate(self, attrs):
+        instance = self.instance
+
+        def value(name):
+            return attrs.get(name, getattr(instance, name, None))
+
+        start_date, end_date = value('start_date'), value('end_date')
+        if start_date and end_date and end_date < start_date:
+            raise serializers.ValidationError({'end_date': 'End date cannot be before the start date.'})
+
+        if instance and all(value(name) == getattr(instance, name) for name in BOOKING_FIELDS):
+            return attrs
+        prop = value('property')
+        error = OccupancyTimeline.booking_error(
+            prop.pk if prop else None,
+            start_date,
+            end_date,
+            value('status') or 'draft',
+            exclude=instance.pk if instance else None,
+        )
+        if error:
+            raise serializers.ValidationError({'start_date': error})
+        return attrs
+
     def get_total_paid(self, obj):
-        total = obj.payments.aggregate(total=serializers.Sum('amount'))['total']
+        total = annotated_value(
+            obj, 'paid_total', lambda obj: obj.payments.aggregate(total=Sum('amount'))['total']
+        )
         return float(total) if total else 0.0
 
     def get_remaining_amount(self, obj):
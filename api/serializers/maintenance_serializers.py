@@ -2,6 +2,8 @@
 Maintenance Serializers for REST API
 """
 from rest_framework import serializers
+
+from api.annotations import annotated_value
 from apps.maintenance.models import (
     MaintenanceCategory,
     MaintenanceRequest,
@@ -20,7 +22,7 @@ class MaintenanceCategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
     def get_requests_count(self, obj):
-        return obj.maintenance_requests.count()
+        return annotated_value(obj, 'requests_count', lambda obj: obj.requests.count())
 
 
 class MaintenanceAttachmentSerializer(serializers.ModelSerializer):
@@ -50,11 +52,11 @@ class MaintenanceScheduleSerializer(serializers.ModelSerializer):
     class Meta:
         model = MaintenanceSchedule
         fields = [
-            'id', 'maintenance_request', 'scheduled_date', 'technician_name',
-            'estimated_cost', 'actual_cost', 'notes', 'status',
-            'completed_at', 'created_at'
+            'id', 'property', 'category', 'title', 'description', 'frequency',
+            'last_service_date', 'next_service_date', 'assigned_to',
+            'estimated_cost', 'is_active', 'notes', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
 
 
 class MaintenanceRequestListSerializer(serializers.ModelSerializer):
@@ -77,10 +79,9 @@ class MaintenanceRequestSerializer(serializers.ModelSerializer):
     property_code = serializers.CharField(source='property.code', read_only=True)
     property_title = serializers.CharField(source='property.title', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
-    requested_by_name = serializers.SerializerMethodField()
+    reported_by_name = serializers.SerializerMethodField()
     assigned_to_name = serializers.SerializerMethodField()
     attachments = MaintenanceAttachmentSerializer(many=True, read_only=True)
-    schedules = MaintenanceScheduleSerializer(many=True, read_only=True)
 
     class Meta:
         model = MaintenanceRequest
@@ -88,16 +89,16 @@ class MaintenanceRequestSerializer(serializers.ModelSerializer):
             'id', 'request_number', 'property', 'property_code',
             'property_title', 'category', 'category_name', 'title',
             'description', 'priority', 'status', 'request_date',
-            'completion_date', 'estimated_cost', 'actual_cost',
-            'requested_by', 'requested_by_name', 'assigned_to',
-            'assigned_to_name', 'notes', 'created_at', 'updated_at',
-            'attachments', 'schedules'
+            'scheduled_date', 'completed_date', 'estimated_cost', 'actual_cost',
+            'reported_by', 'reported_by_name', 'assigned_to',
+            'assigned_to_name', 'notes', 'resolution_notes', 'created_at',
+            'updated_at', 'attachments'
         ]
-        read_only_fields = ['id', 'request_number', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'request_number', 'request_date', 'created_at', 'updated_at']
 
-    def get_requested_by_name(self, obj):
-        if obj.requested_by:
-            return obj.requested_by.get_full_name() or obj.requested_by.username
+    def get_reported_by_name(self, obj):
+        if obj.reported_by:
+            return obj.reported_by.get_full_name() or obj.reported_by.username
         return None
 
     def get_assigned_to_name(self, obj):
@@ -2,6 +2,8 @@
 Owner Serializers for REST API
 """
 from rest_framework import serializers
+
+from api.annotations import annotated_value
 from apps.owners.models import Owner
 
 
@@ -18,7 +20,7 @@ class OwnerListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
     def get_properties_count(self, obj):
-        return obj.properties.count()
+        return annotated_value(obj, 'properties_count', lambda obj: obj.properties.count())
 
 
 class OwnerSerializer(serializers.ModelSerializer):
@@ -37,7 +39,9 @@ class OwnerSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
     def get_properties_count(self, obj):
-        return obj.properties.count()
+        return annotated_value(obj, 'properties_count', lambda obj: obj.properties.count())
 
     def get_active_properties(self, obj):
-        return obj.properties.filter(is_active=True).count()
+        return annotated_value(
+            obj, 'active_properties_count', lambda obj: obj.properties.filter(is_active=True).count()
+        )
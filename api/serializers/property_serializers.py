@@ -2,6 +2,9 @@
 Property Serializers for REST API
 """
 from rest_framework import serializers
+
+from api.annotations import annotated_value
+from apps.properties.financials import EXPENSE, REVENUE, PropertyFinancialService
 from apps.properties.models import (
     PropertyType,
     Property,
@@ -25,7 +28,7 @@ class PropertyTypeSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
     def get_properties_count(self, obj):
-        return obj.properties.count()
+        return annotated_value(obj, 'properties_count', lambda obj: obj.properties.count())
 
 
 class PropertyImageSerializer(serializers.ModelSerializer):
@@ -187,7 +190,11 @@ class PropertyListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'code', 'created_at']
 
     def get_primary_image(self, obj):
-        primary_image = obj.images.filter(is_primary=True).first()
+        # PropertyViewSet prefetches the primary image into `primary_images`
+        if hasattr(obj, 'primary_images'):
+            primary_image = obj.primary_images[0] if obj.primary_images else None
+        else:
+            primary_image = obj.images.filter(is_primary=True).first()
         if primary_image:
             request = self.context.get('request')
             if request:
@@ -254,12 +261,16 @@ class PropertyDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'code', 'created_at', 'updated_at']
 
     def get_total_expenses(self, obj):
-        total = obj.expenses.aggregate(total=serializers.Sum('amount'))['total']
-        return float(total) if total else 0.0
+        return float(self._financials(obj).total(EXPENSE))
 
     def get_total_revenues(self, obj):
-        total = obj.revenues.aggregate(total=serializers.Sum('amount'))['total']
-        return float(total) if total else 0.0
+        return float(self._financials(obj).total(REVENUE))
 
     def get_net_income(self, obj):
-        return self.get_total_revenues(obj) - self.get_total_expenses(obj)
+        return float(self._financials(obj).net())
+
+    def _financials(self, obj):
+        # Built once per object, from the revenues / expenses PropertyViewSet prefetches
+        if not hasattr(obj, '_financials'):
+            obj._financials = PropertyFinancialService.for_property(obj)
+        return obj._financials
@@ -35,9 +35,8 @@ from api.viewsets import (
 
 router = DefaultRouter()
 
-# Properties
+# Properties (nested prefixes before `properties`, whose detail route would match them)
 router.register(r'properties/types', PropertyTypeViewSet, basename='propertytype')
-router.register(r'properties', PropertyViewSet, basename='property')
 router.register(r'properties/images', PropertyImageViewSet, basename='propertyimage')
 router.register(r'properties/documents', PropertyDocumentViewSet, basename='propertydocument')
 router.register(r'properties/valuations', PropertyValuationViewSet, basename='propertyvaluation')
@@ -45,15 +44,16 @@ router.register(r'properties/amenities', PropertyAmenityViewSet, basename='prope
 router.register(r'properties/inspections', PropertyInspectionViewSet, basename='propertyinspection')
 router.register(r'properties/expenses', PropertyExpenseViewSet, basename='propertyexpense')
 router.register(r'properties/revenues', PropertyRevenueViewSet, basename='propertyrevenue')
+router.register(r'properties', PropertyViewSet, basename='property')
 
 # Owners & Clients
 router.register(r'owners', OwnerViewSet, basename='owner')
 router.register(r'clients', ClientViewSet, basename='client')
 
 # Contracts
-router.register(r'contracts', ContractViewSet, basename='contract')
 router.register(r'contracts/payments', ContractPaymentViewSet, basename='contractpayment')
 router.register(r'contracts/renewals', ContractRenewalViewSet, basename='contractrenewal')
+router.register(r'contracts', ContractViewSet, basename='contract')
 
 # Maintenance
 router.register(r'maintenance/categories', MaintenanceCategoryViewSet, basename='maintenancecategory')
@@ -4,15 +4,20 @@ Client ViewSets for REST API
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Count, Q
 
+from api.filters import IndexedSearchFilter
 from apps.clients.models import Client
 from api.serializers import ClientSerializer, ClientListSerializer
 
 
 class ClientViewSet(viewsets.ModelViewSet):
-    queryset = Client.objects.all()
+    queryset = Client.objects.annotate(
+        contracts_count=Count('contracts'),
+        active_contracts_count=Count('contracts', filter=Q(contracts__status='active')),
+    )
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'email', 'phone', 'national_id']
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
@@ -5,6 +5,8 @@ from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 
+from api.annotations import related_sum
+from api.filters import IndexedSearchFilter
 from apps.contracts.models import Contract, ContractPayment, ContractRenewal
 from api.serializers import (
     ContractSerializer,
@@ -17,8 +19,8 @@ from api.serializers import (
 class ContractViewSet(viewsets.ModelViewSet):
     queryset = Contract.objects.select_related('property', 'client')
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['contract_number', 'property__code', 'client__name']
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
+    search_fields = ['contract_number', 'client__name', 'property__title', 'property__code']
     ordering_fields = ['start_date', 'created_at']
     ordering = ['-created_at']
 
@@ -27,6 +29,15 @@ class ContractViewSet(viewsets.ModelViewSet):
             return ContractListSerializer
         return ContractSerializer
 
+    def get_queryset(self):
+        """Payments, renewals and the paid total read by ContractSerializer"""
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return queryset
+        return queryset.prefetch_related('payments', 'renewals').annotate(
+            paid_total=related_sum(ContractPayment, 'amount', 'contract'),
+        )
+
 
 class ContractPaymentViewSet(viewsets.ModelViewSet):
     queryset = ContractPayment.objects.all()
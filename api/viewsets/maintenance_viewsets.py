@@ -4,7 +4,9 @@ Maintenance ViewSets for REST API
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Count
 
+from api.filters import IndexedSearchFilter
 from apps.maintenance.models import (
     MaintenanceCategory,
     MaintenanceRequest,
@@ -21,16 +23,16 @@ from api.serializers import (
 
 
 class MaintenanceCategoryViewSet(viewsets.ModelViewSet):
-    queryset = MaintenanceCategory.objects.all()
+    queryset = MaintenanceCategory.objects.annotate(requests_count=Count('requests')).order_by('name')
     serializer_class = MaintenanceCategorySerializer
     permission_classes = [IsAuthenticated]
 
 
 class MaintenanceRequestViewSet(viewsets.ModelViewSet):
-    queryset = MaintenanceRequest.objects.select_related('property', 'category')
+    queryset = MaintenanceRequest.objects.select_related('property', 'category', 'reported_by', 'assigned_to')
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['request_number', 'title', 'description']
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
+    search_fields = ['request_number', 'title', 'description', 'property__title', 'property__code']
     ordering_fields = ['request_date', 'created_at']
     ordering = ['-created_at']
 
@@ -6,15 +6,20 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Count, Q
 
+from api.filters import IndexedSearchFilter
 from apps.owners.models import Owner
 from api.serializers import OwnerSerializer, OwnerListSerializer
 
 
 class OwnerViewSet(viewsets.ModelViewSet):
-    queryset = Owner.objects.all()
+    queryset = Owner.objects.annotate(
+        properties_count=Count('properties'),
+        active_properties_count=Count('properties', filter=Q(properties__is_active=True)),
+    )
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'email', 'phone', 'national_id']
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
@@ -6,8 +6,10 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum, Avg, Count, Q
+from django.db.models import Sum, Avg, Count, Q, Prefetch
 
+from api.filters import IndexedSearchFilter
+from apps.properties.financials import EXPENSE, REVENUE, PropertyFinancialService
 from apps.properties.models import (
     PropertyType,
     Property,
@@ -36,7 +38,7 @@ from api.serializers import (
 
 class PropertyTypeViewSet(viewsets.ModelViewSet):
     """ViewSet for PropertyType model"""
-    queryset = PropertyType.objects.all()
+    queryset = PropertyType.objects.annotate(properties_count=Count('properties'))
     serializer_class = PropertyTypeSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -47,9 +49,9 @@ class PropertyTypeViewSet(viewsets.ModelViewSet):
 
 class PropertyViewSet(viewsets.ModelViewSet):
     """ViewSet for Property model with advanced features"""
-    queryset = Property.objects.select_related('property_type', 'owner').prefetch_related('images')
+    queryset = Property.objects.select_related('property_type', 'owner')
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     search_fields = ['code', 'title', 'address', 'city', 'district']
     ordering_fields = ['created_at', 'rental_price_monthly', 'area_sqm', 'code']
     ordering = ['-created_at']
@@ -72,6 +74,29 @@ class PropertyViewSet(viewsets.ModelViewSet):
             return PropertyDetailSerializer
         return PropertySerializer
 
+    def get_queryset(self):
+        """Related rows read by the list / detail serializers, in a fixed number of queries"""
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return queryset.prefetch_related(
+                Prefetch(
+                    'images',
+                    queryset=PropertyImage.objects.filter(is_primary=True),
+                    to_attr='primary_images',
+                )
+            )
+        if self.action == 'retrieve':
+            return queryset.prefetch_related(
+                'images',
+                Prefetch('documents', queryset=PropertyDocument.objects.select_related('uploaded_by')),
+                'valuations',
+                'amenities',
+                'inspections',
+                'expenses',
+                Prefetch('revenues', queryset=PropertyRevenue.objects.select_related('contract')),
+            )
+        return queryset
+
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Get overall property statistics"""
@@ -102,11 +127,11 @@ class PropertyViewSet(viewsets.ModelViewSet):
     def financial_summary(self, request, pk=None):
         """Get financial summary for a property"""
         property_obj = self.get_object()
-        
-        total_revenues = property_obj.revenues.aggregate(total=Sum('amount'))['total'] or 0
-        total_expenses = property_obj.expenses.aggregate(total=Sum('amount'))['total'] or 0
+        series = PropertyFinancialService.for_property(property_obj)
+        total_revenues = series.total(REVENUE)
+        total_expenses = series.total(EXPENSE)
         net_income = total_revenues - total_expenses
-        
+
         summary = {
             'property_code': property_obj.code,
             'total_revenues': float(total_revenues),
@@ -117,8 +142,9 @@ class PropertyViewSet(viewsets.ModelViewSet):
             'purchase_price': float(property_obj.purchase_price or 0),
             'occupancy_rate': float(property_obj.occupancy_rate or 0),
             'average_roi': float(property_obj.average_roi or 0),
+            'lifetime_roi': round(series.roi(PropertyFinancialService.investment(property_obj)), 2),
         }
-        
+
         return Response(summary)
 
     @action(detail=False, methods=['get'])
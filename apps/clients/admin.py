@@ -15,13 +15,13 @@ class ClientAdmin(admin.ModelAdmin):
     
     fieldsets = (
         ('Basic Information', {
-            'fields': ('name', 'email', 'phone', 'mobile')
+            'fields': ('name', 'email', 'phone')
         }),
         ('Address', {
             'fields': ('address', 'city', 'country')
         }),
         ('Legal Information', {
-            'fields': ('national_id', 'date_of_birth', 'occupation')
+            'fields': ('national_id', 'employer', 'occupation', 'monthly_income')
         }),
         ('Additional Information', {
             'fields': ('notes', 'is_active')
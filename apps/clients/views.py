@@ -5,8 +5,9 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q, Count, Sum
+from django.db.models import Count, Sum
 
+from apps.core.search import get_search_index
 from .models import Client
 from .forms import ClientForm, ClientSearchForm
 
@@ -21,12 +22,7 @@ def client_list(request):
         filters = search_form.cleaned_data
         search = filters.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search)
-                | Q(email__icontains=search)
-                | Q(phone__icontains=search)
-                | Q(national_id__icontains=search)
-            )
+            queryset = get_search_index('client').filter(queryset, search)
         
         if filters.get('city'):
             queryset = queryset.filter(city__icontains=filters['city'])
@@ -31,10 +31,10 @@ class ContractAdmin(admin.ModelAdmin):
             'fields': ('start_date', 'end_date')
         }),
         ('Financial', {
-            'fields': ('rent_amount', 'deposit_amount', 'payment_frequency')
+            'fields': ('rent_amount', 'security_deposit', 'payment_frequency')
         }),
         ('Status', {
-            'fields': ('status', 'terms_conditions', 'notes')
+            'fields': ('status', 'terms_and_conditions', 'notes')
         }),
         ('Meta', {
             'fields': ('created_at', 'updated_at'),
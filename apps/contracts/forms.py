@@ -1,6 +1,8 @@
 """Forms for Contracts app"""
 from django import forms
 from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from apps.properties.occupancy import BOOKING_FIELDS, OccupancyTimeline
 from .models import Contract, ContractPayment, ContractRenewal
 
 class ContractForm(forms.ModelForm):
@@ -41,6 +43,30 @@ class ContractForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         self.fields['contract_number'].required = False
 
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+
+        if start_date and end_date and end_date < start_date:
+            self.add_error('end_date', _('End date cannot be before the start date'))
+            return cleaned_data
+
+        # Reject a second contract letting the property over the same days
+        if self.instance.pk and not any(name in self.changed_data for name in BOOKING_FIELDS):
+            return cleaned_data
+        property_obj = cleaned_data.get('property')
+        error = OccupancyTimeline.booking_error(
+            property_obj.pk if property_obj else None,
+            start_date,
+            end_date,
+            cleaned_data.get('status'),
+            exclude=self.instance.pk,
+        )
+        if error:
+            self.add_error('start_date', error)
+        return cleaned_data
+
     def save(self, commit=True):
         contract = super().save(commit=False)
         if not contract.contract_number:
@@ -0,0 +1,43 @@
+"""
+Management command to run the contract expiry sweep
+Sends expiry notices inside the renewal notice window, renews lapsed
+auto_renew contracts and marks the other lapsed contracts expired. Run daily
+(or let `celery -A config beat` run process_contract_expiry).
+Usage:
+    python manage.py process_contract_expiry
+    python manage.py process_contract_expiry --date 2026-12-31
+    python manage.py process_contract_expiry --horizon 180
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.contracts.scheduler import ContractExpiryScheduler
+
+
+class Command(BaseCommand):
+    help = 'Send contract expiry notices, renew auto-renewing contracts and expire lapsed ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Process as of this ISO date instead of today')
+        parser.add_argument(
+            '--horizon',
+            type=int,
+            help='Days ahead scanned for notices (default CONTRACT_EXPIRY_HORIZON_DAYS)'
+        )
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            today = parse_date(options['date'])
+            if today is None:
+                raise CommandError(f"Invalid --date value: {options['date']}")
+
+        result = ContractExpiryScheduler.run(today=today, horizon=options['horizon'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Scanned {result['scanned']} contracts: {result['notified']} notified, "
+            f"{result['renewed']} renewed, {result['expired']} expired"
+        ))
+        for contract_number in result['renewal_conflicts']:
+            self.stdout.write(self.style.WARNING(
+                f'  {contract_number} not renewed: the property is let to another contract'
+            ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-18 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0001_initial'),
+        ('contracts', '0001_initial'),
+        ('properties', '0005_property_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='contract',
+            name='contracts_c_status_aa7a80_idx',
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['status', 'end_date'], name='contracts_c_status_537325_idx'),
+        ),
+    ]
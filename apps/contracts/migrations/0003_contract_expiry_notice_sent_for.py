@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0002_contract_status_end_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contract',
+            name='expiry_notice_sent_for',
+            field=models.DateField(blank=True, editable=False, help_text='End date the expiry notice was sent for', null=True, verbose_name='Expiry Notice Sent For'),
+        ),
+    ]
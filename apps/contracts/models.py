@@ -119,6 +119,13 @@ class Contract(models.Model):
         default=30,
         help_text=_('Days before end date to send renewal notice')
     )
+    expiry_notice_sent_for = models.DateField(
+        _('Expiry Notice Sent For'),
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_('End date the expiry notice was sent for')
+    )
     
     # Status and Notes
     status = models.CharField(
@@ -147,7 +154,8 @@ class Contract(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['contract_number']),
-            models.Index(fields=['status']),
+            # Expiry alerts: status with an end_date range
+            models.Index(fields=['status', 'end_date']),
             models.Index(fields=['start_date', 'end_date']),
         ]
 
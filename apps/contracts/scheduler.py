@@ -0,0 +1,209 @@
+"""
+Contract Expiry Scheduler for Origin App
+Daily sweep of the active contracts nearing or past their end date, found
+with one range scan of the (status, end_date) index:
+
+- contracts inside their renewal notice window get notify_contract_expiring
+  once per end date (Contract.expiry_notice_sent_for is the sent marker)
+- lapsed auto_renew contracts are renewed: the follow-up contracts (rolled
+  forward by whole terms until they cover today) and their ContractRenewal
+  rows are bulk created and the originals marked 'renewed', and each new
+  contract gets notify_contract_created; a renewal that would double-book
+  the property is skipped and the contract expires
+- every other lapsed contract is marked 'expired' with one UPDATE
+
+Run by `python manage.py process_contract_expiry` or the
+process_contract_expiry task (see CELERY_BEAT_SCHEDULE).
+"""
+import logging
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Contract, ContractRenewal
+
+logger = logging.getLogger(__name__)
+
+
+# Fields not carried over from a contract to its automatic renewal
+RENEWAL_RESET_FIELDS = {
+    'id', 'contract_number', 'start_date', 'end_date', 'signed_date', 'status',
+    'notes', 'contract_file', 'expiry_notice_sent_for', 'created_at', 'updated_at',
+}
+
+
+class ContractExpiryScheduler:
+    """
+    Expiry notices, automatic renewals and expiry of lapsed contracts
+    """
+
+    @staticmethod
+    def due(today, horizon=None):
+        """
+        Active contracts ending up to `horizon` days (CONTRACT_EXPIRY_HORIZON_DAYS,
+        the longest notice window honoured) after today, lapsed ones included
+        """
+        horizon = settings.CONTRACT_EXPIRY_HORIZON_DAYS if horizon is None else horizon
+        return Contract.objects.filter(
+            status='active',
+            end_date__lte=today + timedelta(days=horizon),
+        ).order_by('end_date', 'pk')
+
+    @staticmethod
+    def contract_numbers(count, year):
+        """`count` CONT-<year>-NNNN numbers following the highest taken, as ContractForm numbers contracts"""
+        prefix = f'CONT-{year}-'
+        taken = Contract.objects.filter(contract_number__startswith=prefix).values_list('contract_number', flat=True)
+        highest = max(
+            (int(number[len(prefix):]) for number in taken if number[len(prefix):].isdigit()),
+            default=0,
+        )
+        return [f'{prefix}{index:04d}' for index in range(highest + 1, highest + count + 1)]
+
+    @staticmethod
+    def renewal_of(contract, contract_number, today):
+        """
+        Unsaved follow-up contract with the same terms starting the day after,
+        running whole terms of the original length until it covers today
+        """
+        values = {
+            field.attname: getattr(contract, field.attname)
+            for field in Contract._meta.concrete_fields
+            if field.attname not in RENEWAL_RESET_FIELDS
+        }
+        start_date = contract.end_date + timedelta(days=1)
+        term = relativedelta(start_date, contract.start_date)
+        terms = 1
+        # Counted from the renewal's first day, so month ends do not drift
+        while start_date + term * terms - timedelta(days=1) < today:
+            terms += 1
+        return Contract(
+            contract_number=contract_number,
+            start_date=start_date,
+            end_date=start_date + term * terms - timedelta(days=1),
+            status='active',
+            **values
+        )
+
+    @staticmethod
+    def bookable(contracts, renewals):
+        """
+        Split the (contract, renewal) pairs into the renewals that keep the
+        property free of double bookings and the contracts whose renewal
+        would overlap another occupying contract (or an earlier renewal)
+        """
+        from apps.properties.occupancy import OccupancyTimeline
+
+        timelines = OccupancyTimeline.for_properties({contract.property_id for contract in contracts})
+        booked = {}
+        accepted, conflicts = [], []
+        for contract, renewal in zip(contracts, renewals):
+            error = timelines[contract.property_id].booking_message(
+                renewal.start_date, renewal.end_date, exclude=contract.pk
+            )
+            overlaps = any(
+                start <= renewal.end_date and renewal.start_date <= end
+                for start, end in booked.get(contract.property_id, [])
+            )
+            if error or overlaps:
+                conflicts.append(contract)
+                continue
+            booked.setdefault(contract.property_id, []).append((renewal.start_date, renewal.end_date))
+            accepted.append((contract, renewal))
+        return accepted, conflicts
+
+    @staticmethod
+    def run(today=None, horizon=None):
+        """
+        Process the due contracts in one transaction, returns {scanned,
+        notified, renewed, renewal_conflicts, expired}; renewal_conflicts
+        lists the auto_renew contracts left to expire because their renewal
+        would double-book the property
+        """
+        from apps.core.search import get_search_index
+        from apps.core.snapshots import DashboardSnapshotCache
+        from apps.core.tasks import queue_notification
+
+        today = today or timezone.now().date()
+        now = timezone.now()
+
+        with transaction.atomic():
+            due = list(ContractExpiryScheduler.due(today, horizon).select_for_update())
+            lapsed = [contract for contract in due if contract.end_date < today]
+            to_notify = [
+                contract for contract in due
+                if contract.end_date >= today
+                and (contract.end_date - today).days <= contract.renewal_notice_days
+                and contract.expiry_notice_sent_for != contract.end_date
+            ]
+            candidates = [
+                contract for contract in lapsed
+                if contract.auto_renew and contract.end_date >= contract.start_date
+            ]
+
+            for contract in to_notify:
+                days_until_expiry = (contract.end_date - today).days
+                queue_notification(
+                    'notify_contract_expiring', contract, days_until_expiry,
+                    idempotency_key=f'contract-expiring:{contract.pk}:{contract.end_date}',
+                )
+            if to_notify:
+                Contract.objects.filter(pk__in=[contract.pk for contract in to_notify]).update(
+                    expiry_notice_sent_for=F('end_date')
+                )
+
+            to_renew, conflicts = [], []
+            if candidates:
+                numbers = ContractExpiryScheduler.contract_numbers(len(candidates), today.year)
+                to_renew, conflicts = ContractExpiryScheduler.bookable(candidates, [
+                    ContractExpiryScheduler.renewal_of(contract, number, today)
+                    for contract, number in zip(candidates, numbers)
+                ])
+            for contract in conflicts:
+                logger.warning(
+                    'Contract %s not renewed: the property is let to another contract', contract.contract_number
+                )
+
+            if to_renew:
+                renewals = Contract.objects.bulk_create([renewal for _, renewal in to_renew])
+                ContractRenewal.objects.bulk_create([
+                    ContractRenewal(
+                        original_contract=contract,
+                        new_contract=renewal,
+                        renewal_date=today,
+                        notes='Automatic renewal',
+                    )
+                    for (contract, _), renewal in zip(to_renew, renewals)
+                ])
+                Contract.objects.filter(pk__in=[contract.pk for contract, _ in to_renew]).update(
+                    status='renewed', updated_at=now
+                )
+                # bulk_create sends no signals: index the new contracts and
+                # queue their created notifications ourselves
+                get_search_index('contract').index(
+                    Contract.objects.filter(pk__in=[renewal.pk for renewal in renewals])
+                )
+                for renewal in renewals:
+                    queue_notification('notify_contract_created', renewal)
+
+            # Every lapsed contract still active, renewal conflicts included.
+            # Renewals end today or later, so none of them is caught.
+            expired = Contract.objects.filter(status='active', end_date__lt=today).update(
+                status='expired', updated_at=now
+            )
+
+            if to_renew or expired:
+                # Neither update() nor bulk_create() sends signals
+                transaction.on_commit(lambda: DashboardSnapshotCache.invalidate('contracts'))
+
+        return {
+            'scanned': len(due),
+            'notified': len(to_notify),
+            'renewed': len(to_renew),
+            'renewal_conflicts': [contract.contract_number for contract in conflicts],
+            'expired': expired,
+        }
@@ -0,0 +1,25 @@
+"""
+Background tasks for Contracts module
+"""
+from celery import shared_task
+from django.conf import settings
+
+from apps.core.tasks import claim_task, release_task
+
+
+@shared_task
+def process_contract_expiry():
+    """
+    Daily contract expiry sweep (see CELERY_BEAT_SCHEDULE): expiry notices,
+    automatic renewals and expired statuses. Overlapping runs are skipped.
+    """
+    from .scheduler import ContractExpiryScheduler
+
+    key = 'process-contract-expiry'
+    if not claim_task(key, timeout=settings.CONTRACT_EXPIRY_LOCK_TIMEOUT):
+        return None
+
+    try:
+        return ContractExpiryScheduler.run()
+    finally:
+        release_task(key)
@@ -0,0 +1,194 @@
+"""
+Contract expiry scheduler tests for Origin App
+ContractExpiryScheduler.run with a fixed `today`: expiry notices sent once per
+end date, automatic renewals (numbering, length, double bookings) and the
+single UPDATE expiring every other lapsed contract.
+"""
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.clients.models import Client
+from apps.contracts.models import Contract, ContractRenewal
+from apps.contracts.scheduler import ContractExpiryScheduler
+from apps.owners.models import Owner
+from apps.properties.models import Property, PropertyType
+
+
+TODAY = date(2026, 10, 18)
+
+
+@mock.patch('apps.core.tasks.queue_notification')
+class ContractExpirySchedulerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = Owner.objects.create(name='Scheduler Owner', phone='01000000000', national_id='29001010000001')
+        cls.property_type = PropertyType.objects.create(name='Apartment')
+        cls.client_record = Client.objects.create(
+            name='Scheduler Tenant', phone='01000000001', national_id='29001010000002', address='Cairo'
+        )
+
+    @classmethod
+    def contract(cls, number, start_date, end_date, **values):
+        prop = Property.objects.create(
+            title=f'Flat {number}',
+            code=f'SCH-{number}',
+            property_type=cls.property_type,
+            owner=cls.owner,
+            address='1 Nile Street',
+            city='Cairo',
+            area_sqm=Decimal('120'),
+        )
+        values.setdefault('status', 'active')
+        return Contract.objects.create(
+            contract_number=number,
+            property=prop,
+            client=cls.client_record,
+            start_date=start_date,
+            end_date=end_date,
+            rent_amount=Decimal('5000'),
+            **values
+        )
+
+    def run_scheduler(self, today=TODAY):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ContractExpiryScheduler.run(today=today)
+
+    def expiry_notices(self, queue_notification):
+        """(days until expiry, idempotency key) of the queued expiry notices"""
+        return [
+            (call.args[2], call.kwargs['idempotency_key'])
+            for call in queue_notification.call_args_list
+            if call.args[0] == 'notify_contract_expiring'
+        ]
+
+    def test_expiry_notice_is_sent_once_per_end_date(self, queue_notification):
+        contract = self.contract('CONT-N', date(2025, 11, 1), date(2026, 10, 31), renewal_notice_days=30)
+
+        result = self.run_scheduler()
+        self.assertEqual(result['notified'], 1)
+        self.assertEqual(
+            self.expiry_notices(queue_notification), [(13, f'contract-expiring:{contract.pk}:2026-10-31')]
+        )
+        contract.refresh_from_db()
+        self.assertEqual(contract.expiry_notice_sent_for, date(2026, 10, 31))
+
+        queue_notification.reset_mock()
+        self.assertEqual(self.run_scheduler(date(2026, 10, 19))['notified'], 0)
+        self.assertEqual(self.expiry_notices(queue_notification), [])
+
+    def test_moved_end_date_is_notified_again(self, queue_notification):
+        contract = self.contract('CONT-M', date(2025, 11, 1), date(2026, 10, 31), renewal_notice_days=30)
+        self.run_scheduler()
+
+        Contract.objects.filter(pk=contract.pk).update(end_date=date(2026, 11, 10))
+        queue_notification.reset_mock()
+        self.assertEqual(self.run_scheduler()['notified'], 1)
+        self.assertEqual(
+            self.expiry_notices(queue_notification), [(23, f'contract-expiring:{contract.pk}:2026-11-10')]
+        )
+
+    def test_outside_notice_window_is_not_notified(self, queue_notification):
+        self.contract('CONT-W', date(2025, 12, 1), date(2026, 11, 30), renewal_notice_days=30)
+        result = self.run_scheduler()
+        self.assertEqual((result['scanned'], result['notified']), (1, 0))
+        self.assertEqual(self.expiry_notices(queue_notification), [])
+
+    def test_renewal_numbering_and_length(self, queue_notification):
+        self.contract('CONT-2026-0001', date(2020, 1, 1), date(2020, 12, 31), status='expired')
+        self.contract('CONT-2026-0004', date(2021, 1, 1), date(2021, 12, 31), status='expired')
+        first = self.contract('CONT-A', date(2025, 10, 1), date(2026, 9, 30), auto_renew=True)
+        second = self.contract('CONT-B', date(2026, 4, 1), date(2026, 9, 30), auto_renew=True)
+        queue_notification.reset_mock()
+
+        result = self.run_scheduler()
+        self.assertEqual(result['renewed'], 2)
+        self.assertEqual(result['renewal_conflicts'], [])
+
+        renewals = {
+            renewal.original_contract_id: renewal.new_contract
+            for renewal in ContractRenewal.objects.select_related('new_contract')
+        }
+        # Numbers follow the highest of the year's sequence
+        self.assertEqual(
+            sorted(contract.contract_number for contract in renewals.values()),
+            ['CONT-2026-0005', 'CONT-2026-0006'],
+        )
+        self.assertEqual(
+            (renewals[first.pk].start_date, renewals[first.pk].end_date), (date(2026, 10, 1), date(2027, 9, 30))
+        )
+        self.assertEqual(
+            (renewals[second.pk].start_date, renewals[second.pk].end_date), (date(2026, 10, 1), date(2027, 3, 31))
+        )
+        self.assertEqual(renewals[first.pk].status, 'active')
+        self.assertEqual(renewals[first.pk].rent_amount, Decimal('5000'))
+        self.assertEqual(
+            set(Contract.objects.filter(pk__in=[first.pk, second.pk]).values_list('status', flat=True)), {'renewed'}
+        )
+        # bulk_create sends no post_save, the scheduler queues the created notices
+        self.assertEqual(
+            sorted(
+                call.args[1].pk for call in queue_notification.call_args_list
+                if call.args[0] == 'notify_contract_created'
+            ),
+            sorted(renewal.pk for renewal in renewals.values()),
+        )
+
+    def test_lapsed_renewal_rolls_forward_to_today(self, queue_notification):
+        contract = self.contract('CONT-L', date(2024, 1, 1), date(2024, 12, 31), auto_renew=True)
+
+        self.assertEqual(self.run_scheduler()['renewed'], 1)
+        renewal = ContractRenewal.objects.get(original_contract=contract).new_contract
+        self.assertEqual((renewal.start_date, renewal.end_date), (date(2025, 1, 1), date(2026, 12, 31)))
+        self.assertEqual(renewal.status, 'active')
+
+        # Nothing left to do on the next run
+        result = self.run_scheduler()
+        self.assertEqual((result['renewed'], result['expired']), (0, 0))
+
+    def test_renewal_that_would_double_book_expires(self, queue_notification):
+        contract = self.contract('CONT-C', date(2025, 10, 1), date(2026, 9, 30), auto_renew=True)
+        Contract.objects.create(
+            contract_number='CONT-NEXT',
+            property=contract.property,
+            client=self.client_record,
+            start_date=date(2026, 11, 1),
+            end_date=date(2027, 10, 31),
+            rent_amount=Decimal('6000'),
+            status='active',
+        )
+
+        with self.assertLogs('apps.contracts.scheduler', 'WARNING') as logs:
+            result = self.run_scheduler()
+        self.assertIn('CONT-C not renewed', logs.output[0])
+        self.assertEqual(result['renewed'], 0)
+        self.assertEqual(result['renewal_conflicts'], ['CONT-C'])
+        self.assertEqual(result['expired'], 1)
+        contract.refresh_from_db()
+        self.assertEqual(contract.status, 'expired')
+        self.assertFalse(ContractRenewal.objects.exists())
+
+    def test_lapsed_contracts_expire_in_one_update(self, queue_notification):
+        for number in range(5):
+            self.contract(f'CONT-E{number}', date(2025, 1, 1), date(2026, 10, number + 1))
+        current = self.contract('CONT-CURRENT', date(2026, 1, 1), date(2026, 12, 31))
+        ending_today = self.contract('CONT-TODAY', date(2025, 10, 19), TODAY)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = self.run_scheduler()
+
+        self.assertEqual(result['expired'], 5)
+        updates = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "contracts_contract" SET "status"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Contract.objects.filter(status='expired').count(), 5)
+        # The end date is the last day of the contract
+        self.assertEqual(Contract.objects.get(pk=ending_today.pk).status, 'active')
+        self.assertEqual(Contract.objects.get(pk=current.pk).status, 'active')
@@ -1,13 +1,14 @@
 """Views for Contracts app"""
-from datetime import timedelta
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db.models import Q, Sum, Count
+from django.db.models import Sum, Count
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 
+from apps.core.search import get_search_index
+from apps.core.statistics import DashboardStatisticsService
 from .forms import (
     ContractForm,
     ContractPaymentForm,
@@ -26,11 +27,7 @@ def contract_list(request):
         data = search_form.cleaned_data
 
         if data.get('search'):
-            queryset = queryset.filter(
-                Q(contract_number__icontains=data['search'])
-                | Q(client__name__icontains=data['search'])
-                | Q(property__title__icontains=data['search'])
-            )
+            queryset = get_search_index('contract').filter(queryset, data['search'])
 
         if data.get('status'):
             queryset = queryset.filter(status=data['status'])
@@ -75,29 +72,27 @@ def contract_list(request):
     query_params.pop('page', None)
     pagination_querystring = query_params.urlencode()
 
-    today = timezone.now().date()
-    upcoming_threshold = today + timedelta(days=30)
-
-    summary_all = Contract.objects.all()
-    portfolio_rent_total = summary_all.aggregate(total=Sum('rent_amount'))['total'] or 0
+    # Portfolio figures come from the dashboard snapshot, refreshed on contract
+    # writes and by the contract expiry sweep
+    stats = DashboardStatisticsService.get_cached_contract_stats()
     context = {
         'contracts': page_obj,
         'search_form': search_form,
         'sort_option': sort_option,
         'filter_applied': any(v for k, v in request.GET.items() if k not in ['page', 'sort']),
-        'total_contracts': summary_all.count(),
-        'total_count': summary_all.count(),
-        'active_contracts': summary_all.filter(status='active').count(),
-        'active_count': summary_all.filter(status='active').count(),
-        'expiring_soon': summary_all.filter(end_date__range=(today, upcoming_threshold)).count(),
-        'expiring_soon_count': summary_all.filter(end_date__range=(today, upcoming_threshold)).count(),
-        'expired_contracts': summary_all.filter(status='expired').count(),
-        'overdue_contracts_count': summary_all.filter(end_date__lt=today, status__in=['active', 'renewed']).count(),
+        'total_contracts': stats.total,
+        'total_count': stats.total,
+        'active_contracts': stats.active,
+        'active_count': stats.active,
+        'expiring_soon': stats.ending_soon,
+        'expiring_soon_count': stats.ending_soon,
+        'expired_contracts': stats.expired,
+        'overdue_contracts_count': stats.overdue,
         'pending_payments_count': ContractPayment.objects.filter(status='pending').count(),
         'pagination_querystring': pagination_querystring,
         'filtered_rent_value': filtered_rent_total,
-        'total_monthly_rent': portfolio_rent_total,
-        'total_rent_value': portfolio_rent_total,
+        'total_monthly_rent': stats.rent_total,
+        'total_rent_value': stats.rent_total,
     }
     return render(request, 'contracts/list.html', context)
 
@@ -6,8 +6,9 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
 from .models import (
     Permission, Role, UserProfile, AuditLog,
-    SystemSetting, Notification, NotificationPreference
+    SystemSetting, Notification, NotificationArchive, NotificationPreference
 )
+from .services import NotificationService
 
 class UserProfileInline(admin.StackedInline):
     model = UserProfile
@@ -74,8 +75,8 @@ class SystemSettingAdmin(admin.ModelAdmin):
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ['user', 'title', 'notification_type', 'priority', 'is_read', 'is_sent_email', 'created_at']
-    list_filter = ['notification_type', 'priority', 'is_read', 'is_sent_email', 'created_at']
+    list_display = ['user', 'title', 'notification_type', 'priority', 'is_read', 'is_archived', 'is_sent_email', 'created_at']
+    list_filter = ['notification_type', 'priority', 'is_read', 'is_archived', 'is_sent_email', 'created_at']
     search_fields = ['user__username', 'user__email', 'title', 'message']
     readonly_fields = ['created_at', 'read_at', 'email_sent_at']
     list_select_related = ['user']
@@ -95,7 +96,7 @@ class NotificationAdmin(admin.ModelAdmin):
             'fields': ('link', 'action_label', 'action_url')
         }),
         ('Status', {
-            'fields': ('is_read', 'read_at', 'is_sent_email', 'email_sent_at')
+            'fields': ('is_read', 'read_at', 'is_archived', 'is_sent_email', 'email_sent_at')
         }),
         ('Scheduling', {
             'fields': ('scheduled_for',),
@@ -110,17 +111,24 @@ class NotificationAdmin(admin.ModelAdmin):
         }),
     )
     
-    actions = ['mark_as_read', 'send_email_notifications']
+    actions = ['mark_as_read', 'archive', 'send_email_notifications']
     
     def mark_as_read(self, request, queryset):
-        count = 0
-        for notification in queryset:
-            if not notification.is_read:
-                notification.mark_as_read()
-                count += 1
+        count = NotificationService.bulk_mark_as_read(queryset)
         self.message_user(request, f'{count} notifications marked as read.')
     mark_as_read.short_description = 'Mark selected as read'
     
+    def archive(self, request, queryset):
+        count = NotificationService.bulk_archive(queryset)
+        self.message_user(request, f'{count} notifications archived.')
+    archive.short_description = 'Archive selected'
+    
+    def delete_queryset(self, request, queryset):
+        NotificationService.bulk_delete(queryset)
+    
+    def delete_model(self, request, obj):
+        NotificationService.bulk_delete(Notification.objects.filter(pk=obj.pk))
+    
     def send_email_notifications(self, request, queryset):
         count = 0
         for notification in queryset:
@@ -168,3 +176,17 @@ class NotificationPreferenceAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(NotificationArchive)
+class NotificationArchiveAdmin(admin.ModelAdmin):
+    list_display = ['user', 'title', 'notification_type', 'priority', 'created_at', 'archived_at']
+    list_filter = ['notification_type', 'priority', 'archived_at']
+    search_fields = ['user__username', 'title', 'message']
+    list_select_related = ['user']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.core'
+    verbose_name = 'Core'
+    
+    def ready(self):
+        """Connect notification, unread counter, dashboard snapshot invalidation and search index signals"""
+        import apps.core.checks
+        import apps.core.signals
+        from apps.core import search, snapshots, unread
+        snapshots.connect_signals()
+        unread.connect_signals()
+        search.connect_signals()
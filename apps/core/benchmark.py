@@ -0,0 +1,425 @@
+"""
+Endpoint Benchmark for Origin App
+Seeds a portfolio (create_realistic_data, then cloned properties with their
+contracts, maintenance requests, revenues and expenses up to `size`, plus a
+row of every model the data set leaves empty), GETs every URL of
+config/urls.py and api/urls.py that can be reversed as a logged-in
+superuser, each parameter filled with the pk of an existing row of the
+route's model, and records status, query count, wall time and peak Python
+memory per endpoint. Every request is rolled back, so each endpoint is
+measured against the same seeded rows whatever its neighbours do on GET. Results are compared with a committed baseline
+(benchmark_baseline.json: status and query count only, the figures that
+do not depend on the machine) so N+1 queries, missing rows (404) and server
+errors show up before deploy; pages already broken are recorded with their
+status until they are fixed. Wall time and memory are compared against a
+local baseline written with `--output`.
+
+Used by `python manage.py benchmark_endpoints` and apps.core.tests.test_benchmark,
+always against a test database.
+"""
+import io
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'tests' / 'benchmark_baseline.json'
+DEFAULT_SIZE = 12
+
+# Allowed drift from the baseline: extra queries, and time / memory growth
+# (a factor of the baseline, ignored under the floor to absorb noise)
+TOLERANCES = {
+    'queries': 0,
+    'time_factor': 3.0,
+    'time_floor_ms': 100,
+    'memory_factor': 2.0,
+    'memory_floor_kb': 1024,
+}
+
+# Endpoints whose GET ends the session or leaves the site
+SKIPPED_URL_NAMES = {'set_language', 'core:logout', 'admin:logout'}
+
+# URL parameters filled with the pk of a seeded row
+PK_PARAMETERS = {'pk', 'property_pk', 'contract_pk'}
+
+# Path segments in front of a pk that do not name its model
+# (`maintenance/<pk>/` is a request, `partial/row/<pk>/` a property)
+SEGMENT_MODELS = {
+    'maintenance': 'maintenance.MaintenanceRequest',
+    'form': 'properties.Property',
+    'row': 'properties.Property',
+}
+
+# Result fields kept in the committed baseline; time and memory depend on
+# the machine and only go to local baselines (--output)
+BASELINE_FIELDS = ('url', 'status', 'queries')
+
+# Static files storage without a manifest, templates render without collectstatic
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+class EndpointBenchmark:
+    """
+    Seeding, endpoint discovery, measurement and baseline comparison
+    """
+
+    USERNAME = 'benchmark'
+
+    @staticmethod
+    def seed(size=DEFAULT_SIZE):
+        """Load the realistic data set, grow it to `size` properties, returns the user"""
+        call_command('create_realistic_data', stdout=io.StringIO())
+        EndpointBenchmark.grow(size)
+        user = User.objects.create_superuser(EndpointBenchmark.USERNAME, 'benchmark@example.com', 'benchmark')
+        EndpointBenchmark.seed_details(user)
+        return user
+
+    @staticmethod
+    def grow(size):
+        """
+        Clone the seeded properties (round robin) with their contracts and
+        payments, maintenance requests, revenues and expenses until there are
+        `size` properties
+        """
+        from apps.contracts.models import Contract, ContractPayment
+        from apps.maintenance.models import MaintenanceRequest
+        from apps.properties.financials import FinancialRollupService
+        from apps.properties.models import Property, PropertyExpense, PropertyRevenue
+
+        templates = list(Property.objects.order_by('pk'))
+        for number in range(len(templates), size):
+            template = templates[number % len(templates)]
+            suffix = f'-B{number}'
+
+            prop = Property.objects.get(pk=template.pk)
+            prop.pk = None
+            prop.code = f'{template.code}{suffix}'
+            prop.save()
+
+            for model in (PropertyRevenue, PropertyExpense):
+                rows = list(model.objects.filter(property=template))
+                for row in rows:
+                    row.pk = None
+                    row.property = prop
+                model.objects.bulk_create(rows)
+
+            for contract in Contract.objects.filter(property=template):
+                payments = list(contract.payments.all())
+                contract.pk = None
+                contract.property = prop
+                contract.contract_number = f'{contract.contract_number}{suffix}'
+                contract.save()
+                for payment in payments:
+                    payment.pk = None
+                    payment.contract = contract
+                ContractPayment.objects.bulk_create(payments)
+
+            for request in MaintenanceRequest.objects.filter(property=template):
+                request.pk = None
+                request.property = prop
+                request.request_number = f'{request.request_number}{suffix}'
+                request.save()
+
+        # bulk_create skips the signals that maintain the monthly rollup
+        FinancialRollupService.rebuild()
+
+    @staticmethod
+    def seed_details(user):
+        """
+        One row of each model create_realistic_data leaves empty (property
+        media and records, renewals, maintenance schedules and attachments,
+        the sales pipeline, a notification of `user`), so their detail, edit
+        and delete routes have something to show. Files are names only.
+        """
+        from apps.contracts.models import Contract, ContractRenewal
+        from apps.core.models import Notification
+        from apps.maintenance.models import MaintenanceAttachment, MaintenanceRequest, MaintenanceSchedule
+        from apps.owners.models import Owner
+        from apps.properties.models import (
+            Property,
+            PropertyAmenity,
+            PropertyDocument,
+            PropertyImage,
+            PropertyInspection,
+            PropertyValuation,
+        )
+        from apps.sales.models import Buyer, PropertyReservation, SalesContract, SalesPayment, SalesPaymentPlan
+
+        today = timezone.now().date()
+        prop = Property.objects.order_by('pk').first()
+        PropertyImage.objects.create(property=prop, image='properties/benchmark.jpg', is_primary=True)
+        PropertyDocument.objects.create(
+            property=prop, document_type='deed', title='Title deed', file='properties/documents/benchmark.pdf'
+        )
+        PropertyValuation.objects.create(property=prop, valuation_date=today, valuation_amount=Decimal('1500000'))
+        PropertyAmenity.objects.create(property=prop, name='Parking')
+        PropertyInspection.objects.create(
+            property=prop, inspection_date=today, inspector_name='Benchmark Inspector', notes='Routine inspection'
+        )
+
+        contract = Contract.objects.order_by('pk').first()
+        renewal = Contract.objects.get(pk=contract.pk)
+        renewal.pk = None
+        renewal.contract_number = f'{contract.contract_number}-R'
+        renewal.start_date = contract.end_date + timedelta(days=1)
+        renewal.end_date = contract.end_date + timedelta(days=365)
+        renewal.status = 'draft'
+        renewal.save()
+        ContractRenewal.objects.create(original_contract=contract, new_contract=renewal, renewal_date=today)
+
+        request = MaintenanceRequest.objects.order_by('pk').first()
+        MaintenanceAttachment.objects.create(maintenance_request=request, file='maintenance/benchmark.pdf')
+        MaintenanceSchedule.objects.create(
+            property=prop, title='Elevator service', description='Quarterly elevator service',
+            frequency='quarterly', next_service_date=today + timedelta(days=30),
+        )
+
+        buyer = Buyer.objects.create(
+            buyer_type='individual', name='Benchmark Buyer', phone='01000000000', email='buyer@example.com',
+            national_id='29001010101010', address='1 Benchmark Street', city='Cairo',
+        )
+        for_sale = Property.objects.order_by('-pk').first()
+        PropertyReservation.objects.create(
+            reservation_number='RES-BENCHMARK', property=for_sale, buyer=buyer,
+            expiry_date=today + timedelta(days=14), reservation_amount=Decimal('50000'),
+            payment_method='cash', payment_reference='BENCHMARK', reserved_by=user,
+        )
+        sales_contract = SalesContract.objects.create(
+            contract_number='SC-BENCHMARK', property=for_sale, buyer=buyer, seller=Owner.objects.order_by('pk').first(),
+            sale_price=Decimal('2000000'), down_payment=Decimal('400000'), contract_date=today,
+            expected_handover_date=today + timedelta(days=180), created_by=user,
+        )
+        plan = SalesPaymentPlan.objects.create(
+            sales_contract=sales_contract, installment_number=1,
+            due_date=today + timedelta(days=30), amount=Decimal('100000'),
+        )
+        SalesPayment.objects.create(
+            sales_contract=sales_contract, payment_plan=plan, payment_type='down_payment',
+            amount=Decimal('400000'), payment_date=today, payment_method='bank_transfer',
+            reference_number='BENCHMARK', receipt_number='RCPT-BENCHMARK', received_by=user,
+        )
+
+        Notification.objects.create(user=user, title='Benchmark', message='Benchmark notification')
+
+    # ---------------------------------------------------------------
+    # Endpoints
+    # ---------------------------------------------------------------
+
+    @staticmethod
+    def endpoints():
+        """
+        [(url name, path)] of every GET-able route, each pk parameter filled
+        with the first row of the route's model (1 when there is none, which
+        shows up as a 404)
+        """
+        found = {}
+        for name, parameters, path, callback in EndpointBenchmark._routes(get_resolver().url_patterns):
+            if name in found or name in SKIPPED_URL_NAMES:
+                continue
+            if name.startswith('admin:') and parameters:
+                # The admin is covered by its index, changelists and add forms
+                continue
+            if not parameters <= PK_PARAMETERS:
+                continue
+            namespace = name.rpartition(':')[0]
+            kwargs = {
+                parameter: EndpointBenchmark._first_pk(
+                    EndpointBenchmark._route_model(namespace, path, parameter, callback)
+                )
+                for parameter in parameters
+            }
+            try:
+                found[name] = reverse(name, kwargs=kwargs)
+            except NoReverseMatch:
+                continue
+        return sorted(found.items())
+
+    @staticmethod
+    def _routes(patterns, namespace=None, parameters=frozenset(), prefix=''):
+        for pattern in patterns:
+            own = parameters | EndpointBenchmark._parameters(pattern.pattern)
+            path = prefix + str(pattern.pattern)
+            if isinstance(pattern, URLResolver):
+                nested = ':'.join(filter(None, [namespace, pattern.namespace])) or None
+                yield from EndpointBenchmark._routes(pattern.url_patterns, nested, own, path)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+                yield name, own, path, pattern.callback
+
+    @staticmethod
+    def _parameters(pattern):
+        # Regex patterns (the DRF router's) have converters too, always empty
+        if getattr(pattern, 'converters', None):
+            return frozenset(pattern.converters)
+        regex = getattr(pattern, 'regex', None)
+        return frozenset(regex.groupindex) if regex is not None else frozenset()
+
+    @staticmethod
+    def _route_model(namespace, path, parameter, callback):
+        """
+        Model of a pk parameter: the queryset or serializer model of an API
+        view, else the model named by the path segment in front of the
+        parameter (`sales/buyers/<int:pk>/` is a sales.Buyer)
+        """
+        view_class = getattr(callback, 'cls', None)
+        if view_class is not None:
+            queryset = getattr(view_class, 'queryset', None)
+            if queryset is not None:
+                return queryset.model
+            serializer_class = getattr(view_class, 'serializer_class', None)
+            if serializer_class is not None:
+                return serializer_class.Meta.model
+
+        segments = [segment for segment in path.split('/') if segment]
+        position = next(
+            (index for index, segment in enumerate(segments) if segment.strip('<>').split(':')[-1] == parameter),
+            None,
+        )
+        if not position:
+            return None
+        segment = segments[position - 1]
+        if segment in SEGMENT_MODELS:
+            return apps.get_model(SEGMENT_MODELS[segment])
+
+        name = segment.replace('-', '').lower()
+        name = name[:-3] + 'y' if name.endswith('ies') else name.rstrip('s')
+        try:
+            models = list(apps.get_app_config(namespace.split(':')[0]).get_models())
+        except LookupError:
+            return None
+        candidates = (
+            [model for model in models if model._meta.model_name == name]
+            or [model for model in models if model._meta.model_name.endswith(name)]
+        )
+        return min(candidates, key=lambda model: len(model._meta.model_name)) if candidates else None
+
+    @staticmethod
+    def _first_pk(model):
+        if model is None:
+            return 1
+        return model._default_manager.order_by('pk').values_list('pk', flat=True).first() or 1
+
+    # ---------------------------------------------------------------
+    # Measurement
+    # ---------------------------------------------------------------
+
+    @staticmethod
+    def run(user, endpoints=None):
+        """
+        GET each endpoint once, in order, from a cold cache; returns
+        {name: {url, status, queries, time_ms, peak_kb}}. Wall time includes
+        the tracemalloc overhead, like the baseline's. Each request runs in a
+        savepoint that is rolled back, so views that change data on GET
+        (approving a reservation, posting a journal entry) leave the seeded
+        rows as they were for the endpoints after them.
+        """
+        # Server errors are recorded as 500s instead of raised
+        client = Client(raise_request_exception=False)
+        cache.clear()
+        results = {}
+        tracemalloc.start()
+        try:
+            for name, url in endpoints or EndpointBenchmark.endpoints():
+                client.force_login(user)
+                with transaction.atomic():
+                    tracemalloc.reset_peak()
+                    before = tracemalloc.get_traced_memory()[0]
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        response = client.get(url)
+                        elapsed = time.perf_counter() - started
+                    peak = tracemalloc.get_traced_memory()[1]
+                    transaction.set_rollback(True)
+                results[name] = {
+                    'url': url,
+                    'status': response.status_code,
+                    'queries': len(queries),
+                    'time_ms': round(elapsed * 1000, 1),
+                    'peak_kb': round((peak - before) / 1024, 1),
+                }
+        finally:
+            tracemalloc.stop()
+        return results
+
+    # ---------------------------------------------------------------
+    # Baseline
+    # ---------------------------------------------------------------
+
+    @staticmethod
+    def load_baseline(path=BASELINE_PATH):
+        with open(path, encoding='utf-8') as baseline_file:
+            return json.load(baseline_file)
+
+    @staticmethod
+    def write_baseline(results, size, path=BASELINE_PATH, tolerances=None, fields=None):
+        """Write `results` as a baseline, keeping only `fields` of each endpoint (all by default)"""
+        if fields is not None:
+            results = {
+                name: {key: value for key, value in result.items() if key in fields}
+                for name, result in results.items()
+            }
+        baseline = {
+            'size': size,
+            'tolerances': tolerances or TOLERANCES,
+            'endpoints': results,
+        }
+        with open(path, 'w', encoding='utf-8') as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+
+    @staticmethod
+    def compare(results, baseline, checks=('status', 'queries', 'time', 'memory')):
+        """
+        Regressions of `results` against `baseline`, as readable lines.
+        A 404 (a route filled with a missing row) or a server error is a
+        regression unless the baseline records the same status for the route
+        (a known broken page). Endpoints missing from the baseline are
+        otherwise not regressions, an endpoint whose status changed is only
+        compared on the status, and time and memory only when the baseline
+        records them.
+        """
+        tolerances = {**TOLERANCES, **baseline.get('tolerances', {})}
+        regressions = []
+        for name, result in sorted(results.items()):
+            expected = baseline['endpoints'].get(name)
+            broken = result['status'] == 404 or result['status'] >= 500
+            if 'status' in checks and broken and (expected is None or expected['status'] != result['status']):
+                regressions.append(f'{name}: status {result["status"]} for {result["url"]}')
+                continue
+
+            if expected is None:
+                continue
+
+            if result['status'] != expected['status']:
+                # A fixed endpoint does different work, only new errors count
+                if 'status' in checks and result['status'] >= 400:
+                    regressions.append(f'{name}: status {result["status"]}, baseline {expected["status"]}')
+                continue
+            if 'queries' in checks and result['queries'] > expected['queries'] + tolerances['queries']:
+                regressions.append(f'{name}: {result["queries"]} queries, baseline {expected["queries"]}')
+            if 'time' in checks and 'time_ms' in expected and result['time_ms'] > max(
+                expected['time_ms'] * tolerances['time_factor'], tolerances['time_floor_ms']
+            ):
+                regressions.append(f'{name}: {result["time_ms"]} ms, baseline {expected["time_ms"]} ms')
+            if 'memory' in checks and 'peak_kb' in expected and result['peak_kb'] > max(
+                expected['peak_kb'] * tolerances['memory_factor'], tolerances['memory_floor_kb']
+            ):
+                regressions.append(f'{name}: {result["peak_kb"]} KB peak, baseline {expected["peak_kb"]} KB')
+        return regressions
@@ -0,0 +1,56 @@
+"""
+Deployment Checks for Origin App
+System checks for settings that only work together: background workers
+need the web service's database, request profiling a cache shared by the
+web workers.
+"""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+from .profiling import shared_cache
+
+
+@register()
+def check_celery_database(app_configs, **kwargs):
+    """
+    Tasks sent to a broker run in the worker and beat processes, which only
+    see the web database if it is a shared server rather than a SQLite file
+    """
+    if settings.CELERY_TASK_ALWAYS_EAGER or not settings.CELERY_BROKER_URL:
+        return []
+    if settings.DATABASES['default']['ENGINE'] != 'django.db.backends.sqlite3':
+        return []
+    return [
+        Warning(
+            'CELERY_BROKER_URL is set but the database is a SQLite file.',
+            hint=(
+                'A worker or beat process in another container reads and writes its own copy of '
+                'the database. Unset CELERY_BROKER_URL to run tasks in the web process, or run the '
+                'worker on the same machine and filesystem as web.'
+            ),
+            id='core.W001',
+        )
+    ]
+
+
+@register()
+def check_profiling_cache(app_configs, **kwargs):
+    """
+    Profiling statistics are only complete when every worker writes them to
+    the same cache; QueryProfilingMiddleware records nothing otherwise
+    """
+    if not settings.PERF_PROFILING_ENABLED and settings.PERF_PROFILING_SAMPLE_PERCENT <= 0:
+        return []
+    if shared_cache():
+        return []
+    return [
+        Warning(
+            'Request profiling is enabled but the cache is private to each process.',
+            hint=(
+                f"CACHE_BACKEND is {settings.CACHES['default']['BACKEND']}, so profiling is off. Set "
+                'CACHE_BACKEND to a shared cache (django.core.cache.backends.redis.RedisCache, or '
+                'django.core.cache.backends.db.DatabaseCache after `manage.py createcachetable`).'
+            ),
+            id='core.W002',
+        )
+    ]
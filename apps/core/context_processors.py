@@ -0,0 +1,14 @@
+"""
+Template context processors for Origin App core
+"""
+from .unread import UnreadCounter
+
+
+def notifications(request):
+    """Unread notification count for the sidebar and topbar badges (read from the counter cache)"""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {
+        'unread_notifications_count': UnreadCounter.get(user.pk),
+    }
@@ -0,0 +1,193 @@
+"""
+Notification Email Queue for Origin App
+Notification emails are marked pending when the notification is written,
+with `scheduled_for` set to when they may go out (later for digest users, or
+after the user's quiet hours). Due emails are delivered by a background task
+after the transaction commits, and by the periodic dispatcher, over a single
+mail connection per batch; a digest user's due notifications are folded into
+one email.
+"""
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class EmailDeliveryError(Exception):
+    """Some pending emails could not be sent (they stay pending)"""
+
+
+class NotificationEmailQueue:
+    """
+    Schedules and delivers pending notification emails
+    """
+
+    # Sent right away, whatever the user's digest and quiet hours settings
+    IMMEDIATE_PRIORITIES = ('urgent',)
+
+    @staticmethod
+    def delivery_time(preferences, priority, requested=None, now=None):
+        """
+        When a notification email may be sent: the requested time (or now),
+        moved to the user's next digest and out of their quiet hours
+        """
+        now = now or timezone.now()
+        moment = requested or now
+        if preferences is None or priority in NotificationEmailQueue.IMMEDIATE_PRIORITIES:
+            return moment
+
+        if preferences.digest_period:
+            moment = preferences.next_digest_time(moment)
+        return preferences.after_quiet_hours(moment)
+
+    @staticmethod
+    def enqueue(notifications):
+        """
+        Schedule delivery of the given notifications once the transaction
+        commits; those scheduled for later are left to the dispatcher
+        """
+        from .tasks import send_notification_emails
+
+        now = timezone.now()
+        notification_ids = [
+            notification.pk for notification in notifications
+            if notification.email_pending and notification.scheduled_for <= now
+        ]
+        if notification_ids:
+            transaction.on_commit(lambda: send_notification_emails.delay(notification_ids))
+
+    @staticmethod
+    def deliver(notification_ids=None, raise_on_failure=False, now=None):
+        """
+        Send every due pending email (optionally limited to
+        `notification_ids`) over one connection, returns the number of
+        notifications delivered. Emails falling in the user's quiet hours
+        are pushed back, a digest user gets one email for all their due
+        notifications. Each email's rows are claimed (taken off pending)
+        before it is sent, so overlapping runs never send the same
+        notification twice; rows whose email fails are pending again.
+        """
+        from .models import Notification
+
+        now = now or timezone.now()
+        pending = Notification.objects.filter(
+            scheduled_for__lte=now,
+            is_sent_email=False,
+            email_pending=True
+        ).select_related('user__notification_preferences').order_by('user_id', 'scheduled_for')
+        if notification_ids is not None:
+            pending = pending.filter(pk__in=notification_ids)
+
+        batches = defaultdict(list)
+        deferred = []
+        for notification in pending:
+            if not notification.user.email:
+                continue
+            preferences = NotificationEmailQueue._preferences(notification.user)
+            if (
+                preferences is not None
+                and notification.priority not in NotificationEmailQueue.IMMEDIATE_PRIORITIES
+                and preferences.in_quiet_hours(now)
+            ):
+                notification.scheduled_for = preferences.after_quiet_hours(now)
+                deferred.append(notification)
+            elif (
+                preferences is not None
+                and preferences.digest_period
+                and notification.priority not in NotificationEmailQueue.IMMEDIATE_PRIORITIES
+            ):
+                batches[(notification.user_id, preferences.digest_period)].append(notification)
+            else:
+                batches[(notification.user_id, notification.pk)].append(notification)
+
+        if deferred:
+            Notification.objects.bulk_update(deferred, ['scheduled_for'], batch_size=500)
+        if not batches:
+            return 0
+
+        connection = get_connection(fail_silently=False)
+        sent_ids = []
+        failures = []
+        try:
+            connection.open()
+            for notifications in batches.values():
+                ids = [notification.pk for notification in notifications]
+                if not NotificationEmailQueue._claim(ids):
+                    continue
+                try:
+                    sent = NotificationEmailQueue._message(notifications, connection).send()
+                except Exception as e:
+                    logger.warning('Failed to send email for notifications %s: %s', ids, e)
+                    sent = 0
+                if sent:
+                    sent_ids.extend(ids)
+                else:
+                    # Release the claim, the next run retries them
+                    Notification.objects.filter(pk__in=ids).update(email_pending=True)
+                    failures.extend(ids)
+        finally:
+            connection.close()
+
+        Notification.objects.filter(pk__in=sent_ids).update(
+            is_sent_email=True,
+            email_sent_at=timezone.now()
+        )
+
+        if failures and raise_on_failure:
+            raise EmailDeliveryError(f'{len(failures)} notification emails failed: {failures}')
+        return len(sent_ids)
+
+    @staticmethod
+    def _claim(notification_ids):
+        """
+        Take the rows of one email off pending with a conditional UPDATE,
+        False (and nothing claimed) if another run got any of them first
+        """
+        from .models import Notification
+
+        with transaction.atomic():
+            claimed = Notification.objects.filter(
+                pk__in=notification_ids,
+                is_sent_email=False,
+                email_pending=True
+            ).update(email_pending=False)
+            if claimed != len(notification_ids):
+                transaction.set_rollback(True)
+                return False
+        return True
+
+    @staticmethod
+    def _preferences(user):
+        from .models import NotificationPreference
+
+        try:
+            return user.notification_preferences
+        except NotificationPreference.DoesNotExist:
+            return None
+
+    @staticmethod
+    def _message(notifications, connection):
+        """One email for a single notification, or a digest of several"""
+        user = notifications[0].user
+        if len(notifications) == 1:
+            subject = notifications[0].title
+            body = notifications[0].message
+        else:
+            subject = f'You have {len(notifications)} new notifications'
+            body = '\n\n'.join(
+                f'- {notification.title}\n  {notification.message}'
+                for notification in notifications
+            )
+
+        return EmailMessage(
+            subject=subject,
+            body=body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[user.email],
+            connection=connection,
+        )
@@ -0,0 +1,47 @@
+"""
+Management command to apply the notification retention policy
+Moves read notifications older than their TTL (NOTIFICATION_RETENTION) out
+of the Notification table, in chunks.
+Usage:
+    python manage.py archive_notifications
+    python manage.py archive_notifications --mode file --path notifications-2026.jsonl.gz
+    python manage.py archive_notifications --mode purge --vacuum
+    python manage.py archive_notifications --stats
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.retention import NotificationRetention
+
+
+class Command(BaseCommand):
+    help = 'Archive (or purge) read notifications past their retention TTL'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode',
+            choices=NotificationRetention.MODES,
+            default='archive',
+            help='archive: NotificationArchive table, file: gzipped JSONL, purge: delete'
+        )
+        parser.add_argument('--path', help='Archive file for --mode file (appended to)')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows moved per transaction')
+        parser.add_argument('--vacuum', action='store_true', help='VACUUM the SQLite database afterwards')
+        parser.add_argument('--stats', action='store_true', help='Only print table metrics')
+
+    def handle(self, *args, **options):
+        if not options['stats']:
+            try:
+                moved = NotificationRetention.run(
+                    mode=options['mode'],
+                    chunk_size=options['chunk_size'],
+                    path=options['path'],
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(f"✓ {options['mode'].title()}d {moved} notifications"))
+
+            if options['vacuum'] and NotificationRetention.vacuum():
+                self.stdout.write(self.style.SUCCESS('✓ Database vacuumed'))
+
+        for name, value in NotificationRetention.metrics().items():
+            self.stdout.write(f'  {name}: {value if value is not None else "n/a"}')
@@ -0,0 +1,67 @@
+"""
+Management command to benchmark every view and API endpoint
+Usage: python manage.py benchmark_endpoints [--size N] [--update-baseline] [--output FILE] [--baseline FILE]
+
+Runs against a throwaway test database, never the configured one. The
+committed baseline only holds status codes and query counts; to watch wall
+time and memory, record a local baseline and compare later runs with it:
+    python manage.py benchmark_endpoints --output local-benchmark.json
+    python manage.py benchmark_endpoints --baseline local-benchmark.json
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from apps.core.benchmark import BASELINE_FIELDS, BASELINE_PATH, DEFAULT_SIZE, STORAGES, EndpointBenchmark
+
+
+class Command(BaseCommand):
+    help = 'Measure query count, wall time and peak memory of every endpoint and compare with the baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, help=f'Properties in the seeded portfolio (default: the baseline size, or {DEFAULT_SIZE})')
+        parser.add_argument('--baseline', default=str(BASELINE_PATH), help='Baseline JSON file')
+        parser.add_argument('--update-baseline', action='store_true', help='Write the status codes and query counts as the new baseline')
+        parser.add_argument('--output', help='Also write the full results (time and memory included) as a baseline to this file')
+
+    def handle(self, *args, **options):
+        try:
+            baseline = EndpointBenchmark.load_baseline(options['baseline'])
+        except FileNotFoundError:
+            baseline = None
+        size = options['size'] or (baseline['size'] if baseline else DEFAULT_SIZE)
+        if baseline and size != baseline['size'] and not options['update_baseline']:
+            raise CommandError(f'The baseline was recorded with --size {baseline["size"]}')
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # One outer transaction like a TestCase, so the views' atomic
+            # blocks issue the same savepoint queries as in the test suite
+            with override_settings(STORAGES=STORAGES), transaction.atomic():
+                user = EndpointBenchmark.seed(size)
+                results = EndpointBenchmark.run(user)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for name, result in sorted(results.items()):
+            self.stdout.write(
+                f'{result["status"]}  {result["queries"]:>4} q  {result["time_ms"]:>8} ms  '
+                f'{result["peak_kb"]:>9} KB  {name}'
+            )
+
+        if options['output']:
+            EndpointBenchmark.write_baseline(results, size, options['output'])
+
+        if options['update_baseline'] or baseline is None:
+            EndpointBenchmark.write_baseline(results, size, options['baseline'], fields=BASELINE_FIELDS)
+            self.stdout.write(self.style.SUCCESS(f'✓ Baseline written for {len(results)} endpoints'))
+            return
+
+        regressions = EndpointBenchmark.compare(results, baseline)
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(regression))
+        if regressions:
+            raise CommandError(f'{len(regressions)} regressions against {options["baseline"]}')
+        self.stdout.write(self.style.SUCCESS(f'✓ {len(results)} endpoints within the baseline'))
@@ -0,0 +1,17 @@
+"""
+Management command to dispatch due notification emails
+Sends scheduled notifications, daily/weekly digests and emails held back by
+quiet hours once they come due.
+Usage: python manage.py dispatch_notifications
+"""
+from django.core.management.base import BaseCommand
+
+from apps.core.email_queue import NotificationEmailQueue
+
+
+class Command(BaseCommand):
+    help = 'Send every notification email that has come due (scheduled, digest or after quiet hours)'
+
+    def handle(self, *args, **options):
+        sent = NotificationEmailQueue.deliver()
+        self.stdout.write(self.style.SUCCESS(f'✓ Delivered {sent} notifications by email'))
@@ -0,0 +1,21 @@
+"""
+Management command to rebuild the global search index
+Usage: python manage.py rebuild_search_index [--entity ENTITY ...]
+"""
+from django.core.management.base import BaseCommand
+
+from apps.core.search import SEARCH_ENTITIES, get_search_index
+
+
+class Command(BaseCommand):
+    help = 'Re-index every searchable entity (or only the given ones) for global search'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entity', action='append', choices=list(SEARCH_ENTITIES), help='Only rebuild this entity (repeatable)')
+
+    def handle(self, *args, **options):
+        for name in options['entity'] or SEARCH_ENTITIES:
+            index = get_search_index(name)
+            index.create_table()
+            count = index.rebuild()
+            self.stdout.write(self.style.SUCCESS(f'✓ Indexed {count} {name} rows ({index.__class__.__name__})'))
@@ -0,0 +1,25 @@
+"""
+Management command to check the cached unread notification counters
+Usage: python manage.py reconcile_unread_counts [--user USERNAME]
+"""
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from apps.core.unread import UnreadCounter
+
+
+class Command(BaseCommand):
+    help = 'Compare cached unread notification counts with the database and fix drifted ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only reconcile this username')
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options['user']:
+            user_ids = User.objects.filter(username=options['user']).values_list('pk', flat=True)
+
+        drifted = UnreadCounter.reconcile(user_ids)
+        for user_id, (cached, actual) in drifted.items():
+            self.stdout.write(self.style.WARNING(f'User {user_id}: cached {cached}, actual {actual}'))
+        self.stdout.write(self.style.SUCCESS(f'✓ Fixed {len(drifted)} unread counters'))
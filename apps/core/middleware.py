@@ -0,0 +1,70 @@
+"""
+Middleware for Origin App core
+"""
+import random
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware as DjangoSessionMiddleware
+from django.db import connection
+
+
+def session_save_exempt(view_func):
+    """
+    Background polling views: don't save the session on every request
+    (SESSION_SAVE_EVERY_REQUEST), only when the view changed it
+    """
+    @wraps(view_func)
+    def wrapped_view(request, *args, **kwargs):
+        request.session_save_exempt = True
+        return view_func(request, *args, **kwargs)
+    return wrapped_view
+
+
+class SessionMiddleware(DjangoSessionMiddleware):
+    """
+    SessionMiddleware that honours @session_save_exempt
+    """
+
+    def process_response(self, request, response):
+        if getattr(request, 'session_save_exempt', False) and not request.session.modified:
+            return response
+        return super().process_response(request, response)
+
+
+class QueryProfilingMiddleware:
+    """
+    Records the query count, DB time and repeated queries of each request
+    per view (see apps.core.profiling): every request with
+    PERF_PROFILING_ENABLED, else a PERF_PROFILING_SAMPLE_PERCENT sample.
+    Nothing is recorded while the cache is private to the process.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def sampled(self):
+        percent = settings.PERF_PROFILING_SAMPLE_PERCENT
+        if not settings.PERF_PROFILING_ENABLED and percent <= 0:
+            return False
+
+        from .profiling import shared_cache
+
+        if not shared_cache():
+            return False
+        return settings.PERF_PROFILING_ENABLED or random.random() * 100 < percent
+
+    def __call__(self, request):
+        if not self.sampled():
+            return self.get_response(request)
+
+        from .profiling import QueryRecorder, RequestProfileStore
+
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        RequestProfileStore.record(view_name, recorder, response.status_code)
+        return response
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 06:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_notificationpreference_notification_action_label_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='email_pending',
+            field=models.BooleanField(default=False, help_text='Queued for email delivery', verbose_name='Email Pending'),
+        ),
+    ]
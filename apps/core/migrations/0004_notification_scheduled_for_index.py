@@ -0,0 +1,32 @@
+# Generated by Django 5.0 on 2026-10-18 06:52
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def schedule_pending_emails(apps, schema_editor):
+    # The dispatcher only picks up emails with a due scheduled_for
+    Notification = apps.get_model('core', 'Notification')
+    Notification.objects.filter(
+        email_pending=True,
+        is_sent_email=False,
+        scheduled_for__isnull=True
+    ).update(scheduled_for=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0003_notification_email_pending'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['scheduled_for', 'is_sent_email'], name='core_notifi_schedul_33f6bc_idx'),
+        ),
+        migrations.RunPython(schedule_pending_emails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 06:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_notification_scheduled_for_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='is_archived',
+            field=models.BooleanField(default=False, help_text='Hidden from the notification list', verbose_name='Archived'),
+        ),
+    ]
@@ -0,0 +1,106 @@
+import re
+
+from django.db import migrations
+
+# Frozen copy of the search index layouts, field lists and normalization as
+# of this migration, later changes to apps.core.search do not apply here.
+# {model label: (index table, indexed fields)}
+SEARCH_INDEXES = {
+    'properties.Property': ('properties_search', ['code', 'title', 'address', 'city', 'district']),
+    'clients.Client': ('clients_search', ['name', 'email', 'phone', 'national_id']),
+    'owners.Owner': ('owners_search', ['name', 'email', 'phone', 'national_id']),
+    'sales.Buyer': ('sales_buyer_search', ['name', 'email', 'phone', 'national_id']),
+    'contracts.Contract': (
+        'contracts_search', ['contract_number', 'client__name', 'property__title', 'property__code']
+    ),
+    'maintenance.MaintenanceRequest': (
+        'maintenance_search', ['request_number', 'title', 'description', 'property__title', 'property__code']
+    ),
+}
+
+ARABIC_DIACRITICS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+ARABIC_FOLDING = str.maketrans({
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    'ٱ': 'ا',
+    'ى': 'ي',
+    'ئ': 'ي',
+    'ؤ': 'و',
+    'ة': 'ه',
+    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
+    '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
+})
+TOKEN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN.findall(ARABIC_DIACRITICS.sub('', str(text or '')).translate(ARABIC_FOLDING).casefold())
+
+
+def create_index(apps, schema_editor, label, key='object_id'):
+    """
+    Create and fill the index table of the model `label`; `key` is the
+    PostgreSQL id column (properties_search used property_id before 0007)
+    """
+    table, fields = SEARCH_INDEXES[label]
+    vendor = schema_editor.connection.vendor
+    if vendor not in ('sqlite', 'postgresql'):
+        # Other databases search with icontains filters, no index table
+        return
+
+    rows = [
+        (row[0], ' '.join(' '.join(tokenize(value)) for value in row[1:]))
+        for row in apps.get_model(label).objects.values_list('pk', *fields).order_by('pk')
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} "
+                f"USING fts5(document, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+            cursor.executemany(f'INSERT INTO {table} (rowid, document) VALUES (%s, %s)', rows)
+        else:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} ({key} bigint PRIMARY KEY, document tsvector NOT NULL)'
+            )
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {table}_document ON {table} USING GIN (document)')
+            cursor.executemany(
+                f"INSERT INTO {table} ({key}, document) VALUES (%s, to_tsvector('simple', %s))", rows
+            )
+
+
+def drop_indexes(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for table, _ in SEARCH_INDEXES.values():
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+def create_search_indexes(apps, schema_editor):
+    # properties_search predates the global index, recreate it in the shared layout
+    drop_indexes(schema_editor)
+    for label in SEARCH_INDEXES:
+        create_index(apps, schema_editor, label)
+
+
+def drop_search_indexes(apps, schema_editor):
+    drop_indexes(schema_editor)
+    # Back to the properties_search of properties 0005
+    create_index(apps, schema_editor, 'properties.Property', key='property_id')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_notificationarchive'),
+        ('clients', '0001_initial'),
+        ('contracts', '0001_initial'),
+        ('maintenance', '0001_initial'),
+        ('owners', '0002_remove_owner_tax_number_owner_mobile_owner_tax_id'),
+        ('properties', '0005_property_search_index'),
+        ('sales', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
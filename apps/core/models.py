@@ -2,6 +2,9 @@
 Core models for Origin App Real Estate Management System.
 Includes User Profile, Roles, Permissions, and Audit Log.
 """
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
@@ -272,6 +275,16 @@ class Notification(models.Model):
     # Status
     is_read = models.BooleanField(_('Read'), default=False)
     read_at = models.DateTimeField(_('Read At'), null=True, blank=True)
+    is_archived = models.BooleanField(
+        _('Archived'),
+        default=False,
+        help_text=_('Hidden from the notification list')
+    )
+    email_pending = models.BooleanField(
+        _('Email Pending'),
+        default=False,
+        help_text=_('Queued for email delivery')
+    )
     is_sent_email = models.BooleanField(_('Email Sent'), default=False)
     email_sent_at = models.DateTimeField(_('Email Sent At'), null=True, blank=True)
     
@@ -301,17 +314,36 @@ class Notification(models.Model):
             models.Index(fields=['user', 'is_read', '-created_at']),
             models.Index(fields=['notification_type']),
             models.Index(fields=['priority']),
+            models.Index(fields=['scheduled_for', 'is_sent_email']),
         ]
 
+    # Read state as loaded from the database (kept by apps.core.unread)
+    loaded_is_read = None
+
     def __str__(self):
         return f"{self.user.username} - {self.title}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_is_read = instance.__dict__.get('is_read')
+        return instance
+    
+    def delete(self, *args, **kwargs):
+        """Delete and take the notification off its user's unread counter"""
+        from .unread import UnreadCounter
+
+        result = super().delete(*args, **kwargs)
+        if not self.is_read:
+            UnreadCounter.adjust({self.user_id: -1})
+        return result
+
     def mark_as_read(self):
         """Mark notification as read"""
         if not self.is_read:
             self.is_read = True
             self.read_at = timezone.now()
-            self.save()
+            self.save(update_fields=['is_read', 'read_at'])
     
     def send_email(self):
         """Send notification via email"""
@@ -337,6 +369,42 @@ class Notification(models.Model):
         return False
 
 
+class NotificationArchive(models.Model):
+    """
+    Compact copy of read notifications moved out of the Notification table
+    by the retention policy (see apps.core.retention).
+    """
+    original_id = models.PositiveBigIntegerField(_('Original ID'))
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_notifications',
+        verbose_name=_('User')
+    )
+    title = models.CharField(_('Title'), max_length=200)
+    message = models.TextField(_('Message'))
+    notification_type = models.CharField(_('Type'), max_length=30)
+    priority = models.CharField(_('Priority'), max_length=10)
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(_('Created At'))
+    read_at = models.DateTimeField(_('Read At'), null=True, blank=True)
+    archived_at = models.DateTimeField(_('Archived At'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('Archived Notification')
+        verbose_name_plural = _('Archived Notifications')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.user_id} - {self.title}"
+
+
 class NotificationPreference(models.Model):
     """
     User preferences for notifications
@@ -396,6 +464,53 @@ class NotificationPreference(models.Model):
         
         return type_mapping.get(notification_type, True)
     
+    @property
+    def digest_period(self):
+        """'daily', 'weekly' or None when emails are sent one by one"""
+        if self.daily_digest:
+            return 'daily'
+        if self.weekly_digest:
+            return 'weekly'
+        return None
+    
+    def next_digest_time(self, moment):
+        """First digest send time at or after `moment`"""
+        local = timezone.localtime(moment)
+        slot = local.replace(hour=settings.NOTIFICATION_DIGEST_HOUR, minute=0, second=0, microsecond=0)
+        if self.digest_period == 'weekly':
+            slot += timedelta(days=(settings.NOTIFICATION_DIGEST_WEEKDAY - slot.weekday()) % 7)
+            if slot < local:
+                slot += timedelta(days=7)
+        elif slot < local:
+            slot += timedelta(days=1)
+        return slot
+    
+    def in_quiet_hours(self, moment):
+        """Check if `moment` falls in the user's quiet hours (which may span midnight)"""
+        if self.quiet_hours_start is None or self.quiet_hours_end is None:
+            return False
+        
+        current = timezone.localtime(moment).time()
+        if self.quiet_hours_start <= self.quiet_hours_end:
+            return self.quiet_hours_start <= current < self.quiet_hours_end
+        return current >= self.quiet_hours_start or current < self.quiet_hours_end
+    
+    def after_quiet_hours(self, moment):
+        """`moment`, or the end of the quiet hours it falls in"""
+        if not self.in_quiet_hours(moment):
+            return moment
+        
+        local = timezone.localtime(moment)
+        end = local.replace(
+            hour=self.quiet_hours_end.hour,
+            minute=self.quiet_hours_end.minute,
+            second=0,
+            microsecond=0
+        )
+        if end <= local:
+            end += timedelta(days=1)
+        return end
+    
     def should_show_inapp(self, notification_type):
         """Check if in-app notification should be shown"""
         if not self.inapp_enabled:
@@ -0,0 +1,117 @@
+"""
+Keyset (cursor) pagination for Origin App
+Pages are fetched with a WHERE on the sort keys of the last row seen instead
+of OFFSET, and without a COUNT, so a deep page costs the same as the first.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class KeysetPage:
+    """
+    One page of a KeysetPaginator, iterable like a Paginator page
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset on `keys`, e.g. ('-created_at', '-pk'). The last key
+    must be unique so every row has a distinct position.
+    """
+
+    def __init__(self, queryset, keys, per_page):
+        self.queryset = queryset.order_by(*keys)
+        self.keys = [(key.lstrip('-'), key.startswith('-')) for key in keys]
+        self.per_page = per_page
+
+    @staticmethod
+    def _json_value(value):
+        # Full isoformat: DjangoJSONEncoder drops microseconds, which would
+        # make rows with close timestamps compare equal
+        return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+    def encode(self, row):
+        values = [getattr(row, field) for field, _ in self.keys]
+        return base64.urlsafe_b64encode(json.dumps(values, default=self._json_value).encode()).decode()
+
+    def decode(self, cursor):
+        """Key values of a cursor, None if it is malformed"""
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            return None
+        if not isinstance(values, list) or len(values) != len(self.keys):
+            return None
+        return values
+
+    def _seek(self, values, forward):
+        """Rows strictly after (forward) or before the position `values`"""
+        condition = Q()
+        for index, (field, descending) in enumerate(self.keys):
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{field}__{lookup}': values[index]})
+            for position, (previous_field, _) in enumerate(self.keys[:index]):
+                step &= Q(**{previous_field: values[position]})
+            condition |= step
+        return condition
+
+    def get_page(self, after=None, before=None):
+        """
+        The page following the `after` cursor, or preceding the `before`
+        cursor, or the first page. Malformed cursors give the first page.
+        """
+        values = self.decode(before or after) if (before or after) else None
+        if values is None:
+            return self._page(list(self.queryset[:self.per_page + 1]), has_previous=False)
+
+        try:
+            if before:
+                reverse_keys = [f'{"" if descending else "-"}{field}' for field, descending in self.keys]
+                rows = list(
+                    self.queryset.filter(self._seek(values, forward=False))
+                    .order_by(*reverse_keys)[:self.per_page + 1]
+                )
+                has_previous = len(rows) > self.per_page
+                rows = rows[:self.per_page][::-1]
+                return KeysetPage(
+                    rows,
+                    next_cursor=self.encode(rows[-1]) if rows else None,
+                    previous_cursor=self.encode(rows[0]) if rows and has_previous else None,
+                )
+
+            rows = list(self.queryset.filter(self._seek(values, forward=True))[:self.per_page + 1])
+        except (ValidationError, ValueError):
+            return self._page(list(self.queryset[:self.per_page + 1]), has_previous=False)
+        return self._page(rows, has_previous=True)
+
+    def _page(self, rows, has_previous):
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode(rows[-1]) if rows and has_next else None,
+            previous_cursor=self.encode(rows[0]) if rows and has_previous else None,
+        )
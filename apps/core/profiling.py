@@ -0,0 +1,215 @@
+"""
+Request Profiling for Origin App
+Per-view SQL statistics gathered from live traffic by QueryProfilingMiddleware
+(every request with PERF_PROFILING_ENABLED, or a PERF_PROFILING_SAMPLE_PERCENT
+sample): query count, DB time, and fingerprints of queries repeated within
+one request, which is how N+1 loops show up.
+
+Statistics are kept in the cache in time windows of PERF_PROFILING_WINDOW
+seconds; the last PERF_PROFILING_WINDOWS windows make up the rolling view
+read by /ops/perf/. The cache must be shared by every worker (Redis,
+Memcached, the database cache): with LocMemCache each process would keep
+its own windows and /ops/perf/ would show whichever worker served it, so
+profiling stays off there (see the core.W002 check).
+
+A window is one cache entry updated with get / set. Requests of different
+workers finishing at the same moment overwrite each other's update, so the
+request counts are a lower bound under load; averages, maxima and repeated
+queries stay representative.
+"""
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+# Upper bounds of the histogram buckets (the last bucket is everything above)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+DB_TIME_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500)
+
+# Repeated fingerprints kept per view and window
+TOP_DUPLICATES = 10
+
+# Cache backends private to one process
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST = re.compile(r'\bIN \((?:\s*(?:\?|%s)\s*,?)+\)', re.IGNORECASE)
+WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """SQL with literals and parameter lists replaced, equal for every run of the same query"""
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = IN_LIST.sub('IN (...)', sql)
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+def shared_cache():
+    """Whether the default cache is seen by every worker, which the statistics need"""
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+def bucket(value, bounds):
+    """Index of the histogram bucket holding `value`"""
+    for index, bound in enumerate(bounds):
+        if value <= bound:
+            return index
+    return len(bounds)
+
+
+class QueryRecorder:
+    """
+    connection.execute_wrapper that times every query of a request
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, (time.perf_counter() - started) * 1000))
+
+    @property
+    def db_time_ms(self):
+        return sum(duration for _, duration in self.queries)
+
+    def duplicates(self):
+        """{fingerprint: times run} of the queries run more than once"""
+        counts = Counter(fingerprint(sql) for sql, _ in self.queries)
+        return {sql: count for sql, count in counts.items() if count > 1}
+
+
+class RequestProfileStore:
+    """
+    Rolling per-view statistics in the cache
+    """
+
+    @staticmethod
+    def window_start(now=None):
+        window = settings.PERF_PROFILING_WINDOW
+        now = time.time() if now is None else now
+        return int(now // window * window)
+
+    @staticmethod
+    def key(window_start):
+        return f'perf:window:{window_start}'
+
+    @staticmethod
+    def record(view_name, recorder, status_code, now=None):
+        """Add one profiled request to the current window"""
+        window_start = RequestProfileStore.window_start(now)
+        key = RequestProfileStore.key(window_start)
+        window = cache.get(key) or {}
+
+        stats = window.setdefault(view_name, RequestProfileStore._empty())
+        query_count = len(recorder.queries)
+        db_time = recorder.db_time_ms
+        duplicates = recorder.duplicates()
+
+        stats['requests'] += 1
+        stats['errors'] += status_code >= 500
+        stats['queries'] += query_count
+        stats['db_time_ms'] += db_time
+        stats['max_queries'] = max(stats['max_queries'], query_count)
+        stats['max_db_time_ms'] = max(stats['max_db_time_ms'], db_time)
+        stats['query_histogram'][bucket(query_count, QUERY_COUNT_BUCKETS)] += 1
+        stats['db_time_histogram'][bucket(db_time, DB_TIME_BUCKETS)] += 1
+        if duplicates:
+            stats['requests_with_duplicates'] += 1
+            for sql, count in duplicates.items():
+                stats['duplicates'][sql] = stats['duplicates'].get(sql, 0) + count
+            stats['duplicates'] = dict(Counter(stats['duplicates']).most_common(TOP_DUPLICATES))
+
+        timeout = settings.PERF_PROFILING_WINDOW * (settings.PERF_PROFILING_WINDOWS + 1)
+        cache.set(key, window, timeout)
+
+    @staticmethod
+    def _empty():
+        return {
+            'requests': 0,
+            'errors': 0,
+            'queries': 0,
+            'db_time_ms': 0.0,
+            'max_queries': 0,
+            'max_db_time_ms': 0.0,
+            'requests_with_duplicates': 0,
+            'query_histogram': [0] * (len(QUERY_COUNT_BUCKETS) + 1),
+            'db_time_histogram': [0] * (len(DB_TIME_BUCKETS) + 1),
+            'duplicates': {},
+        }
+
+    @staticmethod
+    def summary(now=None):
+        """
+        Per-view statistics merged over the rolling windows, busiest DB
+        time first
+        """
+        current = RequestProfileStore.window_start(now)
+        window = settings.PERF_PROFILING_WINDOW
+        keys = [RequestProfileStore.key(current - window * n) for n in range(settings.PERF_PROFILING_WINDOWS)]
+
+        merged = {}
+        for stored in cache.get_many(keys).values():
+            for view_name, stats in stored.items():
+                total = merged.setdefault(view_name, RequestProfileStore._empty())
+                for field in ('requests', 'errors', 'queries', 'db_time_ms', 'requests_with_duplicates'):
+                    total[field] += stats[field]
+                total['max_queries'] = max(total['max_queries'], stats['max_queries'])
+                total['max_db_time_ms'] = max(total['max_db_time_ms'], stats['max_db_time_ms'])
+                for field in ('query_histogram', 'db_time_histogram'):
+                    total[field] = [a + b for a, b in zip(total[field], stats[field])]
+                for sql, count in stats['duplicates'].items():
+                    total['duplicates'][sql] = total['duplicates'].get(sql, 0) + count
+
+        views = []
+        for view_name, stats in merged.items():
+            requests = stats['requests']
+            views.append({
+                'view': view_name,
+                **stats,
+                'db_time_ms': round(stats['db_time_ms'], 1),
+                'max_db_time_ms': round(stats['max_db_time_ms'], 1),
+                'avg_queries': round(stats['queries'] / requests, 1),
+                'avg_db_time_ms': round(stats['db_time_ms'] / requests, 1),
+                'p95_queries': RequestProfileStore.percentile(stats['query_histogram'], QUERY_COUNT_BUCKETS, 0.95),
+                'p95_db_time_ms': RequestProfileStore.percentile(stats['db_time_histogram'], DB_TIME_BUCKETS, 0.95),
+                'duplicates': Counter(stats['duplicates']).most_common(TOP_DUPLICATES),
+            })
+        views.sort(key=lambda stats: stats['db_time_ms'], reverse=True)
+        return {
+            'window_seconds': window * settings.PERF_PROFILING_WINDOWS,
+            'query_buckets': list(QUERY_COUNT_BUCKETS),
+            'db_time_buckets': list(DB_TIME_BUCKETS),
+            'views': views,
+        }
+
+    @staticmethod
+    def percentile(histogram, bounds, fraction):
+        """Upper bound of the bucket holding the `fraction` percentile, None past the last bound"""
+        total = sum(histogram)
+        if not total:
+            return None
+        seen = 0
+        for index, count in enumerate(histogram):
+            seen += count
+            if seen >= total * fraction:
+                return bounds[index] if index < len(bounds) else None
+        return None
+
+    @staticmethod
+    def clear(now=None):
+        current = RequestProfileStore.window_start(now)
+        window = settings.PERF_PROFILING_WINDOW
+        cache.delete_many([RequestProfileStore.key(current - window * n) for n in range(settings.PERF_PROFILING_WINDOWS)])
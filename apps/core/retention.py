@@ -0,0 +1,189 @@
+"""
+Notification Retention for Origin App
+Read notifications older than their TTL (NOTIFICATION_RETENTION, by type or
+priority) are moved out of the Notification table in small chunks: into the
+compact NotificationArchive table, a gzipped JSONL file (one gzip member per
+chunk, synced to disk before the chunk's delete commits), or nowhere (purge).
+Unread notifications are never touched, so the unread counters stay valid.
+"""
+import gzip
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from .models import Notification, NotificationArchive
+
+
+class NotificationRetention:
+    """
+    Retention policy and chunked archival of old notifications
+    """
+
+    MODES = ('archive', 'file', 'purge')
+
+    @staticmethod
+    def policy():
+        retention = settings.NOTIFICATION_RETENTION
+        return (
+            retention['default'],
+            retention.get('types', {}),
+            retention.get('priorities', {}),
+        )
+
+    @staticmethod
+    def ttl_for(notification_type, priority):
+        """Days a read notification of this type and priority is kept"""
+        default, types, priorities = NotificationRetention.policy()
+        if notification_type in types:
+            return types[notification_type]
+        return priorities.get(priority, default)
+
+    @staticmethod
+    def expired(now=None):
+        """Read notifications past their TTL"""
+        now = now or timezone.now()
+        default, types, priorities = NotificationRetention.policy()
+
+        condition = Q()
+        for notification_type, days in types.items():
+            condition |= Q(notification_type=notification_type, created_at__lt=now - timedelta(days=days))
+        for priority, days in priorities.items():
+            condition |= Q(priority=priority, created_at__lt=now - timedelta(days=days)) & ~Q(notification_type__in=list(types))
+        condition |= (
+            Q(created_at__lt=now - timedelta(days=default))
+            & ~Q(notification_type__in=list(types))
+            & ~Q(priority__in=list(priorities))
+        )
+        return Notification.objects.filter(condition, is_read=True)
+
+    @staticmethod
+    def run(mode='archive', chunk_size=1000, path=None, now=None):
+        """
+        Move expired notifications out of the Notification table, one
+        transaction per chunk, returns the number of rows moved
+        """
+        if mode not in NotificationRetention.MODES:
+            raise ValueError(f'Unknown retention mode: {mode}')
+        if mode == 'file' and not path:
+            raise ValueError('A file path is required to archive to a file')
+
+        now = now or timezone.now()
+        expired = NotificationRetention.expired(now)
+
+        moved = 0
+        while True:
+            with transaction.atomic():
+                chunk = list(expired.order_by('pk')[:chunk_size])
+                if not chunk:
+                    break
+
+                Notification.objects.filter(pk__in=[n.pk for n in chunk]).delete()
+                if mode == 'archive':
+                    NotificationArchive.objects.bulk_create(
+                        [NotificationRetention._archive_row(n, now) for n in chunk]
+                    )
+                elif mode == 'file':
+                    # Written last: the delete only commits once the rows are on disk
+                    NotificationRetention._write_chunk(path, chunk)
+                moved += len(chunk)
+        return moved
+
+    @staticmethod
+    def _write_chunk(path, chunk):
+        """
+        Append a chunk to the archive file as a complete gzip member and sync
+        it to disk; a failed write truncates the file back to where it was
+        """
+        with open(path, 'ab') as archive_file:
+            start = archive_file.tell()
+            try:
+                with gzip.GzipFile(fileobj=archive_file, mode='wb') as member:
+                    for notification in chunk:
+                        member.write((json.dumps(NotificationRetention._json_row(notification)) + '\n').encode('utf-8'))
+                archive_file.flush()
+                os.fsync(archive_file.fileno())
+            except BaseException:
+                archive_file.truncate(start)
+                raise
+
+    @staticmethod
+    def _archive_row(notification, now):
+        return NotificationArchive(
+            original_id=notification.pk,
+            user_id=notification.user_id,
+            title=notification.title,
+            message=notification.message,
+            notification_type=notification.notification_type,
+            priority=notification.priority,
+            content_type_id=notification.content_type_id,
+            object_id=notification.object_id,
+            created_at=notification.created_at,
+            read_at=notification.read_at,
+            archived_at=now,
+        )
+
+    @staticmethod
+    def _json_row(notification):
+        return {
+            'id': notification.pk,
+            'user_id': notification.user_id,
+            'title': notification.title,
+            'message': notification.message,
+            'notification_type': notification.notification_type,
+            'priority': notification.priority,
+            'content_type_id': notification.content_type_id,
+            'object_id': notification.object_id,
+            'created_at': notification.created_at.isoformat(),
+            'read_at': notification.read_at.isoformat() if notification.read_at else None,
+        }
+
+    # ---------------------------------------------------------------
+    # Metrics
+    # ---------------------------------------------------------------
+
+    @staticmethod
+    def metrics(now=None):
+        """Row counts and on-disk size of the notification tables"""
+        return {
+            'notifications': Notification.objects.count(),
+            'unread': Notification.objects.filter(is_read=False).count(),
+            'expired': NotificationRetention.expired(now).count(),
+            'archived': NotificationArchive.objects.count(),
+            'oldest': Notification.objects.aggregate(oldest=Min('created_at'))['oldest'],
+            'table_bytes': NotificationRetention.table_size(Notification._meta.db_table),
+            'archive_bytes': NotificationRetention.table_size(NotificationArchive._meta.db_table),
+        }
+
+    @staticmethod
+    def table_size(table):
+        """Bytes used by a table and its indexes, None if the database can't tell"""
+        with connection.cursor() as cursor:
+            try:
+                if connection.vendor == 'sqlite':
+                    cursor.execute(
+                        'SELECT SUM(pgsize) FROM dbstat WHERE name = %s '
+                        'OR name IN (SELECT name FROM sqlite_master WHERE tbl_name = %s)',
+                        [table, table]
+                    )
+                elif connection.vendor == 'postgresql':
+                    cursor.execute('SELECT pg_total_relation_size(%s)', [table])
+                else:
+                    return None
+            except Exception:
+                # SQLite built without the dbstat virtual table
+                return None
+            return cursor.fetchone()[0]
+
+    @staticmethod
+    def vacuum():
+        """Give the space of deleted rows back to the file system (SQLite only)"""
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('VACUUM')
+            return True
+        return False
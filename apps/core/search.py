@@ -0,0 +1,429 @@
+"""
+Global Search for Origin App
+One tokenized full-text index per searchable entity (properties, clients,
+owners, buyers, rental contracts, maintenance requests), kept in sync by
+model signals, and a single service searching all of them:
+
+- SQLite: an FTS5 virtual table per entity, ranked with bm25
+- PostgreSQL: a tsvector table per entity with a GIN index, ranked with ts_rank
+- anything else: icontains filters, unranked
+
+Documents and queries go through the same Arabic normalization (diacritics
+and tatweel stripped, alef / ya / ta marbuta folded, Arabic-Indic digits to
+ASCII), and every query term is matched as a prefix. Documents may include
+fields of related rows (a contract is found by its client's name), so saving
+the related row re-indexes the documents that copy it.
+"""
+import re
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from django.urls import reverse
+
+
+ARABIC_DIACRITICS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+ARABIC_FOLDING = str.maketrans({
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    'ٱ': 'ا',
+    'ى': 'ي',
+    'ئ': 'ي',
+    'ؤ': 'و',
+    'ة': 'ه',
+    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
+    '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
+})
+TOKEN = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Lower-case text with Arabic diacritics stripped and letter variants folded"""
+    return ARABIC_DIACRITICS.sub('', str(text or '')).translate(ARABIC_FOLDING).casefold()
+
+
+def tokenize(text):
+    return TOKEN.findall(normalize(text))
+
+
+# ===================================================================
+# SEARCHABLE ENTITIES
+# ===================================================================
+
+# fields: indexed fields, related rows by lookup path
+# depends: {model label: lookup from the entity to it}, re-indexed on save
+# title / subtitle: fields shown in results, url: detail view (takes pk)
+SEARCH_ENTITIES = {
+    'property': {
+        'model': 'properties.Property',
+        'table': 'properties_search',
+        'fields': ['code', 'title', 'address', 'city', 'district'],
+        'title': 'title',
+        'subtitle': 'code',
+        'url': 'properties:detail',
+    },
+    'client': {
+        'model': 'clients.Client',
+        'table': 'clients_search',
+        'fields': ['name', 'email', 'phone', 'national_id'],
+        'title': 'name',
+        'subtitle': 'phone',
+        'url': 'clients:detail',
+    },
+    'owner': {
+        'model': 'owners.Owner',
+        'table': 'owners_search',
+        'fields': ['name', 'email', 'phone', 'national_id'],
+        'title': 'name',
+        'subtitle': 'phone',
+        'url': 'owners:detail',
+    },
+    'buyer': {
+        'model': 'sales.Buyer',
+        'table': 'sales_buyer_search',
+        'fields': ['name', 'email', 'phone', 'national_id'],
+        'title': 'name',
+        'subtitle': 'phone',
+        'url': 'sales:buyer_detail',
+    },
+    'contract': {
+        'model': 'contracts.Contract',
+        'table': 'contracts_search',
+        'fields': ['contract_number', 'client__name', 'property__title', 'property__code'],
+        'depends': {
+            'clients.Client': 'client',
+            'properties.Property': 'property',
+        },
+        'title': 'contract_number',
+        'subtitle': 'client__name',
+        'url': 'contracts:detail',
+    },
+    'maintenance': {
+        'model': 'maintenance.MaintenanceRequest',
+        'table': 'maintenance_search',
+        'fields': ['request_number', 'title', 'description', 'property__title', 'property__code'],
+        'depends': {
+            'properties.Property': 'property',
+        },
+        'title': 'title',
+        'subtitle': 'request_number',
+        'url': 'maintenance:detail',
+    },
+}
+
+
+class SearchIndex:
+    """
+    Icontains search over an entity's fields, also the interface of the
+    indexed backends
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.entity = SEARCH_ENTITIES[name]
+        self.table = self.entity['table']
+        self.fields = self.entity['fields']
+
+    @property
+    def model(self):
+        return apps.get_model(self.entity['model'])
+
+    def documents(self, queryset):
+        """(pk, normalized document) of every row of `queryset`"""
+        for row in queryset.values_list('pk', *self.fields).order_by('pk').iterator(chunk_size=500):
+            yield row[0], ' '.join(' '.join(tokenize(value)) for value in row[1:])
+
+    def filter(self, queryset, query):
+        """Narrow `queryset` to the rows matching every term of `query`"""
+        for term in query.split():
+            condition = Q()
+            for field in self.fields:
+                condition |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def ranked(self, query, limit):
+        """[(pk, score)] of the best `limit` matches, best first"""
+        if not tokenize(query):
+            return []
+        pks = self.filter(self.model.objects.all(), query).order_by('-pk').values_list('pk', flat=True)[:limit]
+        return [(pk, None) for pk in pks]
+
+    def index(self, queryset):
+        """Add or refresh the index entries of the rows of `queryset`"""
+
+    def remove(self, pks):
+        """Drop the index entries of deleted rows"""
+
+    def rebuild(self, queryset=None):
+        """Re-index every row, returns the number indexed"""
+        return 0
+
+    def create_table(self):
+        """Create the index table if the backend needs one"""
+
+    def drop_table(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+
+class SQLiteSearchIndex(SearchIndex):
+    """
+    FTS5 index: rowid is the entity's pk, the single column holds the
+    normalized document
+    """
+
+    def match_expression(self, query):
+        return ' '.join(f'"{token}"*' for token in tokenize(query))
+
+    def filter(self, queryset, query):
+        match = self.match_expression(query)
+        if not match:
+            return queryset
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [match]
+        ))
+
+    def ranked(self, query, limit):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, bm25({self.table}) FROM {self.table} '
+                f'WHERE {self.table} MATCH %s ORDER BY bm25({self.table}) LIMIT %s',
+                [match, limit]
+            )
+            # bm25 is lower for better matches
+            return [(pk, -score) for pk, score in cursor.fetchall()]
+
+    def index(self, queryset):
+        _write_batches(self, queryset)
+
+    def write(self, rows):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(pk,) for pk, _ in rows])
+            cursor.executemany(f'INSERT INTO {self.table} (rowid, document) VALUES (%s, %s)', rows)
+
+    def remove(self, pks):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(pk,) for pk in pks])
+
+    def rebuild(self, queryset=None):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+        return _write_batches(self, queryset)
+
+    def create_table(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+                f"USING fts5(document, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+
+
+class PostgresSearchIndex(SearchIndex):
+    """
+    tsvector index with the 'simple' configuration (no stemming, the Arabic
+    normalization is done here), prefix matched with :*
+    """
+
+    def ts_query(self, query):
+        return ' & '.join(f"'{token}':*" for token in tokenize(query))
+
+    def filter(self, queryset, query):
+        ts_query = self.ts_query(query)
+        if not ts_query:
+            return queryset
+        return queryset.filter(pk__in=RawSQL(
+            f"SELECT object_id FROM {self.table} WHERE document @@ to_tsquery('simple', %s)", [ts_query]
+        ))
+
+    def ranked(self, query, limit):
+        ts_query = self.ts_query(query)
+        if not ts_query:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT object_id, ts_rank(document, to_tsquery('simple', %s)) AS score FROM {self.table} "
+                f"WHERE document @@ to_tsquery('simple', %s) ORDER BY score DESC LIMIT %s",
+                [ts_query, ts_query, limit]
+            )
+            return cursor.fetchall()
+
+    def index(self, queryset):
+        _write_batches(self, queryset)
+
+    def write(self, rows):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.table} (object_id, document) VALUES (%s, to_tsvector('simple', %s)) "
+                f"ON CONFLICT (object_id) DO UPDATE SET document = EXCLUDED.document",
+                rows
+            )
+
+    def remove(self, pks):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE object_id = ANY(%s)', [list(pks)])
+
+    def rebuild(self, queryset=None):
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {self.table}')
+        return _write_batches(self, queryset)
+
+    def create_table(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} '
+                f'(object_id bigint PRIMARY KEY, document tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.table}_document ON {self.table} USING GIN (document)'
+            )
+
+
+def _write_batches(index, queryset=None, chunk_size=500):
+    """Index the rows of `queryset` (default: all) in chunks, returns the count"""
+    if queryset is None:
+        queryset = index.model.objects.all()
+    count = 0
+    batch = []
+    for row in index.documents(queryset):
+        batch.append(row)
+        if len(batch) == chunk_size:
+            index.write(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        index.write(batch)
+    return count + len(batch)
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchIndex,
+    'postgresql': PostgresSearchIndex,
+}
+
+
+def get_search_index(name):
+    """Search index of the entity `name` for the default database"""
+    return BACKENDS.get(connection.vendor, SearchIndex)(name)
+
+
+def get_search_index_for_model(model):
+    """Search index of the entity stored in `model`, None if it is not searchable"""
+    for name, entity in SEARCH_ENTITIES.items():
+        if entity['model'] == model._meta.label:
+            return get_search_index(name)
+    return None
+
+
+# ===================================================================
+# GLOBAL SEARCH
+# ===================================================================
+
+class GlobalSearchService:
+    """
+    One query across every searchable entity
+    """
+
+    @staticmethod
+    def search(query, entities=None, limit=5, budget_ms=None):
+        """
+        Best `limit` matches of each entity (default: all of them), as typed
+        results. Entities are searched in SEARCH_ENTITIES order until the
+        latency budget (GLOBAL_SEARCH_BUDGET_MS) is spent, the first one is
+        always searched; the ones left out are listed in `skipped` and the
+        response is flagged `partial`.
+        """
+        budget_ms = settings.GLOBAL_SEARCH_BUDGET_MS if budget_ms is None else budget_ms
+        names = [name for name in SEARCH_ENTITIES if entities is None or name in entities]
+        started = time.monotonic()
+
+        results = []
+        skipped = []
+        results_from = 0
+        for name in names:
+            if not tokenize(query):
+                break
+            if results_from and (time.monotonic() - started) * 1000 > budget_ms:
+                skipped.append(name)
+                continue
+            results.extend(GlobalSearchService._entity_results(get_search_index(name), query, limit))
+            results_from += 1
+
+        return {
+            'query': query,
+            'results': results,
+            'took_ms': round((time.monotonic() - started) * 1000, 1),
+            'partial': bool(skipped),
+            'skipped': skipped,
+        }
+
+    @staticmethod
+    def _entity_results(index, query, limit):
+        hits = index.ranked(query, limit)
+        if not hits:
+            return []
+
+        title, subtitle = index.entity['title'], index.entity['subtitle']
+        rows = {
+            row['pk']: row
+            for row in index.model.objects.filter(pk__in=[pk for pk, _ in hits]).values('pk', title, subtitle)
+        }
+        label = str(index.model._meta.verbose_name)
+        return [
+            {
+                'type': index.name,
+                'label': label,
+                'id': pk,
+                'title': str(rows[pk][title] or ''),
+                'subtitle': str(rows[pk][subtitle] or ''),
+                'url': reverse(index.entity['url'], args=[pk]),
+                'score': score,
+            }
+            for pk, score in hits if pk in rows
+        ]
+
+
+# ===================================================================
+# INDEX SIGNALS
+# ===================================================================
+
+def _entity_saved(sender, instance, **kwargs):
+    index = get_search_index_for_model(sender)
+    index.index(sender.objects.filter(pk=instance.pk))
+
+
+def _entity_deleted(sender, instance, **kwargs):
+    get_search_index_for_model(sender).remove([instance.pk])
+
+
+def _related_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        # Nothing can point at a new row yet
+        return
+    for name, entity in SEARCH_ENTITIES.items():
+        lookup = entity.get('depends', {}).get(sender._meta.label)
+        if not lookup:
+            continue
+        copied = {field.split('__', 1)[1] for field in entity['fields'] if field.startswith(f'{lookup}__')}
+        if update_fields is None or copied & set(update_fields):
+            index = get_search_index(name)
+            index.index(index.model.objects.filter(**{lookup: instance.pk}))
+
+
+def connect_signals():
+    for name, entity in SEARCH_ENTITIES.items():
+        model = apps.get_model(entity['model'])
+        post_save.connect(_entity_saved, sender=model, dispatch_uid=f'search-{name}-save')
+        post_delete.connect(_entity_deleted, sender=model, dispatch_uid=f'search-{name}-delete')
+
+    related = {label for entity in SEARCH_ENTITIES.values() for label in entity.get('depends', {})}
+    for label in related:
+        post_save.connect(_related_saved, sender=apps.get_model(label), dispatch_uid=f'search-related-{label}-save')
@@ -3,9 +3,14 @@ Notification Service for Origin App
 Centralized notification management and delivery
 """
 from django.contrib.auth.models import User
+from django.db import models, transaction
+from django.db.models import Count, Value
+from django.db.models.functions import Coalesce
 from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
+from .email_queue import NotificationEmailQueue
 from .models import Notification, NotificationPreference
+from .unread import UnreadCounter
 
 
 class NotificationService:
@@ -25,10 +30,13 @@ class NotificationService:
         action_label='',
         action_url='',
         send_email=False,
-        metadata=None
+        metadata=None,
+        scheduled_for=None
     ):
         """
-        Create a notification with optional email sending
+        Create a notification with optional email sending, the email goes out
+        at `scheduled_for` (default: now) subject to the user's digest and
+        quiet hours preferences
         """
         notification_data = {
             'user': user,
@@ -40,6 +48,7 @@ class NotificationService:
             'action_label': action_label,
             'action_url': action_url,
             'metadata': metadata,
+            'scheduled_for': scheduled_for,
         }
         
         # Add related object if provided
@@ -47,18 +56,25 @@ class NotificationService:
             notification_data['content_type'] = ContentType.objects.get_for_model(related_object)
             notification_data['object_id'] = related_object.pk
         
-        # Create notification
-        notification = Notification.objects.create(**notification_data)
-        
-        # Check user preferences and send email if needed
-        if send_email:
+        # Check user preferences, the email itself is sent by the email queue
+        if send_email and user.email:
             try:
                 prefs = user.notification_preferences
-                if prefs.should_send_email(notification_type):
-                    notification.send_email()
+                notification_data['email_pending'] = prefs.should_send_email(notification_type)
             except NotificationPreference.DoesNotExist:
                 # No preferences set, send by default
-                notification.send_email()
+                prefs = None
+                notification_data['email_pending'] = True
+            
+            if notification_data['email_pending']:
+                notification_data['scheduled_for'] = NotificationEmailQueue.delivery_time(
+                    prefs, priority, scheduled_for
+                )
+        
+        # Create notification
+        notification = Notification.objects.create(**notification_data)
+        
+        NotificationEmailQueue.enqueue([notification])
         
         return notification
     
@@ -67,15 +83,86 @@ class NotificationService:
         """
         Create notifications for multiple users
         """
+        return NotificationService.notify_users(users, title, message, **kwargs)
+    
+    @staticmethod
+    def staff_users():
+        """Active staff members, the default audience of operational notifications"""
+        return User.objects.filter(is_staff=True, is_active=True)
+    
+    @staticmethod
+    def notify_users(
+        users,
+        title,
+        message,
+        notification_type='info',
+        priority='medium',
+        related_object=None,
+        link='',
+        action_label='',
+        action_url='',
+        send_email=False,
+        metadata=None,
+        scheduled_for=None
+    ):
+        """
+        Fan a notification out to many users: recipients and their
+        preferences are read in one query, all rows are written with one
+        bulk insert and emails are handed to the email queue
+        """
+        if isinstance(users, models.QuerySet):
+            recipients = users
+        else:
+            recipients = User.objects.filter(pk__in=[getattr(user, 'pk', user) for user in users])
+        recipients = list(recipients.select_related('notification_preferences').order_by('pk'))
+        if not recipients:
+            return []
+        
+        content_type = None
+        object_id = None
+        if related_object:
+            content_type = ContentType.objects.get_for_model(related_object)
+            object_id = related_object.pk
+        
+        now = timezone.now()
         notifications = []
-        for user in users:
-            notification = NotificationService.create_notification(
+        for user in recipients:
+            email_pending = False
+            email_at = None
+            if send_email and user.email:
+                try:
+                    prefs = user.notification_preferences
+                    email_pending = prefs.should_send_email(notification_type)
+                except NotificationPreference.DoesNotExist:
+                    # No preferences set, send by default
+                    prefs = None
+                    email_pending = True
+                
+                if email_pending:
+                    email_at = NotificationEmailQueue.delivery_time(prefs, priority, scheduled_for, now)
+            
+            notifications.append(Notification(
                 user=user,
                 title=title,
                 message=message,
-                **kwargs
-            )
-            notifications.append(notification)
+                notification_type=notification_type,
+                priority=priority,
+                content_type=content_type,
+                object_id=object_id,
+                link=link,
+                action_label=action_label,
+                action_url=action_url,
+                metadata=metadata,
+                email_pending=email_pending,
+                scheduled_for=email_at or scheduled_for,
+            ))
+        
+        notifications = Notification.objects.bulk_create(notifications, batch_size=500)
+        
+        # bulk_create sends no post_save, keep the unread counters current here
+        UnreadCounter.adjust({user.pk: 1 for user in recipients})
+        NotificationEmailQueue.enqueue(notifications)
+        
         return notifications
     
     # ===================================================================
@@ -104,36 +191,32 @@ class NotificationService:
             )
         
         # Notify assigned staff (superusers)
-        staff_users = User.objects.filter(is_staff=True, is_active=True)
-        for staff in staff_users:
-            NotificationService.create_notification(
-                user=staff,
-                title=f"Contract Expiring Soon",
-                message=f"Contract {contract.contract_number} expires in {days_until_expiry} days",
-                notification_type='contract_expiry',
-                priority='medium',
-                related_object=contract,
-                link=f'/contracts/{contract.pk}/',
-                send_email=False  # Only in-app for staff
-            )
+        NotificationService.notify_users(
+            NotificationService.staff_users(),
+            title=f"Contract Expiring Soon",
+            message=f"Contract {contract.contract_number} expires in {days_until_expiry} days",
+            notification_type='contract_expiry',
+            priority='medium',
+            related_object=contract,
+            link=f'/contracts/{contract.pk}/',
+            send_email=False  # Only in-app for staff
+        )
     
     @staticmethod
     def notify_contract_created(contract):
         """
         Send notification when new contract is created
         """
-        staff_users = User.objects.filter(is_staff=True, is_active=True)
-        for staff in staff_users:
-            NotificationService.create_notification(
-                user=staff,
-                title="New Contract Created",
-                message=f"Contract {contract.contract_number} has been created for {contract.property.code}",
-                notification_type='info',
-                priority='low',
-                related_object=contract,
-                link=f'/contracts/{contract.pk}/',
-                send_email=False
-            )
+        NotificationService.notify_users(
+            NotificationService.staff_users(),
+            title="New Contract Created",
+            message=f"Contract {contract.contract_number} has been created for {contract.property.code}",
+            notification_type='info',
+            priority='low',
+            related_object=contract,
+            link=f'/contracts/{contract.pk}/',
+            send_email=False
+        )
     
     # ===================================================================
     # PAYMENT NOTIFICATIONS
@@ -160,10 +243,11 @@ class NotificationService:
             )
     
     @staticmethod
-    def notify_payment_received(payment, contract):
+    def notify_payment_received(payment, contract=None):
         """
         Send notification when payment is received
         """
+        contract = contract or payment.contract
         if hasattr(contract.property, 'owner') and hasattr(contract.property.owner, 'user'):
             NotificationService.create_notification(
                 user=contract.property.owner.user,
@@ -239,18 +323,16 @@ class NotificationService:
         """
         Send notification when document is expiring soon
         """
-        staff_users = User.objects.filter(is_staff=True, is_active=True)
-        for staff in staff_users:
-            NotificationService.create_notification(
-                user=staff,
-                title=f"Document Expiring in {days_until_expiry} Days",
-                message=f"Document '{document.title}' for property {document.property.code} expires on {document.expiry_date}",
-                notification_type='document_expiry',
-                priority='high' if days_until_expiry <= 7 else 'medium',
-                related_object=document,
-                link=f'/properties/{document.property.pk}/',
-                send_email=True
-            )
+        NotificationService.notify_users(
+            NotificationService.staff_users(),
+            title=f"Document Expiring in {days_until_expiry} Days",
+            message=f"Document '{document.title}' for property {document.property.code} expires on {document.expiry_date}",
+            notification_type='document_expiry',
+            priority='high' if days_until_expiry <= 7 else 'medium',
+            related_object=document,
+            link=f'/properties/{document.property.pk}/',
+            send_email=True
+        )
     
     # ===================================================================
     # BUDGET NOTIFICATIONS
@@ -261,36 +343,32 @@ class NotificationService:
         """
         Send notification when budget is exceeded
         """
-        staff_users = User.objects.filter(is_staff=True, is_active=True)
-        for staff in staff_users:
-            NotificationService.create_notification(
-                user=staff,
-                title="⚠️ Budget Exceeded",
-                message=f"Budget '{budget.name}' has been exceeded. Spent: {budget.spent_amount}, Budget: {budget.total_amount}",
-                notification_type='budget_alert',
-                priority='urgent',
-                related_object=budget,
-                link=f'/financial/budgets/{budget.pk}/',
-                send_email=True
-            )
+        NotificationService.notify_users(
+            NotificationService.staff_users(),
+            title="⚠️ Budget Exceeded",
+            message=f"Budget '{budget.name}' has been exceeded. Spent: {budget.get_actual_amount()}, Budget: {budget.budgeted_amount}",
+            notification_type='budget_alert',
+            priority='urgent',
+            related_object=budget,
+            link=f'/financial/budgets/{budget.pk}/',
+            send_email=True
+        )
     
     @staticmethod
     def notify_budget_threshold(budget, percentage):
         """
         Send notification when budget reaches threshold (e.g., 80%)
         """
-        staff_users = User.objects.filter(is_staff=True, is_active=True)
-        for staff in staff_users:
-            NotificationService.create_notification(
-                user=staff,
-                title=f"Budget Alert - {percentage}% Used",
-                message=f"Budget '{budget.name}' is at {percentage}% utilization",
-                notification_type='budget_alert',
-                priority='medium',
-                related_object=budget,
-                link=f'/financial/budgets/{budget.pk}/',
-                send_email=False
-            )
+        NotificationService.notify_users(
+            NotificationService.staff_users(),
+            title=f"Budget Alert - {percentage}% Used",
+            message=f"Budget '{budget.name}' is at {percentage}% utilization",
+            notification_type='budget_alert',
+            priority='medium',
+            related_object=budget,
+            link=f'/financial/budgets/{budget.pk}/',
+            send_email=False
+        )
     
     # ===================================================================
     # SALES NOTIFICATIONS
@@ -301,20 +379,34 @@ class NotificationService:
         """
         Send notification when sales reservation is expiring
         """
-        staff_users = User.objects.filter(is_staff=True, is_active=True)
-        for staff in staff_users:
-            NotificationService.create_notification(
-                user=staff,
-                title=f"Reservation Expiring in {days_until_expiry} Days",
-                message=f"Reservation {reservation.reservation_number} expires on {reservation.expiry_date}",
-                notification_type='warning',
-                priority='high',
-                related_object=reservation,
-                link=f'/sales/reservations/{reservation.pk}/',
-                action_label='Approve Now',
-                action_url=f'/sales/reservations/{reservation.pk}/approve/',
-                send_email=True
-            )
+        NotificationService.notify_users(
+            NotificationService.staff_users(),
+            title=f"Reservation Expiring in {days_until_expiry} Days",
+            message=f"Reservation {reservation.reservation_number} expires on {reservation.expiry_date}",
+            notification_type='warning',
+            priority='high',
+            related_object=reservation,
+            link=f'/sales/reservations/{reservation.pk}/',
+            action_label='Approve Now',
+            action_url=f'/sales/reservations/{reservation.pk}/approve/',
+            send_email=True
+        )
+    
+    @staticmethod
+    def notify_sales_payment_received(payment):
+        """
+        Send notification when sales payment is received
+        """
+        NotificationService.notify_users(
+            NotificationService.staff_users(),
+            title="Sales Payment Received",
+            message=f"Payment of EGP {payment.amount} received for contract {payment.sales_contract.contract_number}",
+            notification_type='success',
+            priority='low',
+            related_object=payment,
+            link=f'/sales/contracts/{payment.sales_contract.pk}/',
+            send_email=False
+        )
     
     # ===================================================================
     # UTILITY METHODS
@@ -325,22 +417,95 @@ class NotificationService:
         """
         Mark all notifications as read for a user
         """
-        notifications = Notification.objects.filter(user=user, is_read=False)
-        count = notifications.count()
-        for notification in notifications:
-            notification.mark_as_read()
+        count = NotificationService.bulk_mark_as_read(
+            Notification.objects.filter(user=user)
+        )
+        UnreadCounter.set(user.pk, 0)
         return count
     
+    @staticmethod
+    def filter_notifications(user, notification_type=None, priority=None, older_than=None, status=None):
+        """
+        Inbox notifications of a user, optionally narrowed by type, priority,
+        age (created before `older_than`) and status ('read' / 'unread')
+        """
+        notifications = Notification.objects.filter(user=user, is_archived=False)
+        if notification_type:
+            notifications = notifications.filter(notification_type=notification_type)
+        if priority:
+            notifications = notifications.filter(priority=priority)
+        if older_than:
+            notifications = notifications.filter(created_at__lt=older_than)
+        if status == 'unread':
+            notifications = notifications.filter(is_read=False)
+        elif status == 'read':
+            notifications = notifications.filter(is_read=True)
+        return notifications
+    
+    @staticmethod
+    def _affected_users(notifications):
+        return list(notifications.order_by().values_list('user_id', flat=True).distinct())
+    
+    @staticmethod
+    def bulk_mark_as_read(notifications):
+        """
+        Mark a queryset of notifications as read with one UPDATE, returns the
+        number of notifications that were unread
+        """
+        notifications = notifications.filter(is_read=False)
+        user_ids = NotificationService._affected_users(notifications)
+        count = notifications.update(is_read=True, read_at=timezone.now())
+        for user_id in user_ids:
+            UnreadCounter.invalidate(user_id)
+        return count
+    
+    @staticmethod
+    def bulk_archive(notifications):
+        """
+        Archive (read and hide from the inbox) a queryset of notifications
+        with one UPDATE, returns the number archived
+        """
+        notifications = notifications.filter(is_archived=False)
+        user_ids = NotificationService._affected_users(notifications)
+        count = notifications.update(
+            is_archived=True,
+            is_read=True,
+            read_at=Coalesce('read_at', Value(timezone.now()))
+        )
+        for user_id in user_ids:
+            UnreadCounter.invalidate(user_id)
+        return count
+    
+    @staticmethod
+    def bulk_delete(notifications):
+        """
+        Delete a queryset of notifications with one DELETE (a fast delete,
+        Notification has no delete signals or cascades), returns the number
+        deleted; the unread counters drop by one grouped COUNT of the unread
+        rows, taken in the same transaction and applied once it commits
+        """
+        notifications = notifications.order_by()
+        with transaction.atomic():
+            deltas = {
+                user_id: -unread
+                for user_id, unread in notifications.filter(is_read=False).values('user_id').annotate(
+                    unread=Count('id')
+                ).values_list('user_id', 'unread')
+            }
+            _, deleted = notifications.delete()
+            transaction.on_commit(lambda: UnreadCounter.adjust(deltas))
+        return deleted.get(Notification._meta.label, 0)
+    
     @staticmethod
     def get_unread_count(user):
         """
-        Get count of unread notifications for a user
+        Get count of unread notifications for a user (see UnreadCounter)
         """
-        return Notification.objects.filter(user=user, is_read=False).count()
+        return UnreadCounter.get(user.pk)
     
     @staticmethod
     def get_recent_notifications(user, limit=10):
         """
         Get recent notifications for a user
         """
-        return Notification.objects.filter(user=user).order_by('-created_at')[:limit]
+        return Notification.objects.filter(user=user, is_archived=False).order_by('-created_at')[:limit]
@@ -0,0 +1,196 @@
+"""
+Dashboard Snapshot Cache for Origin App
+Stores computed dashboard statistics in Django's cache framework, one
+generation counter per data domain. Model writes bump the generation of the
+affected domains only; stale snapshots can keep being served while a
+background refresh recomputes them.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Models whose writes change the figures of each domain
+DOMAIN_MODELS = {
+    'properties': [
+        'properties.Property',
+        'properties.PropertyRevenue',
+        'properties.PropertyExpense',
+        'properties.PropertyInspection',
+        # Owner names label the owner income breakdown
+        'owners.Owner',
+    ],
+    'contracts': [
+        'contracts.Contract',
+    ],
+    'financial': [
+        'financial.Account',
+        'financial.Payment',
+        'financial.Invoice',
+        'financial.JournalEntry',
+        'financial.JournalEntryLine',
+        'sales.SalesPayment',
+    ],
+    'maintenance': [
+        'maintenance.MaintenanceRequest',
+    ],
+    'people': [
+        'clients.Client',
+        'owners.Owner',
+    ],
+    'sales': [
+        'sales.Buyer',
+        'sales.PropertyReservation',
+        'sales.SalesContract',
+        'sales.SalesPaymentPlan',
+        'sales.SalesPayment',
+    ],
+}
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'KEY_PREFIX': 'snapshot',
+    # Seconds before a snapshot is considered stale even without writes
+    'MAX_AGE': 600,
+    # Seconds a snapshot stays in the cache at all (stale copies included)
+    'TIMEOUT': 86400,
+    # Serve the stale copy and recompute in a background thread
+    'STALE_WHILE_REVALIDATE': True,
+    'REFRESH_LOCK_TIMEOUT': 60,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'DASHBOARD_SNAPSHOTS', {}).get(name, DEFAULTS[name])
+
+
+class DashboardSnapshotCache:
+    """
+    Per-domain snapshot cache for dashboard statistics
+    """
+
+    @staticmethod
+    def _cache():
+        return caches[get_setting('CACHE_ALIAS')]
+
+    @staticmethod
+    def _generation_key(domain):
+        return f"{get_setting('KEY_PREFIX')}:{domain}:generation"
+
+    @staticmethod
+    def _entry_key(domain, name):
+        return f"{get_setting('KEY_PREFIX')}:{domain}:{name}"
+
+    @staticmethod
+    def get(domain, name, builder):
+        """
+        Return the snapshot `name` of `domain`, building it with `builder()`
+        on a miss. Stale snapshots are returned as-is and refreshed in the
+        background when STALE_WHILE_REVALIDATE is enabled.
+        """
+        if not get_setting('ENABLED'):
+            return builder()
+
+        cache = DashboardSnapshotCache._cache()
+        entry_key = DashboardSnapshotCache._entry_key(domain, name)
+        generation_key = DashboardSnapshotCache._generation_key(domain)
+
+        cached = cache.get_many([entry_key, generation_key])
+        entry = cached.get(entry_key)
+        generation = cached.get(generation_key, 0)
+
+        if entry is None:
+            return DashboardSnapshotCache._rebuild(domain, name, builder, generation)
+
+        age = (timezone.now() - entry['computed_at']).total_seconds()
+        if entry['generation'] == generation and age < get_setting('MAX_AGE'):
+            return entry['value']
+
+        if get_setting('STALE_WHILE_REVALIDATE'):
+            DashboardSnapshotCache._schedule_refresh(domain, name, builder)
+            return entry['value']
+
+        return DashboardSnapshotCache._rebuild(domain, name, builder, generation)
+
+    @staticmethod
+    def _rebuild(domain, name, builder, generation=None):
+        """Compute the snapshot and store it under the given generation"""
+        cache = DashboardSnapshotCache._cache()
+        if generation is None:
+            generation = cache.get(DashboardSnapshotCache._generation_key(domain), 0)
+
+        value = builder()
+        cache.set(
+            DashboardSnapshotCache._entry_key(domain, name),
+            {'value': value, 'generation': generation, 'computed_at': timezone.now()},
+            get_setting('TIMEOUT'),
+        )
+        return value
+
+    @staticmethod
+    def _schedule_refresh(domain, name, builder):
+        """Recompute a stale snapshot in a background thread (one at a time)"""
+        cache = DashboardSnapshotCache._cache()
+        lock_key = f"{DashboardSnapshotCache._entry_key(domain, name)}:refreshing"
+        if not cache.add(lock_key, True, get_setting('REFRESH_LOCK_TIMEOUT')):
+            return
+
+        def refresh():
+            try:
+                DashboardSnapshotCache._rebuild(domain, name, builder)
+            except Exception:
+                logger.exception('Failed to refresh snapshot %s:%s', domain, name)
+            finally:
+                cache.delete(lock_key)
+                close_old_connections()
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    @staticmethod
+    def invalidate(*domains):
+        """Mark every snapshot of the given domains as stale"""
+        cache = DashboardSnapshotCache._cache()
+        for domain in domains:
+            key = DashboardSnapshotCache._generation_key(domain)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, None)
+
+    @staticmethod
+    def invalidate_all():
+        DashboardSnapshotCache.invalidate(*DOMAIN_MODELS.keys())
+
+
+# ===================================================================
+# INVALIDATION SIGNALS
+# ===================================================================
+
+MODEL_DOMAINS = {}
+for _domain, _labels in DOMAIN_MODELS.items():
+    for _label in _labels:
+        MODEL_DOMAINS.setdefault(_label, []).append(_domain)
+
+
+def invalidate_snapshots(sender, **kwargs):
+    """
+    Invalidate the domains that depend on the saved/deleted model once the
+    surrounding transaction commits
+    """
+    domains = MODEL_DOMAINS.get(sender._meta.label, [])
+    if domains:
+        transaction.on_commit(lambda: DashboardSnapshotCache.invalidate(*domains))
+
+
+def connect_signals():
+    for label in MODEL_DOMAINS:
+        post_save.connect(invalidate_snapshots, sender=label, dispatch_uid=f'snapshot-save-{label}')
+        post_delete.connect(invalidate_snapshots, sender=label, dispatch_uid=f'snapshot-delete-{label}')
@@ -0,0 +1,315 @@
+"""
+Dashboard Statistics Service for Origin App
+Computes dashboard figures with one conditional-aggregation query per model
+"""
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+def month_starts(today, count):
+    """Return the first day of the last `count` months, oldest first"""
+    months = []
+    month_start = today.replace(day=1)
+    for _ in range(count):
+        months.insert(0, month_start)
+        month_start = (month_start - timedelta(days=1)).replace(day=1)
+    return months
+
+
+@dataclass(frozen=True)
+class PropertyStats:
+    total: int = 0
+    available: int = 0
+    rented: int = 0
+    under_maintenance: int = 0
+    for_sale: int = 0
+    by_type: list = field(default_factory=list)
+    by_city: list = field(default_factory=list)
+
+    @property
+    def occupancy_rate(self):
+        return (self.rented / self.total * 100) if self.total > 0 else 0
+
+
+@dataclass(frozen=True)
+class ContractStats:
+    total: int = 0
+    active: int = 0
+    expired: int = 0
+    terminated: int = 0
+    expiring_soon: int = 0
+    # Any status, the contract list's "expiring soon" card
+    ending_soon: int = 0
+    overdue: int = 0
+    new_this_month: int = 0
+    avg_duration_months: float = 0
+    rent_total: Decimal = Decimal('0')
+
+
+@dataclass(frozen=True)
+class FinancialStats:
+    total_revenue: Decimal = Decimal('0')
+    payments_month: Decimal = Decimal('0')
+    pending_invoices: Decimal = Decimal('0')
+    sales_revenue: Decimal = Decimal('0')
+    revenue_trend: list = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class MaintenanceStats:
+    total: int = 0
+    pending: int = 0
+    in_progress: int = 0
+    completed: int = 0
+    urgent: int = 0
+    costs_month: Decimal = Decimal('0')
+
+
+@dataclass(frozen=True)
+class PeopleStats:
+    total_clients: int = 0
+    total_owners: int = 0
+    new_clients_month: int = 0
+
+
+@dataclass(frozen=True)
+class SalesStats:
+    total: int = 0
+    active: int = 0
+    completed: int = 0
+    pending_reservations: int = 0
+    approved_reservations: int = 0
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    properties: PropertyStats
+    contracts: ContractStats
+    financial: FinancialStats
+    maintenance: MaintenanceStats
+    people: PeopleStats
+    sales: SalesStats
+    computed_at: object = None
+
+
+class DashboardStatisticsService:
+    """
+    Service class for the main dashboard statistics
+    """
+
+    REVENUE_TREND_MONTHS = 6
+
+    @staticmethod
+    def property_stats():
+        """Property counts by status plus type/city breakdowns"""
+        from apps.properties.models import Property
+
+        counts = Property.objects.aggregate(
+            total=Count('id'),
+            available=Count('id', filter=Q(status='available')),
+            rented=Count('id', filter=Q(status='rented')),
+            under_maintenance=Count('id', filter=Q(status='maintenance')),
+            for_sale=Count('id', filter=Q(is_for_sale=True)),
+        )
+
+        by_type = Property.objects.values('property_type__name').annotate(
+            count=Count('id')
+        ).order_by('-count')[:6]
+
+        by_city = Property.objects.values('city').annotate(
+            count=Count('id')
+        ).order_by('-count')[:5]
+
+        return PropertyStats(
+            by_type=[(item['property_type__name'] or 'Other', item['count']) for item in by_type],
+            by_city=[(item['city'] or 'Unknown', item['count']) for item in by_city],
+            **counts
+        )
+
+    @staticmethod
+    def contract_stats(today=None):
+        """Contract counts by status and expiry window, average duration and rent total"""
+        from apps.contracts.models import Contract
+
+        today = today or timezone.now().date()
+        duration = ExpressionWrapper(F('end_date') - F('start_date'), output_field=DurationField())
+        active_with_dates = Q(status='active', start_date__isnull=False, end_date__isnull=False)
+
+        stats = Contract.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(status='active')),
+            expired=Count('id', filter=Q(status='expired')),
+            terminated=Count('id', filter=Q(status='terminated')),
+            expiring_soon=Count('id', filter=Q(
+                status='active',
+                end_date__gte=today,
+                end_date__lte=today + timedelta(days=30),
+            )),
+            ending_soon=Count('id', filter=Q(end_date__range=(today, today + timedelta(days=30)))),
+            # Lapsed but not yet processed by the contract expiry sweep
+            overdue=Count('id', filter=Q(status__in=['active', 'renewed'], end_date__lt=today)),
+            new_this_month=Count('id', filter=Q(created_at__gte=today.replace(day=1))),
+            avg_duration=Avg(duration, filter=active_with_dates),
+            rent_total=Sum('rent_amount'),
+        )
+
+        stats['rent_total'] = stats['rent_total'] or Decimal('0')
+        avg_duration = stats.pop('avg_duration')
+        # Approximate 30-day months
+        stats['avg_duration_months'] = avg_duration.total_seconds() / 86400 / 30.0 if avg_duration else 0
+
+        return ContractStats(**stats)
+
+    @staticmethod
+    def financial_stats(today=None):
+        """Payment totals, pending invoices, sales revenue and monthly trend"""
+        from apps.financial.models import Invoice, Payment
+        from apps.sales.models import SalesPayment
+
+        today = today or timezone.now().date()
+        first_day_month = today.replace(day=1)
+        months = month_starts(today, DashboardStatisticsService.REVENUE_TREND_MONTHS)
+
+        invoiced_payments = Payment.objects.filter(invoice__isnull=False)
+        payments = invoiced_payments.aggregate(
+            total_revenue=Sum('amount'),
+            payments_month=Sum('amount', filter=Q(payment_date__gte=first_day_month)),
+        )
+
+        pending_invoices = Invoice.objects.filter(
+            status='issued'
+        ).aggregate(total=Sum('total_amount'))['total']
+
+        sales_revenue = SalesPayment.objects.filter(
+            status='completed'
+        ).aggregate(total=Sum('amount'))['total']
+
+        monthly = dict(
+            invoiced_payments.filter(
+                payment_date__gte=months[0],
+                payment_date__lte=today,
+            ).annotate(
+                month=TruncMonth('payment_date')
+            ).values('month').annotate(
+                total=Sum('amount')
+            ).values_list('month', 'total')
+        )
+
+        return FinancialStats(
+            total_revenue=payments['total_revenue'] or Decimal('0'),
+            payments_month=payments['payments_month'] or Decimal('0'),
+            pending_invoices=pending_invoices or Decimal('0'),
+            sales_revenue=sales_revenue or Decimal('0'),
+            revenue_trend=[
+                (month.strftime('%b %Y'), float(monthly.get(month) or 0))
+                for month in months
+            ],
+        )
+
+    @staticmethod
+    def maintenance_stats(today=None):
+        """Maintenance request counts and this month's estimated costs"""
+        from apps.maintenance.models import MaintenanceRequest
+
+        today = today or timezone.now().date()
+
+        stats = MaintenanceRequest.objects.aggregate(
+            total=Count('id'),
+            pending=Count('id', filter=Q(status='pending')),
+            in_progress=Count('id', filter=Q(status='in_progress')),
+            completed=Count('id', filter=Q(status='completed')),
+            urgent=Count('id', filter=Q(priority='urgent', status__in=['pending', 'in_progress'])),
+            costs_month=Sum('estimated_cost', filter=Q(
+                request_date__gte=today.replace(day=1),
+                estimated_cost__isnull=False,
+            )),
+        )
+        stats['costs_month'] = stats['costs_month'] or Decimal('0')
+
+        return MaintenanceStats(**stats)
+
+    @staticmethod
+    def people_stats(today=None):
+        """Active clients and owners, and clients added this month"""
+        from apps.clients.models import Client
+        from apps.owners.models import Owner
+
+        today = today or timezone.now().date()
+
+        clients = Client.objects.aggregate(
+            total_clients=Count('id', filter=Q(is_active=True)),
+            new_clients_month=Count('id', filter=Q(created_at__gte=today.replace(day=1))),
+        )
+        total_owners = Owner.objects.filter(is_active=True).count()
+
+        return PeopleStats(total_owners=total_owners, **clients)
+
+    @staticmethod
+    def sales_stats():
+        """Sales contract and reservation counts by status"""
+        from apps.sales.models import SalesContract, PropertyReservation
+
+        contracts = SalesContract.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(status='active')),
+            completed=Count('id', filter=Q(status='completed')),
+        )
+        reservations = PropertyReservation.objects.aggregate(
+            pending_reservations=Count('id', filter=Q(status='pending')),
+            approved_reservations=Count('id', filter=Q(status='approved')),
+        )
+
+        return SalesStats(**contracts, **reservations)
+
+    @staticmethod
+    def get_snapshot(today=None):
+        """
+        Compute every dashboard figure and return a DashboardSnapshot
+        """
+        today = today or timezone.now().date()
+        return DashboardSnapshot(
+            properties=DashboardStatisticsService.property_stats(),
+            contracts=DashboardStatisticsService.contract_stats(today),
+            financial=DashboardStatisticsService.financial_stats(today),
+            maintenance=DashboardStatisticsService.maintenance_stats(today),
+            people=DashboardStatisticsService.people_stats(today),
+            sales=DashboardStatisticsService.sales_stats(),
+            computed_at=timezone.now(),
+        )
+
+    @staticmethod
+    def get_cached_contract_stats(today=None):
+        """contract_stats() from the snapshot cache, shared with the dashboard"""
+        from .snapshots import DashboardSnapshotCache
+
+        today = today or timezone.now().date()
+        return DashboardSnapshotCache.get(
+            'contracts', f'dashboard:{today.isoformat()}',
+            lambda: DashboardStatisticsService.contract_stats(today),
+        )
+
+    @staticmethod
+    def get_cached_snapshot(today=None):
+        """
+        Same as get_snapshot(), but each domain is read from the snapshot cache
+        """
+        from .snapshots import DashboardSnapshotCache
+
+        today = today or timezone.now().date()
+        day = today.isoformat()
+        get = DashboardSnapshotCache.get
+        service = DashboardStatisticsService
+
+        return DashboardSnapshot(
+            properties=get('properties', 'dashboard', service.property_stats),
+            contracts=service.get_cached_contract_stats(today),
+            financial=get('financial', f'dashboard:{day}', lambda: service.financial_stats(today)),
+            maintenance=get('maintenance', f'dashboard:{day}', lambda: service.maintenance_stats(today)),
+            people=get('people', f'dashboard:{day}', lambda: service.people_stats(today)),
+            sales=get('sales', 'dashboard', service.sales_stats),
+        )
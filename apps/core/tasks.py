@@ -0,0 +1,146 @@
+"""
+Background tasks for Origin App core
+Notification email delivery, scheduled notification dispatch and
+notification fan-out
+"""
+import logging
+from smtplib import SMTPException
+
+from celery import shared_task
+from celery.utils.time import get_exponential_backoff_interval
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, transaction
+
+from .email_queue import EmailDeliveryError, NotificationEmailQueue
+
+logger = logging.getLogger(__name__)
+
+# Longest wait, in seconds, between two retries of a failed task
+RETRY_BACKOFF_MAX = 600
+
+
+# ===================================================================
+# IDEMPOTENCY
+# ===================================================================
+
+def claim_task(key, timeout=None):
+    """
+    Reserve an idempotency key, returns False if a task with the same key
+    already ran (or is running)
+    """
+    return cache.add(f'task-key:{key}', True, timeout or settings.TASK_IDEMPOTENCY_TIMEOUT)
+
+
+def release_task(key):
+    """Forget an idempotency key so a failed task can be retried"""
+    cache.delete(f'task-key:{key}')
+
+
+def retry_unless_eager(task, exc):
+    """
+    Retry a failed task with exponential backoff. A task running eagerly
+    in the web process is not retried (each retry would run again inside
+    the request that queued it), the error is raised as is.
+    """
+    if task.request.is_eager:
+        raise exc
+    raise task.retry(exc=exc, countdown=get_exponential_backoff_interval(
+        factor=1,
+        retries=task.request.retries,
+        maximum=RETRY_BACKOFF_MAX,
+        full_jitter=True,
+    ))
+
+
+# ===================================================================
+# TASKS
+# ===================================================================
+
+@shared_task(bind=True, max_retries=5)
+def send_notification_emails(self, notification_ids=None):
+    """
+    Send pending notification emails (already sent ones are skipped). Run
+    eagerly in the web process, a failure is only logged: the emails stay
+    pending for the scheduled dispatcher.
+    """
+    try:
+        return NotificationEmailQueue.deliver(notification_ids, raise_on_failure=True)
+    except (SMTPException, OSError, EmailDeliveryError, OperationalError) as e:
+        if self.request.is_eager:
+            logger.warning('Notification emails left for the dispatcher: %s', e)
+            return 0
+        retry_unless_eager(self, e)
+
+
+@shared_task
+def dispatch_scheduled_notifications():
+    """
+    Periodic sweep (see CELERY_BEAT_SCHEDULE): send every notification email
+    that has come due, digests included. Overlapping runs are skipped.
+    """
+    key = 'dispatch-scheduled-notifications'
+    if not claim_task(key, timeout=settings.NOTIFICATION_DISPATCH_INTERVAL):
+        return None
+
+    try:
+        return NotificationEmailQueue.deliver()
+    finally:
+        release_task(key)
+
+
+@shared_task
+def archive_notifications():
+    """Daily retention run (see NOTIFICATION_RETENTION and CELERY_BEAT_SCHEDULE)"""
+    from .retention import NotificationRetention
+
+    return NotificationRetention.run()
+
+
+@shared_task
+def reconcile_unread_counts():
+    """Periodic check of the cached unread counters (see CELERY_BEAT_SCHEDULE)"""
+    from .unread import UnreadCounter
+
+    return len(UnreadCounter.reconcile())
+
+
+@shared_task(bind=True, max_retries=3)
+def dispatch_notification(self, method, model_label, object_id, args=(), idempotency_key=None):
+    """
+    Run NotificationService.<method>(instance, *args) for a model instance,
+    at most once per idempotency key
+    """
+    from .services import NotificationService
+
+    key = idempotency_key or ':'.join([method, model_label, str(object_id)] + [str(arg) for arg in args])
+    if not claim_task(key):
+        return 'duplicate'
+
+    try:
+        instance = apps.get_model(model_label).objects.filter(pk=object_id).first()
+        if instance is None:
+            return 'missing'
+        getattr(NotificationService, method)(instance, *args)
+    except OperationalError as e:
+        release_task(key)
+        retry_unless_eager(self, e)
+    except Exception:
+        release_task(key)
+        raise
+    return 'sent'
+
+
+def queue_notification(method, instance, *args, idempotency_key=None):
+    """
+    Fan a NotificationService.notify_* call out to the task queue once the
+    current transaction commits
+    """
+    transaction.on_commit(lambda: dispatch_notification.delay(
+        method,
+        instance._meta.label,
+        instance.pk,
+        args=list(args),
+        idempotency_key=idempotency_key,
+    ))
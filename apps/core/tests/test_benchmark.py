@@ -0,0 +1,32 @@
+"""
+Endpoint regression checks for Origin App
+Every view and API endpoint is requested over a seeded portfolio and
+compared with apps/core/tests/benchmark_baseline.json. Status codes and
+query counts are checked here, and a 404 or server error the baseline does
+not record fails; wall time and memory are too noisy to commit and are
+compared against a local file (see `python manage.py benchmark_endpoints
+--output`).
+After an intended change, refresh the baseline with
+`python manage.py benchmark_endpoints --update-baseline`.
+"""
+from django.test import TestCase, override_settings
+
+from apps.core.benchmark import STORAGES, EndpointBenchmark
+
+
+@override_settings(STORAGES=STORAGES)
+class EndpointBenchmarkTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.baseline = EndpointBenchmark.load_baseline()
+        cls.user = EndpointBenchmark.seed(cls.baseline['size'])
+
+    def test_endpoints_within_baseline(self):
+        results = EndpointBenchmark.run(self.user)
+
+        missing = sorted(set(results) - set(self.baseline['endpoints']))
+        self.assertEqual(missing, [], 'Endpoints missing from the benchmark baseline')
+
+        regressions = EndpointBenchmark.compare(results, self.baseline, checks=('status', 'queries'))
+        self.assertEqual(regressions, [], '\n'.join(regressions))
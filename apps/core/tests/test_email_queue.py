@@ -0,0 +1,94 @@
+"""
+Notification email queue tests for Origin App
+Every run claims the rows of an email before sending it, so two runs over
+the same pending notifications send each one once, and a failed email
+leaves its rows pending for the next run. Run eagerly in the web process,
+the delivery task makes one attempt and leaves failures to the dispatcher.
+"""
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.core.email_queue import NotificationEmailQueue
+from apps.core.models import Notification
+from apps.core.tasks import send_notification_emails
+
+
+class NotificationEmailQueueTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(f'mailed{number}', f'mailed{number}@example.com', 'mailed')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        due = timezone.now() - timedelta(minutes=1)
+        self.notifications = [
+            Notification.objects.create(
+                user=user,
+                title=f'Hello {user.username}',
+                message='Pending',
+                email_pending=True,
+                scheduled_for=due
+            )
+            for user in self.users
+        ]
+
+    def test_overlapping_runs_send_each_email_once(self):
+        build_message = NotificationEmailQueue._message
+        overlapping = []
+
+        def message_with_overlapping_run(notifications, connection):
+            # A second run starts while the first is sending its first email
+            if not overlapping:
+                overlapping.append(None)
+                overlapping[0] = NotificationEmailQueue.deliver()
+            return build_message(notifications, connection)
+
+        with mock.patch.object(NotificationEmailQueue, '_message', side_effect=message_with_overlapping_run):
+            delivered = NotificationEmailQueue.deliver()
+
+        self.assertEqual((delivered, overlapping[0]), (1, 2))
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), sorted(user.email for user in self.users))
+        self.assertEqual(
+            Notification.objects.filter(is_sent_email=True, email_pending=False).count(),
+            3
+        )
+        self.assertEqual(NotificationEmailQueue.deliver(), 0)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_failed_email_stays_pending(self):
+        failing = self.notifications[0]
+        build_message = NotificationEmailQueue._message
+
+        def message_failing_for_one(notifications, connection):
+            message = build_message(notifications, connection)
+            if notifications[0].pk == failing.pk:
+                message.send = mock.Mock(side_effect=OSError('connection reset'))
+            return message
+
+        with mock.patch.object(NotificationEmailQueue, '_message', side_effect=message_failing_for_one):
+            self.assertEqual(NotificationEmailQueue.deliver(), 2)
+
+        failing.refresh_from_db()
+        self.assertTrue(failing.email_pending)
+        self.assertFalse(failing.is_sent_email)
+
+        self.assertEqual(NotificationEmailQueue.deliver(), 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+    def test_eager_task_does_not_retry(self):
+        with mock.patch('apps.core.email_queue.get_connection') as get_connection:
+            get_connection.return_value.open.side_effect = OSError('connection refused')
+            result = send_notification_emails.delay([notification.pk for notification in self.notifications])
+
+        self.assertEqual(result.get(), 0)
+        self.assertEqual(get_connection.return_value.open.call_count, 1)
+        self.assertEqual(Notification.objects.filter(email_pending=True, is_sent_email=False).count(), 3)
@@ -0,0 +1,57 @@
+"""
+Request profiling tests for Origin App
+QueryProfilingMiddleware only records into a cache shared by every worker:
+on a process-local cache profiling stays off and core.W002 says why.
+"""
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from apps.core.benchmark import STORAGES
+from apps.core.checks import check_profiling_cache
+from apps.core.profiling import RequestProfileStore
+
+
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(PERF_PROFILING_ENABLED=True, STORAGES=STORAGES)
+class QueryProfilingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('profiler', 'profiler@example.com', 'profiler')
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        self.shared_cache = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': self.cache_dir.name,
+            }
+        }
+        self.client.force_login(self.user)
+
+    def profiled_views(self):
+        return {stats['view']: stats['requests'] for stats in RequestProfileStore.summary()['views']}
+
+    def test_shared_cache_records_requests(self):
+        with self.settings(CACHES=self.shared_cache):
+            self.assertEqual(check_profiling_cache(None), [])
+            self.client.get('/en/search/?q=flat')
+            self.client.get('/en/search/?q=villa')
+            self.assertEqual(self.profiled_views().get('core:global_search'), 2)
+
+    def test_local_cache_turns_profiling_off(self):
+        with self.settings(CACHES=LOCAL_CACHE):
+            self.assertEqual([warning.id for warning in check_profiling_cache(None)], ['core.W002'])
+            self.client.get('/en/search/?q=flat')
+            self.assertEqual(self.profiled_views(), {})
+            self.assertContains(self.client.get('/en/ops/perf/'), 'profiling is off')
+
+    @override_settings(PERF_PROFILING_ENABLED=False, PERF_PROFILING_SAMPLE_PERCENT=0)
+    def test_no_warning_while_profiling_is_off(self):
+        with self.settings(CACHES=LOCAL_CACHE):
+            self.assertEqual(check_profiling_cache(None), [])
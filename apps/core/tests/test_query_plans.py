@@ -0,0 +1,214 @@
+"""
+Query plan checks for Origin App
+Captures the queries the list views, dashboards, reports and services
+actually issue (through the client or the service itself, never rebuilt by
+hand) and runs EXPLAIN QUERY PLAN on them; a check fails if one of them
+reads a whole table instead of going through an index, or if the code stops
+issuing the query. SQLite plans only: the wording is SQLite's, and other
+databases pick sequential scans on the small test tables anyway.
+"""
+import re
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.clients.models import Client
+from apps.core.benchmark import STORAGES
+from apps.contracts.models import Contract
+from apps.contracts.scheduler import ContractExpiryScheduler
+from apps.financial.models import (
+    Account,
+    AccountType,
+    Budget,
+    FinancialPeriod,
+    Invoice,
+    JournalEntry,
+    JournalEntryLine,
+)
+from apps.financial.reports import FinancialReportService
+from apps.financial.views import _financial_dashboard_stats
+from apps.owners.models import Owner
+from apps.properties.financials import FinancialRollupService
+from apps.properties.models import Property, PropertyType
+
+
+# "SCAN <table>" with no USING clause is a full table scan
+FULL_SCAN = re.compile(r'\bSCAN (\w+)$')
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+@override_settings(STORAGES=STORAGES)
+class QueryPlanTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        cls.user = User.objects.create_superuser('planner', 'planner@example.com', 'planner')
+
+        owner = Owner.objects.create(name='Plan Owner', phone='01000000000', national_id='29001010000001')
+        cls.property = Property.objects.create(
+            title='Plan Flat',
+            code='PLN-1',
+            property_type=PropertyType.objects.create(name='Apartment'),
+            owner=owner,
+            address='1 Nile Street',
+            city='Cairo',
+            area_sqm=Decimal('120'),
+            status='available',
+            rental_price_monthly=Decimal('10000'),
+            bedrooms=3,
+        )
+        client = Client.objects.create(
+            name='Plan Tenant', phone='01000000001', national_id='29001010000002', address='Cairo'
+        )
+        Contract.objects.create(
+            contract_number='CONT-PLAN-1',
+            property=cls.property,
+            client=client,
+            start_date=cls.today - timedelta(days=360),
+            end_date=cls.today + timedelta(days=5),
+            rent_amount=Decimal('10000'),
+            status='active',
+        )
+
+        cls.account = Account.objects.create(code='4100', name='Rent Revenue', account_type=AccountType.REVENUE)
+        entry = JournalEntry.objects.create(
+            entry_number='JE-PLAN-1', entry_date=cls.today, description='Rent', is_posted=True
+        )
+        JournalEntryLine.objects.create(journal_entry=entry, account=cls.account, credit_amount=Decimal('10000'))
+        cls.budget = Budget.objects.create(
+            name='Rent budget',
+            period=FinancialPeriod.objects.create(
+                name=str(cls.today.year),
+                start_date=cls.today.replace(month=1, day=1),
+                end_date=cls.today.replace(month=12, day=31),
+            ),
+            account=cls.account,
+            budgeted_amount=Decimal('120000'),
+        )
+        Invoice.objects.create(
+            invoice_number='INV-PLAN-1',
+            invoice_type='rent',
+            invoice_date=cls.today - timedelta(days=45),
+            due_date=cls.today - timedelta(days=15),
+            status='issued',
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def captured(self, call):
+        """SQL of every query `call()` issues"""
+        with CaptureQueriesContext(connection) as queries:
+            call()
+        return [query['sql'] for query in queries.captured_queries]
+
+    def get(self, url):
+        def request():
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return self.captured(request)
+
+    def assertIndexed(self, queries, table, *fragments):
+        """
+        EXPLAIN the SELECTs from `table` whose SQL holds every fragment; at
+        least one must match and none may scan a whole table
+        """
+        matching = [
+            sql for sql in queries
+            if sql.startswith('SELECT') and f'FROM "{table}"' in sql and all(fragment in sql for fragment in fragments)
+        ]
+        self.assertTrue(matching, f'No query from {table} with {fragments}:\n' + '\n'.join(queries))
+
+        tables = set(connection.introspection.table_names())
+        for sql in matching:
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = '\n'.join(row[-1] for row in cursor.fetchall())
+            scans = [
+                match.group(1)
+                for match in (FULL_SCAN.search(line.strip()) for line in plan.splitlines())
+                if match and match.group(1) in tables
+            ]
+            self.assertEqual(scans, [], f'Full scan of {", ".join(scans)}:\n{plan}\n\n{sql}')
+
+    # -------------------------------------------------------------------
+    # Properties
+    # -------------------------------------------------------------------
+
+    def test_property_list_default_sort(self):
+        self.assertIndexed(self.get('/en/properties/'), 'properties_property', 'ORDER BY', 'LIMIT')
+
+    def test_property_list_status_sorted_by_newest(self):
+        self.assertIndexed(
+            self.get('/en/properties/?status=available'),
+            'properties_property', '"status" = ', 'LIMIT'
+        )
+
+    def test_property_list_status_rent_and_bedrooms(self):
+        self.assertIndexed(
+            self.get('/en/properties/?status=available&min_rent=5000&max_rent=15000&bedrooms=2'),
+            'properties_property', '"rental_price_monthly" >= ', 'LIMIT'
+        )
+
+    def test_property_month_refresh(self):
+        queries = self.captured(
+            lambda: FinancialRollupService.refresh(self.property.pk, self.today.year, self.today.month)
+        )
+        self.assertIndexed(queries, 'properties_propertyrevenue', '"revenue_date" >= ')
+        self.assertIndexed(queries, 'properties_propertyexpense', '"expense_date" >= ')
+
+    # -------------------------------------------------------------------
+    # Contracts
+    # -------------------------------------------------------------------
+
+    def test_dashboard_contracts_expiring(self):
+        self.assertIndexed(self.get('/en/'), 'contracts_contract', '"end_date" <= ', 'LIMIT 5')
+
+    def test_contract_expiry_scheduler_due(self):
+        self.assertIndexed(
+            self.captured(lambda: list(ContractExpiryScheduler.due(self.today))),
+            'contracts_contract', '"end_date" <= '
+        )
+
+    def test_contract_list_by_status(self):
+        self.assertIndexed(self.get('/en/contracts/?status=active'), 'contracts_contract', '"status" = ', 'LIMIT')
+
+    # -------------------------------------------------------------------
+    # Financial
+    # -------------------------------------------------------------------
+
+    def test_account_transactions(self):
+        self.assertIndexed(
+            self.get(f'/en/financial/accounts/{self.account.pk}/'),
+            'financial_journalentryline', '"account_id" = ', 'LIMIT'
+        )
+
+    def test_budget_actual_amount(self):
+        self.assertIndexed(
+            self.captured(self.budget.get_actual_amount),
+            'financial_journalentryline', '"account_id" = '
+        )
+
+    def test_account_totals(self):
+        self.assertIndexed(
+            self.captured(lambda: FinancialReportService.account_totals(self.today.replace(day=1), self.today)),
+            'financial_journalentryline', '"entry_date" >= '
+        )
+
+    def test_outstanding_and_overdue_invoices(self):
+        self.assertIndexed(
+            self.captured(lambda: _financial_dashboard_stats(self.today)),
+            'financial_invoice', '"status" IN '
+        )
+
+    def test_invoice_list_by_status(self):
+        self.assertIndexed(
+            self.get('/en/financial/invoices/?status=issued'),
+            'financial_invoice', '"status" = ', 'ORDER BY "financial_invoice"."invoice_date" DESC'
+        )
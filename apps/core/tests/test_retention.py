@@ -0,0 +1,137 @@
+"""
+Notification retention tests for Origin App
+Only read notifications past their TTL leave the Notification table, chunk
+by chunk, into the archive table, a gzipped JSONL file (one complete gzip
+member per chunk) or nowhere.
+"""
+import gzip
+import json
+import os
+import tempfile
+import zlib
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.core.models import Notification, NotificationArchive
+from apps.core.retention import NotificationRetention
+
+
+def gzip_members(path):
+    """Number of complete gzip members in a file"""
+    with open(path, 'rb') as archive_file:
+        data = archive_file.read()
+    members = 0
+    while data:
+        member = zlib.decompressobj(wbits=31)
+        member.decompress(data)
+        if not member.eof:
+            raise ValueError('Truncated gzip member')
+        data = member.unused_data
+        members += 1
+    return members
+
+
+class NotificationRetentionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('retained', 'retained@example.com', 'retained')
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.expired_ids = [
+            self.notify(f'Old read {number}', days_old=100, is_read=True).pk
+            for number in range(5)
+        ]
+        self.old_unread = self.notify('Old unread', days_old=400)
+        self.recent_read = self.notify('Recent read', days_old=10, is_read=True)
+        self.urgent_read = self.notify('Urgent read', days_old=100, is_read=True, priority='urgent')
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.path = os.path.join(self.tempdir.name, 'notifications.jsonl.gz')
+
+    def notify(self, title, days_old, is_read=False, priority='medium'):
+        notification = Notification.objects.create(
+            user=self.user,
+            title=title,
+            message=title,
+            notification_type='warning',
+            priority=priority,
+            is_read=is_read
+        )
+        Notification.objects.filter(pk=notification.pk).update(created_at=self.now - timedelta(days=days_old))
+        return notification
+
+    def assertOnlyExpiredMoved(self):
+        self.assertFalse(Notification.objects.filter(pk__in=self.expired_ids).exists())
+        self.assertEqual(
+            set(Notification.objects.values_list('pk', flat=True)),
+            {self.old_unread.pk, self.recent_read.pk, self.urgent_read.pk}
+        )
+
+    def test_expired_is_read_only_and_honours_ttls(self):
+        self.assertEqual(
+            sorted(NotificationRetention.expired(self.now).values_list('pk', flat=True)),
+            self.expired_ids
+        )
+
+    def test_archive_mode(self):
+        self.assertEqual(NotificationRetention.run('archive', chunk_size=2, now=self.now), 5)
+
+        self.assertOnlyExpiredMoved()
+        self.assertEqual(
+            sorted(NotificationArchive.objects.values_list('original_id', flat=True)),
+            self.expired_ids
+        )
+
+    def test_purge_mode(self):
+        self.assertEqual(NotificationRetention.run('purge', chunk_size=2, now=self.now), 5)
+
+        self.assertOnlyExpiredMoved()
+        self.assertFalse(NotificationArchive.objects.exists())
+
+    def test_file_mode_writes_one_gzip_member_per_chunk(self):
+        self.assertEqual(NotificationRetention.run('file', chunk_size=2, path=self.path, now=self.now), 5)
+
+        self.assertOnlyExpiredMoved()
+        self.assertEqual(gzip_members(self.path), 3)
+        with gzip.open(self.path, 'rt', encoding='utf-8') as archive_file:
+            rows = [json.loads(line) for line in archive_file]
+        self.assertEqual([row['id'] for row in rows], self.expired_ids)
+
+        # A later run appends to the same file
+        self.notify('Another old read', days_old=100, is_read=True)
+        self.assertEqual(NotificationRetention.run('file', chunk_size=2, path=self.path, now=self.now), 1)
+        self.assertEqual(gzip_members(self.path), 4)
+
+    def test_failed_file_write_keeps_the_chunk(self):
+        json_row = NotificationRetention._json_row
+        written = []
+
+        def failing_json_row(notification):
+            if len(written) == 2:
+                raise OSError('disk full')
+            written.append(notification.pk)
+            return json_row(notification)
+
+        with mock.patch.object(NotificationRetention, '_json_row', side_effect=failing_json_row):
+            with self.assertRaises(OSError):
+                NotificationRetention.run('file', chunk_size=2, path=self.path, now=self.now)
+
+        # The first chunk is on disk and deleted, the failed one is in neither
+        self.assertEqual(gzip_members(self.path), 1)
+        self.assertEqual(
+            sorted(Notification.objects.filter(pk__in=self.expired_ids).values_list('pk', flat=True)),
+            self.expired_ids[2:]
+        )
+
+    def test_unknown_mode_and_missing_path(self):
+        with self.assertRaises(ValueError):
+            NotificationRetention.run('shred')
+        with self.assertRaises(ValueError):
+            NotificationRetention.run('file')
@@ -0,0 +1,113 @@
+"""
+Unread counter tests for Origin App
+The cached UnreadCounter must follow notifications as they are created,
+read and deleted (one at a time or in bulk) and always equal a
+fresh COUNT of the user's unread notifications. On a cache private to each
+process there is no counter: every read is a COUNT.
+"""
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.core.models import Notification
+from apps.core.services import NotificationService
+from apps.core.unread import UnreadCounter
+
+
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class UnreadCounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', 'reader@example.com', 'reader')
+        cls.other = User.objects.create_user('other', 'other@example.com', 'other')
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        shared_cache = self.settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': cache_dir.name,
+            }
+        })
+        shared_cache.enable()
+        self.addCleanup(shared_cache.disable)
+
+    def notify(self, user, title, is_read=False):
+        return Notification.objects.create(user=user, title=title, message=title, is_read=is_read)
+
+    def assertCounterMatches(self, user):
+        cached = cache.get(UnreadCounter.key(user.pk))
+        self.assertIsNotNone(cached)
+        self.assertEqual(cached, Notification.objects.filter(user=user, is_read=False).count())
+
+    def test_create_and_read(self):
+        self.assertEqual(UnreadCounter.get(self.user.pk), 0)
+        first = self.notify(self.user, 'First')
+        self.notify(self.user, 'Second')
+        self.notify(self.user, 'Already read', is_read=True)
+        self.assertEqual(UnreadCounter.get(self.user.pk), 2)
+
+        first.mark_as_read()
+        self.assertEqual(UnreadCounter.get(self.user.pk), 1)
+        self.assertCounterMatches(self.user)
+
+    def test_delete(self):
+        unread = self.notify(self.user, 'Unread')
+        read = self.notify(self.user, 'Read', is_read=True)
+        self.notify(self.user, 'Kept')
+        self.assertEqual(UnreadCounter.get(self.user.pk), 2)
+
+        Notification.objects.get(pk=read.pk).delete()
+        self.assertEqual(UnreadCounter.get(self.user.pk), 2)
+        Notification.objects.get(pk=unread.pk).delete()
+        self.assertEqual(UnreadCounter.get(self.user.pk), 1)
+        self.assertCounterMatches(self.user)
+
+    def test_bulk_delete(self):
+        for number in range(3):
+            self.notify(self.user, f'Mine {number}')
+            self.notify(self.other, f'Theirs {number}')
+        self.assertEqual((UnreadCounter.get(self.user.pk), UnreadCounter.get(self.other.pk)), (3, 3))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(NotificationService.bulk_delete(Notification.objects.filter(user=self.user, title='Mine 0')), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(NotificationService.bulk_delete(Notification.objects.filter(title__endswith='1')), 2)
+
+        self.assertEqual((UnreadCounter.get(self.user.pk), UnreadCounter.get(self.other.pk)), (1, 2))
+        self.assertCounterMatches(self.user)
+        self.assertCounterMatches(self.other)
+        self.assertEqual(UnreadCounter.reconcile([self.user.pk, self.other.pk]), {})
+
+    def test_bulk_delete_is_one_count_and_one_delete(self):
+        for number in range(5):
+            self.notify(self.user, f'Mine {number}')
+            self.notify(self.other, f'Theirs {number}', is_read=number % 2 == 0)
+        self.assertEqual((UnreadCounter.get(self.user.pk), UnreadCounter.get(self.other.pk)), (5, 2))
+
+        # Savepoint, grouped COUNT, DELETE, release
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(4):
+            deleted = NotificationService.bulk_delete(Notification.objects.all())
+
+        self.assertEqual(deleted, 10)
+        self.assertEqual((UnreadCounter.get(self.user.pk), UnreadCounter.get(self.other.pk)), (0, 0))
+        self.assertCounterMatches(self.user)
+        self.assertCounterMatches(self.other)
+
+    def test_local_cache_counts_every_read(self):
+        with self.settings(CACHES=LOCAL_CACHE):
+            self.notify(self.user, 'First')
+            self.assertEqual(UnreadCounter.get(self.user.pk), 1)
+            self.assertIsNone(cache.get(UnreadCounter.key(self.user.pk)))
+
+            # Another worker's write is seen by the next read
+            Notification.objects.create(user=self.user, title='Second', message='Second')
+            with self.assertNumQueries(1):
+                self.assertEqual(UnreadCounter.get(self.user.pk), 2)
+            self.assertEqual(UnreadCounter.reconcile([self.user.pk]), {})
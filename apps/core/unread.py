@@ -0,0 +1,122 @@
+"""
+Unread Notification Counter for Origin App
+Keeps each user's unread notification count in the cache so the badge is
+read without a COUNT query. The counter is adjusted when notifications are
+created, read or unread, and by Notification.delete() and the
+NotificationService bulk actions (bulk deletes stay a single DELETE, so no
+delete signal is used); a missing key is rebuilt from one COUNT, and
+drifted counters are corrected by periodic reconciliation.
+
+The counter is only kept in a cache shared by every worker (see
+profiling.shared_cache): with LocMemCache each process would keep its own
+count, and the other workers would serve (and 304) a stale badge, so there
+every read is a COUNT query instead.
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.signals import post_save
+
+from .models import Notification
+from .profiling import shared_cache
+
+
+class UnreadCounter:
+    """
+    Per-user unread notification count
+    """
+
+    # Bounds the life of a drifted counter, the next read recounts
+    TIMEOUT = 24 * 3600
+
+    @staticmethod
+    def key(user_id):
+        return f'notifications:unread:{user_id}'
+
+    @staticmethod
+    def get(user_id):
+        """Unread count of a user, counted once and then served from the cache"""
+        if not shared_cache():
+            return Notification.objects.filter(user_id=user_id, is_read=False).count()
+        count = cache.get(UnreadCounter.key(user_id))
+        if count is None:
+            count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+            cache.add(UnreadCounter.key(user_id), count, UnreadCounter.TIMEOUT)
+        return count
+
+    @staticmethod
+    def adjust(deltas):
+        """
+        Apply {user_id: delta} to the cached counters; users without a cached
+        counter are skipped (their next read counts from the database)
+        """
+        if not shared_cache():
+            return
+        for user_id, delta in deltas.items():
+            if not delta:
+                continue
+            try:
+                cache.incr(UnreadCounter.key(user_id), delta)
+            except ValueError:
+                pass
+
+    @staticmethod
+    def set(user_id, count):
+        if shared_cache():
+            cache.set(UnreadCounter.key(user_id), count, UnreadCounter.TIMEOUT)
+
+    @staticmethod
+    def invalidate(user_id):
+        if shared_cache():
+            cache.delete(UnreadCounter.key(user_id))
+
+    @staticmethod
+    def reconcile(user_ids=None):
+        """
+        Compare the cached counters of `user_ids` (default: every active
+        user) with one grouped COUNT and fix the ones that drifted, returns
+        {user_id: (cached, actual)} of the fixed counters
+        """
+        if not shared_cache():
+            return {}
+        if user_ids is None:
+            user_ids = User.objects.filter(is_active=True).values_list('pk', flat=True)
+        user_ids = list(user_ids)
+
+        actual = dict(
+            Notification.objects.filter(
+                user_id__in=user_ids,
+                is_read=False
+            ).values('user_id').annotate(
+                unread=Count('id')
+            ).order_by().values_list('user_id', 'unread')
+        )
+        cached = cache.get_many([UnreadCounter.key(user_id) for user_id in user_ids])
+
+        drifted = {}
+        for user_id in user_ids:
+            key = UnreadCounter.key(user_id)
+            if key in cached and cached[key] != actual.get(user_id, 0):
+                drifted[user_id] = (cached[key], actual.get(user_id, 0))
+
+        cache.set_many(
+            {UnreadCounter.key(user_id): counts[1] for user_id, counts in drifted.items()},
+            UnreadCounter.TIMEOUT
+        )
+        return drifted
+
+
+def notification_saved(sender, instance, created, **kwargs):
+    if created:
+        if not instance.is_read:
+            UnreadCounter.adjust({instance.user_id: 1})
+    elif instance.loaded_is_read is None:
+        # Read state before the save is unknown
+        UnreadCounter.invalidate(instance.user_id)
+    elif instance.loaded_is_read != instance.is_read:
+        UnreadCounter.adjust({instance.user_id: -1 if instance.is_read else 1})
+    instance.loaded_is_read = instance.is_read
+
+
+def connect_signals():
+    post_save.connect(notification_saved, sender=Notification, dispatch_uid='notification-unread-save')
@@ -14,11 +14,18 @@ urlpatterns = [
     # Dashboard
     path('', views.dashboard, name='dashboard'),
 
+    # Global search
+    path('search/', views.global_search, name='global_search'),
+
+    # Operations
+    path('ops/perf/', views.ops_perf, name='ops_perf'),
+
     # Notification URLs
     path('notifications/', views.notification_list, name='notification_list'),
     path('notifications/<int:pk>/read/', views.notification_mark_as_read, name='notification_mark_as_read'),
     path('notifications/mark-all-read/', views.notification_mark_all_as_read, name='notification_mark_all_as_read'),
     path('notifications/<int:pk>/delete/', views.notification_delete, name='notification_delete'),
+    path('notifications/bulk/', views.notification_bulk_action, name='notification_bulk_action'),
 
     # AJAX endpoints
     path('api/notifications/count/', views.notification_unread_count, name='notification_unread_count'),
@@ -1,17 +1,24 @@
 """
 Views for Core app - Notifications & Dashboard
 """
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from django.http import JsonResponse
+from django.views.decorators.http import condition
 from django.core.paginator import Paginator
 from django.db.models import Q
 from django.utils import timezone
 from datetime import timedelta
+from .middleware import session_save_exempt
 from .models import Notification
+from .profiling import RequestProfileStore, shared_cache
+from .search import SEARCH_ENTITIES, GlobalSearchService
 from .services import NotificationService
+from .statistics import DashboardStatisticsService
 
 
 def login_view(request):
@@ -46,115 +53,27 @@ def dashboard(request):
     """
     Modern Professional Dashboard with Real Data
     """
-    from apps.properties.models import Property
-    from apps.contracts.models import Contract, ContractPayment
+    from apps.contracts.models import Contract
     from apps.maintenance.models import MaintenanceRequest
-    from apps.sales.models import SalesContract, PropertyReservation, SalesPayment
-    from apps.clients.models import Client
-    from apps.owners.models import Owner
     from apps.financial.models import Payment, Invoice
-    from django.db.models import Count, Sum, Q, Avg
-    from decimal import Decimal
     import json
     
-    # Date ranges
     today = timezone.now().date()
-    first_day_month = today.replace(day=1)
-    last_30_days = today - timedelta(days=30)
-    last_7_days = today - timedelta(days=7)
-    
-    # ============ PROPERTIES STATISTICS ============
-    properties_qs = Property.objects.all()
-    total_properties = properties_qs.count()
-    available_properties = properties_qs.filter(status='available').count()
-    rented_properties = properties_qs.filter(status='rented').count()
-    under_maintenance = properties_qs.filter(status='maintenance').count()
-    sold_properties = properties_qs.filter(is_for_sale=True).count()
-    
-    # Properties by type
-    property_types_data = properties_qs.values('property_type__name').annotate(
-        count=Count('id')
-    ).order_by('-count')[:6]
-    
-    # Properties by city
-    properties_by_city = properties_qs.values('city').annotate(
-        count=Count('id')
-    ).order_by('-count')[:5]
-    
-    # ============ CONTRACTS STATISTICS ============
-    contracts_qs = Contract.objects.all()
-    total_contracts = contracts_qs.count()
-    active_contracts = contracts_qs.filter(status='active').count()
-    expired_contracts = contracts_qs.filter(status='expired').count()
-    expiring_soon = contracts_qs.filter(
-        status='active',
-        end_date__lte=today + timedelta(days=30),
-        end_date__gte=today
-    ).count()
-    
-    # Contracts created this month
-    new_contracts_month = contracts_qs.filter(
-        created_at__gte=first_day_month
-    ).count()
-    
-    # ============ FINANCIAL STATISTICS ============
-    # Payments this month (all payments with invoices)
-    payments_month = Payment.objects.filter(
-        payment_date__gte=first_day_month,
-        invoice__isnull=False
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
-    
-    # Total revenue (all time)
-    total_revenue = Payment.objects.filter(
-        invoice__isnull=False
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
-    
-    # Invoices pending payment
-    pending_invoices = Invoice.objects.filter(
-        status='issued'
-    ).aggregate(total=Sum('total_amount'))['total'] or Decimal('0')
-    
-    # Sales revenue (using contract payments)
-    sales_revenue = SalesPayment.objects.filter(
-        status='completed'
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
-    
-    # ============ MAINTENANCE STATISTICS ============
-    maintenance_qs = MaintenanceRequest.objects.all()
-    total_maintenance = maintenance_qs.count()
-    pending_maintenance = maintenance_qs.filter(status='pending').count()
-    in_progress_maintenance = maintenance_qs.filter(status='in_progress').count()
-    completed_maintenance = maintenance_qs.filter(status='completed').count()
-    urgent_maintenance = maintenance_qs.filter(priority='urgent', status__in=['pending', 'in_progress']).count()
-    
-    # Maintenance costs this month
-    maintenance_costs = maintenance_qs.filter(
-        request_date__gte=first_day_month,
-        estimated_cost__isnull=False
-    ).aggregate(total=Sum('estimated_cost'))['total'] or Decimal('0')
-    
-    # ============ CLIENTS & OWNERS ============
-    total_clients = Client.objects.filter(is_active=True).count()
-    total_owners = Owner.objects.filter(is_active=True).count()
-    new_clients_month = Client.objects.filter(created_at__gte=first_day_month).count()
-    
-    # ============ SALES STATISTICS ============
-    sales_qs = SalesContract.objects.all()
-    total_sales = sales_qs.count()
-    active_sales = sales_qs.filter(status='active').count()
-    completed_sales = sales_qs.filter(status='completed').count()
-    
-    reservations_qs = PropertyReservation.objects.all()
-    pending_reservations = reservations_qs.filter(status='pending').count()
-    approved_reservations = reservations_qs.filter(status='approved').count()
+    snapshot = DashboardStatisticsService.get_cached_snapshot(today)
+    properties = snapshot.properties
+    contracts = snapshot.contracts
+    financial = snapshot.financial
+    maintenance = snapshot.maintenance
+    people = snapshot.people
+    sales = snapshot.sales
     
     # ============ RECENT ACTIVITIES ============
-    recent_contracts = contracts_qs.select_related('property', 'client').order_by('-created_at')[:6]
-    recent_maintenance = maintenance_qs.select_related('property').order_by('-request_date')[:6]
+    recent_contracts = Contract.objects.select_related('property', 'client').order_by('-created_at')[:6]
+    recent_maintenance = MaintenanceRequest.objects.select_related('property').order_by('-request_date')[:6]
     recent_payments = Payment.objects.select_related('invoice').order_by('-payment_date')[:6]
     
     # ============ ALERTS & WARNINGS ============
-    contracts_expiring_7days = contracts_qs.filter(
+    contracts_expiring_7days = Contract.objects.filter(
         status='active',
         end_date__lte=today + timedelta(days=7),
         end_date__gte=today
@@ -166,97 +85,44 @@ def dashboard(request):
         invoice_date__lt=today - timedelta(days=30)
     )[:5]
     
-    # ============ CHART DATA ============
-    # Properties by Type (Pie Chart)
-    chart_property_types_labels = [item['property_type__name'] or 'Other' for item in property_types_data]
-    chart_property_types_data = [item['count'] for item in property_types_data]
-    
-    # Properties by City (Bar Chart)
-    chart_cities_labels = [item['city'] or 'Unknown' for item in properties_by_city]
-    chart_cities_data = [item['count'] for item in properties_by_city]
-    
-    # Contracts Status (Doughnut Chart)
-    chart_contracts_labels = ['Active', 'Expired', 'Terminated']
-    chart_contracts_data = [
-        active_contracts,
-        expired_contracts,
-        contracts_qs.filter(status='terminated').count()
-    ]
-    
-    # Monthly Revenue Trend (Line Chart - Last 6 months)
-    revenue_trend_labels = []
-    revenue_trend_data = []
-    for i in range(5, -1, -1):
-        month_start = (today.replace(day=1) - timedelta(days=i*30)).replace(day=1)
-        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        month_revenue = Payment.objects.filter(
-            payment_date__gte=month_start,
-            payment_date__lte=month_end,
-            invoice__isnull=False
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        revenue_trend_labels.append(month_start.strftime('%b %Y'))
-        revenue_trend_data.append(float(month_revenue))
-    
-    # ============ PERFORMANCE METRICS ============
-    occupancy_rate = (rented_properties / total_properties * 100) if total_properties > 0 else 0
-    
-    # Calculate average contract duration (in months) from start_date and end_date
-    from django.db.models import F, ExpressionWrapper, fields
-    active_contracts_with_duration = contracts_qs.filter(
-        status='active',
-        start_date__isnull=False,
-        end_date__isnull=False
-    )
-    
-    if active_contracts_with_duration.exists():
-        # Calculate duration for each contract and average
-        durations = []
-        for contract in active_contracts_with_duration:
-            duration_days = (contract.end_date - contract.start_date).days
-            duration_months = duration_days / 30.0  # Approximate months
-            durations.append(duration_months)
-        avg_contract_duration = sum(durations) / len(durations) if durations else 0
-    else:
-        avg_contract_duration = 0
-    
     context = {
         # Main Statistics
-        'total_properties': total_properties,
-        'available_properties': available_properties,
-        'rented_properties': rented_properties,
-        'under_maintenance': under_maintenance,
-        'sold_properties': sold_properties,
-        'occupancy_rate': round(occupancy_rate, 1),
+        'total_properties': properties.total,
+        'available_properties': properties.available,
+        'rented_properties': properties.rented,
+        'under_maintenance': properties.under_maintenance,
+        'sold_properties': properties.for_sale,
+        'occupancy_rate': round(properties.occupancy_rate, 1),
         
-        'total_contracts': total_contracts,
-        'active_contracts': active_contracts,
-        'expired_contracts': expired_contracts,
-        'expiring_soon': expiring_soon,
-        'new_contracts_month': new_contracts_month,
-        'avg_contract_duration': round(avg_contract_duration or 0, 1),
+        'total_contracts': contracts.total,
+        'active_contracts': contracts.active,
+        'expired_contracts': contracts.expired,
+        'expiring_soon': contracts.expiring_soon,
+        'new_contracts_month': contracts.new_this_month,
+        'avg_contract_duration': round(contracts.avg_duration_months or 0, 1),
         
-        'total_maintenance': total_maintenance,
-        'pending_maintenance': pending_maintenance,
-        'in_progress_maintenance': in_progress_maintenance,
-        'completed_maintenance': completed_maintenance,
-        'urgent_maintenance': urgent_maintenance,
-        'maintenance_costs': maintenance_costs,
+        'total_maintenance': maintenance.total,
+        'pending_maintenance': maintenance.pending,
+        'in_progress_maintenance': maintenance.in_progress,
+        'completed_maintenance': maintenance.completed,
+        'urgent_maintenance': maintenance.urgent,
+        'maintenance_costs': maintenance.costs_month,
         
-        'total_clients': total_clients,
-        'total_owners': total_owners,
-        'new_clients_month': new_clients_month,
+        'total_clients': people.total_clients,
+        'total_owners': people.total_owners,
+        'new_clients_month': people.new_clients_month,
         
-        'total_sales': total_sales,
-        'active_sales': active_sales,
-        'completed_sales': completed_sales,
-        'pending_reservations': pending_reservations,
-        'approved_reservations': approved_reservations,
+        'total_sales': sales.total,
+        'active_sales': sales.active,
+        'completed_sales': sales.completed,
+        'pending_reservations': sales.pending_reservations,
+        'approved_reservations': sales.approved_reservations,
         
         # Financial
-        'total_revenue': total_revenue,
-        'payments_month': payments_month,
-        'pending_payments': pending_invoices,
-        'sales_revenue': sales_revenue,
+        'total_revenue': financial.total_revenue,
+        'payments_month': financial.payments_month,
+        'pending_payments': financial.pending_invoices,
+        'sales_revenue': financial.sales_revenue,
         
         # Recent Activities
         'recent_contracts': recent_contracts,
@@ -268,22 +134,81 @@ def dashboard(request):
         'overdue_invoices': overdue_invoices,
         
         # Notifications
-        'unread_notifications': Notification.objects.filter(user=request.user, is_read=False).count(),
+        'unread_notifications': NotificationService.get_unread_count(request.user),
         
         # Chart Data (JSON)
-        'chart_property_types_labels': json.dumps(chart_property_types_labels),
-        'chart_property_types_data': json.dumps(chart_property_types_data),
-        'chart_cities_labels': json.dumps(chart_cities_labels),
-        'chart_cities_data': json.dumps(chart_cities_data),
-        'chart_contracts_labels': json.dumps(chart_contracts_labels),
-        'chart_contracts_data': json.dumps(chart_contracts_data),
-        'revenue_trend_labels': json.dumps(revenue_trend_labels),
-        'revenue_trend_data': json.dumps(revenue_trend_data),
+        'chart_property_types_labels': json.dumps([label for label, _ in properties.by_type]),
+        'chart_property_types_data': json.dumps([count for _, count in properties.by_type]),
+        'chart_cities_labels': json.dumps([label for label, _ in properties.by_city]),
+        'chart_cities_data': json.dumps([count for _, count in properties.by_city]),
+        'chart_contracts_labels': json.dumps(['Active', 'Expired', 'Terminated']),
+        'chart_contracts_data': json.dumps([contracts.active, contracts.expired, contracts.terminated]),
+        'revenue_trend_labels': json.dumps([label for label, _ in financial.revenue_trend]),
+        'revenue_trend_data': json.dumps([total for _, total in financial.revenue_trend]),
     }
     
     return render(request, 'dashboard.html', context)
 
 
+@login_required
+def global_search(request):
+    """
+    Search properties, clients, owners, buyers, contracts and maintenance
+    requests at once. `type` (repeatable) limits the entities, `limit` the
+    results per entity. JSON for AJAX / ?format=json, a results page otherwise.
+    """
+    query = request.GET.get('q', '').strip()
+    entities = [name for name in request.GET.getlist('type') if name in SEARCH_ENTITIES] or None
+    try:
+        limit = min(max(int(request.GET.get('limit', 5)), 1), 50)
+    except ValueError:
+        limit = 5
+
+    response = GlobalSearchService.search(query, entities=entities, limit=limit)
+
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.GET.get('format') == 'json':
+        return JsonResponse(response)
+
+    groups = {}
+    for result in response['results']:
+        groups.setdefault(result['label'], []).append(result)
+
+    context = {
+        'search_query': query,
+        'groups': groups,
+        'took_ms': response['took_ms'],
+        'partial': response['partial'],
+        'skipped': response['skipped'],
+    }
+    return render(request, 'core/search.html', context)
+
+
+@staff_member_required
+def ops_perf(request):
+    """
+    Per-view SQL statistics of the profiled requests over the rolling
+    window (?format=json to export), POST clears them
+    """
+    if request.method == 'POST':
+        RequestProfileStore.clear()
+        messages.success(request, 'Profiling statistics cleared.')
+        return redirect('core:ops_perf')
+
+    summary = RequestProfileStore.summary()
+    if request.GET.get('format') == 'json':
+        response = JsonResponse(summary)
+        response['Content-Disposition'] = f'attachment; filename="perf-{timezone.now():%Y%m%d-%H%M}.json"'
+        return response
+
+    context = {
+        'summary': summary,
+        'profiling_enabled': settings.PERF_PROFILING_ENABLED,
+        'sample_percent': settings.PERF_PROFILING_SAMPLE_PERCENT,
+        'shared_cache': shared_cache(),
+    }
+    return render(request, 'core/ops/perf.html', context)
+
+
 @login_required
 def notification_list(request):
     """
@@ -293,17 +218,12 @@ def notification_list(request):
     filter_type = request.GET.get('type', 'all')
     filter_status = request.GET.get('status', 'all')
     
-    # Base queryset
-    notifications = Notification.objects.filter(user=request.user)
-    
-    # Apply filters
-    if filter_type != 'all':
-        notifications = notifications.filter(notification_type=filter_type)
-    
-    if filter_status == 'unread':
-        notifications = notifications.filter(is_read=False)
-    elif filter_status == 'read':
-        notifications = notifications.filter(is_read=True)
+    # Base queryset with filters applied
+    notifications = NotificationService.filter_notifications(
+        request.user,
+        notification_type=filter_type if filter_type != 'all' else None,
+        status=filter_status
+    )
     
     # Order by date
     notifications = notifications.order_by('-created_at')
@@ -312,9 +232,12 @@ def notification_list(request):
     paginator = Paginator(notifications, 20)
     page_obj = paginator.get_page(request.GET.get('page'))
     
-    # Get statistics
-    total_count = Notification.objects.filter(user=request.user).count()
-    unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
+    # Get statistics, the unread count comes from the counter cache
+    if filter_type == 'all' and filter_status == 'all':
+        total_count = paginator.count
+    else:
+        total_count = NotificationService.filter_notifications(request.user).count()
+    unread_count = NotificationService.get_unread_count(request.user)
     read_count = total_count - unread_count
     
     context = {
@@ -325,6 +248,7 @@ def notification_list(request):
         'filter_type': filter_type,
         'filter_status': filter_status,
         'notification_types': Notification.NOTIFICATION_TYPES,
+        'priority_levels': Notification.PRIORITY_LEVELS,
     }
     return render(request, 'core/notifications/list.html', context)
 
@@ -366,6 +290,63 @@ def notification_mark_all_as_read(request):
     return redirect('core:notification_list')
 
 
+@login_required
+def notification_bulk_action(request):
+    """
+    Mark as read, archive or delete the current user's notifications that
+    match a type / priority / status / age filter, with one statement
+    """
+    if request.method != 'POST':
+        return redirect('core:notification_list')
+    
+    actions = {
+        'read': (NotificationService.bulk_mark_as_read, 'marked as read'),
+        'archive': (NotificationService.bulk_archive, 'archived'),
+        'delete': (NotificationService.bulk_delete, 'deleted'),
+    }
+    action = request.POST.get('action')
+    if action not in actions:
+        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return JsonResponse({'success': False, 'error': 'Unknown action'}, status=400)
+        messages.error(request, 'Unknown bulk action.')
+        return redirect('core:notification_list')
+    
+    older_than = None
+    try:
+        older_than_days = int(request.POST.get('older_than_days') or 0)
+    except ValueError:
+        older_than_days = 0
+    if older_than_days > 0:
+        older_than = timezone.now() - timedelta(days=older_than_days)
+    
+    filter_type = request.POST.get('type', 'all')
+    filter_priority = request.POST.get('priority', 'all')
+    notifications = NotificationService.filter_notifications(
+        request.user,
+        notification_type=filter_type if filter_type != 'all' else None,
+        priority=filter_priority if filter_priority != 'all' else None,
+        older_than=older_than,
+        status=request.POST.get('status', 'all')
+    )
+    if 'ids' in request.POST:
+        ids = [pk for pk in request.POST.getlist('ids') if pk.isdigit()]
+        notifications = notifications.filter(pk__in=ids)
+    
+    handler, verb = actions[action]
+    count = handler(notifications)
+    
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return JsonResponse({
+            'success': True,
+            'action': action,
+            'count': count,
+            'unread_count': NotificationService.get_unread_count(request.user)
+        })
+    
+    messages.success(request, f'{count} notifications {verb}.')
+    return redirect('core:notification_list')
+
+
 @login_required
 def notification_delete(request, pk):
     """
@@ -374,7 +355,7 @@ def notification_delete(request, pk):
     notification = get_object_or_404(Notification, pk=pk, user=request.user)
     
     if request.method == 'POST':
-        notification.delete()
+        NotificationService.bulk_delete(Notification.objects.filter(pk=notification.pk))
         
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
@@ -387,15 +368,27 @@ def notification_delete(request, pk):
     return redirect('core:notification_list')
 
 
+def unread_count_etag(request):
+    if request.user.is_authenticated:
+        return f'unread-{request.user.pk}-{NotificationService.get_unread_count(request.user)}'
+    return None
+
+
 @login_required
+@session_save_exempt
+@condition(etag_func=unread_count_etag)
 def notification_unread_count(request):
     """
     Get unread notification count (AJAX endpoint)
+    Polled by every open page: the count comes from the unread counter cache,
+    an unchanged count is answered with 304 and the session is not saved
     """
     count = NotificationService.get_unread_count(request.user)
-    return JsonResponse({
+    response = JsonResponse({
         'count': count
     })
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 @login_required
@@ -3,7 +3,7 @@ Admin configuration for Financial app
 """
 from django.contrib import admin
 from .models import (
-    Account, FinancialPeriod, JournalEntry, JournalEntryLine,
+    Account, AccountBalance, FinancialPeriod, JournalEntry, JournalEntryLine,
     Invoice, InvoiceItem, Payment, Budget
 )
 
@@ -45,6 +45,18 @@ class AccountAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(AccountBalance)
+class AccountBalanceAdmin(admin.ModelAdmin):
+    list_display = ['account', 'month', 'debit_total', 'credit_total', 'updated_at']
+    list_filter = ['account__account_type', 'month']
+    search_fields = ['account__code', 'account__name']
+    list_select_related = ['account']
+    readonly_fields = ['account', 'month', 'debit_total', 'credit_total', 'updated_at']
+    
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(FinancialPeriod)
 class FinancialPeriodAdmin(admin.ModelAdmin):
     list_display = ['name', 'start_date', 'end_date', 'is_closed']
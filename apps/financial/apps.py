@@ -5,3 +5,9 @@ class FinancialConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.financial'
     verbose_name = 'Financial Management'
+
+    def ready(self):
+        """Connect the account balance and account tree signals"""
+        from apps.financial import balances, tree
+        balances.connect_signals()
+        tree.connect_signals()
@@ -0,0 +1,214 @@
+"""
+Ledger Balance Service for Origin App
+Maintains AccountBalance (posted debit/credit totals per account and month) so
+balance reads don't have to re-aggregate every JournalEntryLine.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .models import AccountBalance, JournalEntry, JournalEntryLine
+
+
+def month_of(day):
+    return day.replace(day=1)
+
+
+class LedgerBalanceService:
+    """
+    Service class for the per-account running balances
+    """
+
+    @staticmethod
+    def _posted_totals(lines):
+        """Group posted lines by (account, month) -> (debits, credits)"""
+        rows = lines.filter(
+            journal_entry__is_posted=True
+        ).annotate(
+            month=TruncMonth('journal_entry__entry_date')
+        ).values('account_id', 'month').annotate(
+            debits=Sum('debit_amount'),
+            credits=Sum('credit_amount')
+        ).order_by()
+
+        return {
+            (row['account_id'], row['month']): (row['debits'] or Decimal('0.00'), row['credits'] or Decimal('0.00'))
+            for row in rows
+        }
+
+    @staticmethod
+    def apply_entry(entry):
+        """
+        Add the lines of a freshly posted entry to the balances of its month.
+        Must run inside the transaction that posts the entry.
+        """
+        month = month_of(entry.entry_date)
+        totals = entry.lines.values('account_id').annotate(
+            debits=Sum('debit_amount'),
+            credits=Sum('credit_amount')
+        ).order_by()
+
+        AccountBalance.objects.bulk_create(
+            [AccountBalance(account_id=row['account_id'], month=month) for row in totals],
+            ignore_conflicts=True
+        )
+        for row in totals:
+            AccountBalance.objects.filter(
+                account_id=row['account_id'],
+                month=month
+            ).update(
+                debit_total=F('debit_total') + (row['debits'] or 0),
+                credit_total=F('credit_total') + (row['credits'] or 0)
+            )
+
+    @staticmethod
+    def refresh(pairs):
+        """
+        Recompute the balances of the given (account_id, month) pairs from
+        the posted lines
+        """
+        pairs = {(account_id, month_of(month)) for account_id, month in pairs}
+        if not pairs:
+            return
+
+        months = {month for _, month in pairs}
+        lines = JournalEntryLine.objects.filter(
+            account_id__in={account_id for account_id, _ in pairs},
+            journal_entry__entry_date__gte=min(months),
+            journal_entry__entry_date__lt=(max(months) + timedelta(days=32)).replace(day=1),
+        )
+        totals = LedgerBalanceService._posted_totals(lines)
+
+        with transaction.atomic():
+            for account_id, month in pairs:
+                debits, credits = totals.get((account_id, month), (Decimal('0.00'), Decimal('0.00')))
+                AccountBalance.objects.update_or_create(
+                    account_id=account_id,
+                    month=month,
+                    defaults={'debit_total': debits, 'credit_total': credits}
+                )
+
+    @staticmethod
+    def rebuild():
+        """Recompute every balance from scratch, returns the number of rows"""
+        totals = LedgerBalanceService._posted_totals(JournalEntryLine.objects.all())
+
+        with transaction.atomic():
+            AccountBalance.objects.all().delete()
+            AccountBalance.objects.bulk_create([
+                AccountBalance(account_id=account_id, month=month, debit_total=debits, credit_total=credits)
+                for (account_id, month), (debits, credits) in totals.items()
+            ], batch_size=500)
+
+        return len(totals)
+
+    @staticmethod
+    def verify():
+        """
+        Compare the stored balances with the raw lines, returns a list of
+        (account_id, month, expected, stored) for every mismatch
+        """
+        expected = LedgerBalanceService._posted_totals(JournalEntryLine.objects.all())
+        stored = {
+            (row.account_id, row.month): (row.debit_total, row.credit_total)
+            for row in AccountBalance.objects.all()
+        }
+
+        zero = (Decimal('0.00'), Decimal('0.00'))
+        mismatches = []
+        for key in sorted(set(expected) | set(stored)):
+            if expected.get(key, zero) != stored.get(key, zero):
+                mismatches.append((key[0], key[1], expected.get(key, zero), stored.get(key, zero)))
+        return mismatches
+
+    @staticmethod
+    def get_balances(accounts=None):
+        """
+        Return {account_id: (debits, credits)} for the given accounts (all
+        accounts if omitted) in one query
+        """
+        balances = AccountBalance.objects.all()
+        if accounts is not None:
+            balances = balances.filter(account__in=accounts)
+
+        rows = balances.values('account_id').annotate(
+            debits=Sum('debit_total'),
+            credits=Sum('credit_total')
+        ).order_by()
+
+        return {row['account_id']: (row['debits'], row['credits']) for row in rows}
+
+
+# ===================================================================
+# SIGNALS
+# Keep balances right when posted entries are written outside post()
+# (automated entries created already posted, admin edits, deletions)
+# ===================================================================
+
+def remember_line_state(sender, instance, **kwargs):
+    instance._balance_previous = None
+    if instance.pk:
+        instance._balance_previous = JournalEntryLine.objects.filter(
+            pk=instance.pk
+        ).values_list('account_id', 'journal_entry__entry_date', 'journal_entry__is_posted').first()
+
+
+def line_changed(sender, instance, **kwargs):
+    pairs = set()
+
+    previous = getattr(instance, '_balance_previous', None)
+    if previous and previous[2]:
+        pairs.add((previous[0], previous[1]))
+
+    try:
+        entry = instance.journal_entry
+    except JournalEntry.DoesNotExist:
+        entry = None
+    if entry is not None and entry.is_posted:
+        pairs.add((instance.account_id, entry.entry_date))
+
+    LedgerBalanceService.refresh(pairs)
+
+
+def remember_entry_state(sender, instance, **kwargs):
+    instance._balance_previous = None
+    if instance.pk:
+        instance._balance_previous = JournalEntry.objects.filter(
+            pk=instance.pk
+        ).values_list('is_posted', 'entry_date').first()
+
+
+def entry_changed(sender, instance, created, **kwargs):
+    # post() already applied its lines
+    if getattr(instance, '_balances_applied', False):
+        instance._balances_applied = False
+        return
+
+    previous = getattr(instance, '_balance_previous', None)
+    if created or not previous:
+        return
+
+    was_posted, previous_date = previous
+    if (was_posted, previous_date) == (instance.is_posted, instance.entry_date):
+        return
+
+    dates = []
+    if was_posted:
+        dates.append(previous_date)
+    if instance.is_posted:
+        dates.append(instance.entry_date)
+
+    account_ids = set(instance.lines.values_list('account_id', flat=True))
+    LedgerBalanceService.refresh({(account_id, day) for account_id in account_ids for day in dates})
+
+
+def connect_signals():
+    pre_save.connect(remember_line_state, sender=JournalEntryLine, dispatch_uid='balance-line-pre-save')
+    post_save.connect(line_changed, sender=JournalEntryLine, dispatch_uid='balance-line-save')
+    post_delete.connect(line_changed, sender=JournalEntryLine, dispatch_uid='balance-line-delete')
+    pre_save.connect(remember_entry_state, sender=JournalEntry, dispatch_uid='balance-entry-pre-save')
+    post_save.connect(entry_changed, sender=JournalEntry, dispatch_uid='balance-entry-save')
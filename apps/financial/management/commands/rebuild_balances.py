@@ -0,0 +1,35 @@
+"""
+Management command to rebuild the account balances from the journal entry lines
+Usage: python manage.py rebuild_balances [--verify-only]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.financial.balances import LedgerBalanceService
+
+
+class Command(BaseCommand):
+    help = 'Recompute AccountBalance from posted journal entry lines and verify it'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify-only',
+            action='store_true',
+            help='Only compare the stored balances with the journal entry lines',
+        )
+
+    def handle(self, *args, **options):
+        if not options['verify_only']:
+            rows = LedgerBalanceService.rebuild()
+            self.stdout.write(f'Rebuilt {rows} account balance rows')
+
+        mismatches = LedgerBalanceService.verify()
+        for account_id, month, expected, stored in mismatches:
+            self.stdout.write(self.style.ERROR(
+                f'Account {account_id} {month:%Y-%m}: expected debit/credit {expected[0]}/{expected[1]}, '
+                f'stored {stored[0]}/{stored[1]}'
+            ))
+
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} account balance rows do not match the journal entry lines')
+
+        self.stdout.write(self.style.SUCCESS('✓ Account balances match the journal entry lines'))
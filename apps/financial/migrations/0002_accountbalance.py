@@ -0,0 +1,59 @@
+# Generated by Django 5.0 on 2026-10-18 06:44
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+
+def build_balances(apps, schema_editor):
+    AccountBalance = apps.get_model('financial', 'AccountBalance')
+    JournalEntryLine = apps.get_model('financial', 'JournalEntryLine')
+
+    rows = JournalEntryLine.objects.filter(
+        journal_entry__is_posted=True
+    ).annotate(
+        month=TruncMonth('journal_entry__entry_date')
+    ).values('account_id', 'month').annotate(
+        debits=Sum('debit_amount'),
+        credits=Sum('credit_amount')
+    ).order_by()
+
+    AccountBalance.objects.bulk_create([
+        AccountBalance(
+            account_id=row['account_id'],
+            month=row['month'],
+            debit_total=row['debits'] or Decimal('0.00'),
+            credit_total=row['credits'] or Decimal('0.00'),
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month', verbose_name='Month')),
+                ('debit_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Debit Total')),
+                ('credit_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Credit Total')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='financial.account', verbose_name='Account')),
+            ],
+            options={
+                'verbose_name': 'Account Balance',
+                'verbose_name_plural': 'Account Balances',
+                'ordering': ['account', 'month'],
+                'unique_together': {('account', 'month')},
+            },
+        ),
+        migrations.RunPython(build_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0 on 2026-10-18 06:46
+
+from django.db import migrations, models
+
+
+def build_paths(apps, schema_editor):
+    Account = apps.get_model('financial', 'Account')
+    accounts = {account.id: account for account in Account.objects.all()}
+
+    def build(account, seen=()):
+        parent = accounts.get(account.parent_id)
+        if parent is None or parent.id in seen:
+            return f"{account.code}/", 0
+        path, depth = build(parent, seen + (account.id,))
+        return f"{path}{account.code}/", depth + 1
+
+    for account in accounts.values():
+        account.path, account.depth = build(account)
+    Account.objects.bulk_update(accounts.values(), ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial', '0002_accountbalance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Tree Depth'),
+        ),
+        migrations.AddField(
+            model_name='account',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255, verbose_name='Tree Path'),
+        ),
+        migrations.RunPython(build_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0 on 2026-10-18 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial', '0003_account_path'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['status', 'due_date'], name='financial_i_status_60b48d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['status', 'invoice_date'], name='financial_i_status_2a9c00_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalentryline',
+            index=models.Index(fields=['account', 'journal_entry'], name='financial_j_account_4e56b0_idx'),
+        ),
+    ]
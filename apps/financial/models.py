@@ -5,6 +5,7 @@ Implementing complete accounting system with Chart of Accounts.
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils.translation import gettext_lazy as _
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from decimal import Decimal
@@ -46,6 +47,9 @@ class Account(models.Model):
         related_name='children',
         verbose_name=_('Parent Account')
     )
+    # Materialized path of account codes from the root (e.g. "1000/1100/1110/")
+    path = models.CharField(_('Tree Path'), max_length=255, blank=True, editable=False, db_index=True)
+    depth = models.PositiveSmallIntegerField(_('Tree Depth'), default=0, editable=False)
     description = models.TextField(_('Description'), blank=True)
     is_active = models.BooleanField(_('Active'), default=True)
     is_system = models.BooleanField(
@@ -80,22 +84,68 @@ class Account(models.Model):
             models.Index(fields=['account_type']),
         ]
     
+    PATH_SEPARATOR = '/'
+    
     def __str__(self):
         return f"{self.code} - {self.name}"
     
+    def clean(self):
+        super().clean()
+        if self.parent_id and self.pk:
+            old_path = self._stored_path()[0]
+            if self.parent_id == self.pk or (old_path and self.parent.path.startswith(old_path)):
+                raise ValidationError({'parent': _('An account cannot be placed under itself or one of its sub-accounts.')})
+    
+    def _stored_path(self):
+        """(path, depth) currently saved in the database"""
+        if not self.pk:
+            return '', 0
+        return Account.objects.filter(pk=self.pk).values_list('path', 'depth').first() or ('', 0)
+    
+    def build_path(self):
+        """Materialized path and depth from the parent account"""
+        if self.parent_id:
+            parent = self.parent
+            return f"{parent.path}{self.code}{self.PATH_SEPARATOR}", parent.depth + 1
+        return f"{self.code}{self.PATH_SEPARATOR}", 0
+    
+    def save(self, *args, **kwargs):
+        old_path, old_depth = self._stored_path()
+        self.path, self.depth = self.build_path()
+        if old_path and self.path.startswith(old_path) and self.path != old_path:
+            raise ValueError(f'Account {self.code} cannot be moved under its own sub-account')
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'path', 'depth'}
+        super().save(*args, **kwargs)
+        
+        # Code or parent changed: move the whole subtree along
+        if old_path and old_path != self.path:
+            from .tree import AccountTree
+            AccountTree.move_subtree(old_path, self.path, self.depth - old_depth)
+    
+    def get_ancestors(self):
+        """Parent, grandparent, ... up to the root, read in one query"""
+        codes = self.path.split(self.PATH_SEPARATOR)[:-2]
+        if not codes:
+            return []
+        return list(Account.objects.filter(code__in=codes).order_by('-depth'))
+    
     def get_balance(self):
         """Calculate current account balance"""
-        from django.db.models import Sum, Q
+        from django.db.models import Sum
         
-        # Get all journal entry lines for this account
-        lines = JournalEntryLine.objects.filter(
-            account=self,
-            journal_entry__is_posted=True
+        # Read the maintained monthly totals instead of every posted line
+        totals = self.balances.aggregate(
+            debits=Sum('debit_total'),
+            credits=Sum('credit_total')
         )
         
-        debits = lines.aggregate(total=Sum('debit_amount'))['total'] or 0
-        credits = lines.aggregate(total=Sum('credit_amount'))['total'] or 0
-        
+        return self.signed_balance(totals['debits'] or 0, totals['credits'] or 0)
+    
+    def signed_balance(self, debits, credits):
+        """Turn debit/credit totals into a balance on the account's normal side"""
         if self.account_type in [AccountType.ASSET, AccountType.EXPENSE]:
             return Decimal(debits) - Decimal(credits)
         else:  # LIABILITY, EQUITY, REVENUE
@@ -103,9 +153,13 @@ class Account(models.Model):
     
     def get_full_path(self):
         """Get full account path (e.g., Assets > Current Assets > Cash)"""
-        if self.parent:
-            return f"{self.parent.get_full_path()} > {self.name}"
-        return self.name
+        # Accounts loaded through AccountTree already know their ancestors
+        tree_parent = getattr(self, 'tree_parent', False)
+        if tree_parent is not False:
+            return f"{tree_parent.get_full_path()} > {self.name}" if tree_parent else self.name
+        
+        names = [account.name for account in reversed(self.get_ancestors())]
+        return ' > '.join(names + [self.name])
 
 
 class FinancialPeriod(models.Model):
@@ -217,12 +271,18 @@ class JournalEntry(models.Model):
         return self.get_total_debit() == self.get_total_credit()
     
     def post(self):
-        """Post the journal entry"""
+        """Post the journal entry and add its lines to the account balances"""
         if self.is_balanced() and not self.is_posted:
+            from django.db import transaction
             from django.utils import timezone
-            self.is_posted = True
-            self.posted_at = timezone.now()
-            self.save()
+            from .balances import LedgerBalanceService
+            
+            with transaction.atomic():
+                self.is_posted = True
+                self.posted_at = timezone.now()
+                self._balances_applied = True
+                self.save()
+                LedgerBalanceService.apply_entry(self)
             return True
         return False
 
@@ -261,11 +321,54 @@ class JournalEntryLine(models.Model):
     class Meta:
         verbose_name = _('Journal Entry Line')
         verbose_name_plural = _('Journal Entry Lines')
+        indexes = [
+            models.Index(fields=['account', 'journal_entry']),
+        ]
     
     def __str__(self):
         return f"{self.journal_entry.entry_number} - {self.account.name}"
 
 
+class AccountBalance(models.Model):
+    """
+    Account Balance - رصيد الحساب الشهري
+    Debit/credit totals of posted journal entry lines per account and month,
+    maintained by apps.financial.balances
+    """
+    account = models.ForeignKey(
+        Account,
+        on_delete=models.CASCADE,
+        related_name='balances',
+        verbose_name=_('Account')
+    )
+    month = models.DateField(
+        _('Month'),
+        help_text=_('First day of the month')
+    )
+    debit_total = models.DecimalField(
+        _('Debit Total'),
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    credit_total = models.DecimalField(
+        _('Credit Total'),
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
+    
+    class Meta:
+        verbose_name = _('Account Balance')
+        verbose_name_plural = _('Account Balances')
+        ordering = ['account', 'month']
+        unique_together = ['account', 'month']
+    
+    def __str__(self):
+        return f"{self.account.code} - {self.month:%Y-%m}"
+
+
 class Invoice(models.Model):
     """
     Invoice - الفواتير
@@ -381,6 +484,11 @@ class Invoice(models.Model):
         verbose_name = _('Invoice')
         verbose_name_plural = _('Invoices')
         ordering = ['-invoice_date', '-invoice_number']
+        indexes = [
+            # Outstanding / overdue invoices
+            models.Index(fields=['status', 'due_date']),
+            models.Index(fields=['status', 'invoice_date']),
+        ]
     
     def __str__(self):
         return f"{self.invoice_number} - {self.get_invoice_type_display()}"
@@ -602,6 +710,14 @@ class Budget(models.Model):
     def get_variance(self):
         return Decimal(self.budgeted_amount) - Decimal(self.get_actual_amount())
     
+    def get_utilization_percentage(self):
+        if not self.budgeted_amount:
+            return 0
+        return Decimal(self.get_actual_amount()) / self.budgeted_amount * 100
+    
+    def is_over_budget(self):
+        return Decimal(self.get_actual_amount()) > self.budgeted_amount
+    
     def get_variance_percentage(self):
         if self.budgeted_amount == 0:
             return 0
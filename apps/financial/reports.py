@@ -0,0 +1,173 @@
+"""
+Financial Report Service for Origin App
+Builds the trial balance, profit & loss and balance sheet from one grouped
+query over the posted journal entry lines, rolling child accounts up to
+their parents through Account.parent.
+"""
+from decimal import Decimal
+
+from django.db.models import Sum
+
+from .models import AccountType, JournalEntryLine
+from .tree import AccountTree
+
+
+ZERO = Decimal('0.00')
+
+
+class FinancialReportService:
+    """
+    Service class for the financial statements
+    """
+
+    @staticmethod
+    def account_totals(start_date=None, end_date=None, property=None):
+        """
+        Return {account_id: (debits, credits)} of the posted lines in the
+        date range, in one grouped query
+        """
+        lines = JournalEntryLine.objects.filter(journal_entry__is_posted=True)
+        if start_date:
+            lines = lines.filter(journal_entry__entry_date__gte=start_date)
+        if end_date:
+            lines = lines.filter(journal_entry__entry_date__lte=end_date)
+        if property:
+            lines = lines.filter(journal_entry__property=property)
+
+        rows = lines.values('account').annotate(
+            debits=Sum('debit_amount'),
+            credits=Sum('credit_amount')
+        ).order_by()
+
+        return {
+            row['account']: (row['debits'] or ZERO, row['credits'] or ZERO)
+            for row in rows
+        }
+
+    @staticmethod
+    def account_tree(totals, account_types=None):
+        """
+        Load the chart of accounts in one query (see AccountTree) and attach
+        the report figures to every account:
+
+        - own_debit / own_credit / own_balance: the account's own lines
+        - debit / credit / balance: own lines plus every descendant's
+        - level: depth in the Account.parent hierarchy
+        - is_subtotal: a child account has postings, so `balance` is a
+          subtotal of the subtree rather than the account's own amount
+        """
+        tree = AccountTree.load()
+
+        for account in tree:
+            account.own_debit, account.own_credit = totals.get(account.id, (ZERO, ZERO))
+            account.own_balance = account.signed_balance(account.own_debit, account.own_credit)
+            account.debit = account.credit = ZERO
+
+        for account in tree:
+            account.level = account.depth
+            for node in [account] + tree.ancestors(account):
+                node.debit += account.own_debit
+                node.credit += account.own_credit
+
+        accounts = sorted(tree, key=lambda account: account.code)
+        for account in accounts:
+            account.balance = account.signed_balance(account.debit, account.credit)
+        for account in accounts:
+            account.is_subtotal = any(child.debit or child.credit for child in account.tree_children)
+
+        if account_types is not None:
+            accounts = [account for account in accounts if account.account_type in account_types]
+        return accounts
+
+    @staticmethod
+    def _section(accounts, account_type):
+        """
+        Accounts of one type with a non-zero rolled-up balance in hierarchy
+        order, plus the section total. The rows' own_balance add up to the
+        total; `balance` of an is_subtotal row already includes the rows
+        below it.
+        """
+        section = sorted(
+            (account for account in accounts if account.account_type == account_type and account.balance != 0),
+            key=lambda account: account.path
+        )
+        total = sum((account.own_balance for account in accounts if account.account_type == account_type), ZERO)
+        return section, total
+
+    @staticmethod
+    def trial_balance(as_of_date=None, property=None):
+        """Debit/credit balance of every account with postings up to as_of_date"""
+        totals = FinancialReportService.account_totals(end_date=as_of_date, property=property)
+        accounts = FinancialReportService.account_tree(totals)
+
+        rows = []
+        total_debit = total_credit = ZERO
+        for account in accounts:
+            if account.own_balance == 0:
+                continue
+
+            net = account.own_debit - account.own_credit
+            account.trial_debit = net if net > 0 else ZERO
+            account.trial_credit = -net if net < 0 else ZERO
+            total_debit += account.trial_debit
+            total_credit += account.trial_credit
+            rows.append(account)
+
+        return {
+            'accounts': rows,
+            'total_debit': total_debit,
+            'total_credit': total_credit,
+            'difference': total_debit - total_credit,
+            'is_balanced': total_debit == total_credit,
+        }
+
+    @staticmethod
+    def profit_loss(start_date, end_date, property=None):
+        """Revenue and expenses for the date range"""
+        totals = FinancialReportService.account_totals(start_date, end_date, property)
+        accounts = FinancialReportService.account_tree(
+            totals, account_types=[AccountType.REVENUE, AccountType.EXPENSE]
+        )
+
+        revenue_accounts, total_revenue = FinancialReportService._section(accounts, AccountType.REVENUE)
+        expense_accounts, total_expenses = FinancialReportService._section(accounts, AccountType.EXPENSE)
+
+        return {
+            'revenue_accounts': revenue_accounts,
+            'expense_accounts': expense_accounts,
+            'total_revenue': total_revenue,
+            'total_expenses': total_expenses,
+            'net_income': total_revenue - total_expenses,
+        }
+
+    @staticmethod
+    def balance_sheet(as_of_date=None, property=None):
+        """
+        Assets, liabilities and equity as of a date. Revenue less expenses to
+        date is carried into equity as current earnings.
+        """
+        totals = FinancialReportService.account_totals(end_date=as_of_date, property=property)
+        accounts = FinancialReportService.account_tree(totals)
+
+        asset_accounts, total_assets = FinancialReportService._section(accounts, AccountType.ASSET)
+        liability_accounts, total_liabilities = FinancialReportService._section(accounts, AccountType.LIABILITY)
+        equity_accounts, equity_balance = FinancialReportService._section(accounts, AccountType.EQUITY)
+        _, revenue = FinancialReportService._section(accounts, AccountType.REVENUE)
+        _, expenses = FinancialReportService._section(accounts, AccountType.EXPENSE)
+
+        current_earnings = revenue - expenses
+        total_equity = equity_balance + current_earnings
+        total_liabilities_equity = total_liabilities + total_equity
+
+        return {
+            'asset_accounts': asset_accounts,
+            'liability_accounts': liability_accounts,
+            'equity_accounts': equity_accounts,
+            'total_assets': total_assets,
+            'total_liabilities': total_liabilities,
+            'current_earnings': current_earnings,
+            'total_equity': total_equity,
+            'total_liabilities_equity': total_liabilities_equity,
+            'difference': total_assets - total_liabilities_equity,
+            'is_balanced': total_assets == total_liabilities_equity,
+        }
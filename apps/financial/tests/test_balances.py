@@ -0,0 +1,169 @@
+"""
+Account balance tests for Origin App
+The AccountBalance rows kept by JournalEntry.post() and the ledger signals
+must always equal a fresh LedgerBalanceService.rebuild() from the posted
+lines, and `rebuild_balances --verify-only` must catch any drift.
+"""
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from apps.financial.balances import LedgerBalanceService
+from apps.financial.models import Account, AccountBalance, JournalEntry, JournalEntryLine
+
+
+def balances():
+    """Non-zero balance rows as comparable tuples; refresh() keeps emptied rows at zero"""
+    return sorted(
+        AccountBalance.objects.exclude(debit_total=0, credit_total=0)
+        .values_list('account_id', 'month', 'debit_total', 'credit_total')
+    )
+
+
+class LedgerBalanceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cash = Account.objects.create(code='1100', name='Cash', account_type='asset')
+        cls.bank = Account.objects.create(code='1200', name='Bank', account_type='asset')
+        cls.rent = Account.objects.create(code='4100', name='Rental Income', account_type='revenue')
+
+    def entry(self, number, entry_date, amount, debit=None, credit=None, **values):
+        entry = JournalEntry.objects.create(
+            entry_number=number, entry_date=entry_date, description=f'Entry {number}', **values
+        )
+        JournalEntryLine.objects.create(journal_entry=entry, account=debit or self.cash, debit_amount=amount)
+        JournalEntryLine.objects.create(journal_entry=entry, account=credit or self.rent, credit_amount=amount)
+        return entry
+
+    def assertBalancesMatchRebuild(self):
+        live = balances()
+        self.assertEqual(LedgerBalanceService.verify(), [])
+        LedgerBalanceService.rebuild()
+        self.assertEqual(live, balances())
+
+    def test_draft_entries_are_not_counted(self):
+        self.entry('JE-1', date(2026, 5, 3), Decimal('500'))
+        self.assertEqual(balances(), [])
+        self.assertEqual(self.cash.get_balance(), 0)
+        self.assertBalancesMatchRebuild()
+
+    def test_post(self):
+        self.assertTrue(self.entry('JE-1', date(2026, 5, 3), Decimal('500')).post())
+        self.assertTrue(self.entry('JE-2', date(2026, 5, 20), Decimal('250')).post())
+        self.assertTrue(self.entry('JE-3', date(2026, 6, 1), Decimal('100')).post())
+
+        self.assertEqual(balances(), [
+            (self.cash.pk, date(2026, 5, 1), Decimal('750.00'), Decimal('0.00')),
+            (self.cash.pk, date(2026, 6, 1), Decimal('100.00'), Decimal('0.00')),
+            (self.rent.pk, date(2026, 5, 1), Decimal('0.00'), Decimal('750.00')),
+            (self.rent.pk, date(2026, 6, 1), Decimal('0.00'), Decimal('100.00')),
+        ])
+        self.assertEqual(self.cash.get_balance(), Decimal('850.00'))
+        self.assertEqual(self.rent.get_balance(), Decimal('850.00'))
+        self.assertBalancesMatchRebuild()
+
+    def test_posting_twice_adds_once(self):
+        entry = self.entry('JE-1', date(2026, 5, 3), Decimal('500'))
+        self.assertTrue(entry.post())
+        self.assertFalse(entry.post())
+        self.assertEqual(self.cash.get_balance(), Decimal('500.00'))
+        self.assertBalancesMatchRebuild()
+
+    def test_entry_written_already_posted(self):
+        self.entry('JE-1', date(2026, 5, 3), Decimal('500'), entry_type='automated', is_posted=True)
+        self.assertEqual(self.cash.get_balance(), Decimal('500.00'))
+        self.assertBalancesMatchRebuild()
+
+    def test_unpost(self):
+        entry = self.entry('JE-1', date(2026, 5, 3), Decimal('500'))
+        entry.post()
+        self.entry('JE-2', date(2026, 5, 9), Decimal('40')).post()
+
+        entry.is_posted = False
+        entry.save()
+
+        self.assertEqual(self.cash.get_balance(), Decimal('40.00'))
+        self.assertBalancesMatchRebuild()
+
+    def test_posted_entry_moved_to_another_month(self):
+        entry = self.entry('JE-1', date(2026, 5, 3), Decimal('500'))
+        entry.post()
+
+        entry.entry_date = date(2026, 7, 15)
+        entry.save()
+
+        self.assertEqual(balances(), [
+            (self.cash.pk, date(2026, 7, 1), Decimal('500.00'), Decimal('0.00')),
+            (self.rent.pk, date(2026, 7, 1), Decimal('0.00'), Decimal('500.00')),
+        ])
+        self.assertBalancesMatchRebuild()
+
+    def test_line_edit(self):
+        entry = self.entry('JE-1', date(2026, 5, 3), Decimal('500'))
+        entry.post()
+
+        debit = entry.lines.get(account=self.cash)
+        debit.debit_amount = Decimal('650')
+        debit.save()
+        self.assertEqual(self.cash.get_balance(), Decimal('650.00'))
+
+        debit.account = self.bank
+        debit.save()
+        self.assertEqual(self.cash.get_balance(), Decimal('0.00'))
+        self.assertEqual(self.bank.get_balance(), Decimal('650.00'))
+        self.assertBalancesMatchRebuild()
+
+    def test_line_added_to_posted_entry(self):
+        entry = self.entry('JE-1', date(2026, 5, 3), Decimal('500'))
+        entry.post()
+        JournalEntryLine.objects.create(journal_entry=entry, account=self.bank, debit_amount=Decimal('20'))
+        JournalEntryLine.objects.create(journal_entry=entry, account=self.rent, credit_amount=Decimal('20'))
+
+        self.assertEqual(self.bank.get_balance(), Decimal('20.00'))
+        self.assertEqual(self.rent.get_balance(), Decimal('520.00'))
+        self.assertBalancesMatchRebuild()
+
+    def test_delete(self):
+        first = self.entry('JE-1', date(2026, 5, 3), Decimal('500'))
+        first.post()
+        second = self.entry('JE-2', date(2026, 5, 9), Decimal('40'))
+        second.post()
+        third = self.entry('JE-3', date(2026, 6, 9), Decimal('7'))
+        third.post()
+
+        second.lines.get(account=self.cash).delete()
+        self.assertEqual(self.cash.get_balance(), Decimal('507.00'))
+
+        first.delete()
+        JournalEntry.objects.filter(pk=third.pk).delete()
+        self.assertEqual(self.cash.get_balance(), Decimal('0.00'))
+        self.assertEqual(self.rent.get_balance(), Decimal('40.00'))
+        self.assertBalancesMatchRebuild()
+
+    def test_verify_only_reports_drift(self):
+        self.entry('JE-1', date(2026, 5, 3), Decimal('500')).post()
+        call_command('rebuild_balances', '--verify-only', stdout=io.StringIO())
+
+        AccountBalance.objects.filter(account=self.cash).update(debit_total=Decimal('499.99'))
+        stdout = io.StringIO()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_balances', '--verify-only', stdout=stdout)
+        self.assertIn(f'Account {self.cash.pk} 2026-05', stdout.getvalue())
+        self.assertIn('stored 499.99/0.00', stdout.getvalue())
+
+        call_command('rebuild_balances', stdout=io.StringIO())
+        self.assertEqual(self.cash.get_balance(), Decimal('500.00'))
+
+
+class SeededLedgerBalanceTests(TestCase):
+    """The balances left by the seed data, written through every ledger path"""
+
+    def test_seeded_balances_verify(self):
+        call_command('create_realistic_data', stdout=io.StringIO())
+        self.assertTrue(AccountBalance.objects.exists())
+        call_command('rebuild_balances', '--verify-only', stdout=io.StringIO())
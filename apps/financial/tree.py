@@ -0,0 +1,126 @@
+"""
+Chart of Accounts tree for Origin App
+Loads the whole account hierarchy with one query (ordered by materialized
+path) and keeps Account.path/depth in sync when accounts move.
+"""
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
+from django.db.models.signals import post_delete
+
+from .models import Account
+
+
+class AccountTree:
+    """
+    In-memory account hierarchy. Every loaded account gets:
+
+    - tree_parent: parent Account (None for roots, or when the parent was
+      filtered out of the queryset)
+    - tree_children: list of child Accounts in code order
+    """
+
+    def __init__(self, accounts):
+        self.accounts = list(accounts)
+        self.by_id = {account.id: account for account in self.accounts}
+        self.roots = []
+
+        for account in self.accounts:
+            account.tree_children = []
+
+        for account in self.accounts:
+            account.tree_parent = self.by_id.get(account.parent_id)
+            if account.tree_parent is None:
+                self.roots.append(account)
+            else:
+                account.tree_parent.tree_children.append(account)
+
+    @classmethod
+    def load(cls, queryset=None):
+        """Build the tree from one query"""
+        if queryset is None:
+            queryset = Account.objects.all()
+        return cls(queryset.order_by('path'))
+
+    def __iter__(self):
+        """Accounts in depth-first (path) order"""
+        return iter(self.accounts)
+
+    def get(self, account_id):
+        return self.by_id.get(account_id)
+
+    def ancestors(self, account):
+        """Parent, grandparent, ... of an account"""
+        ancestors = []
+        parent = account.tree_parent
+        while parent is not None:
+            ancestors.append(parent)
+            parent = parent.tree_parent
+        return ancestors
+
+    def descendants(self, account):
+        """Every loaded account below `account`"""
+        return [
+            other for other in self.accounts
+            if other.path.startswith(account.path) and other.id != account.id
+        ]
+
+    def rollup(self, values, attr='subtree_total'):
+        """
+        Sum `values` ({account_id: number}) over each account's subtree and
+        store the result on the account as `attr`
+        """
+        for account in self.accounts:
+            setattr(account, attr, 0)
+        for account in self.accounts:
+            value = values.get(account.id, 0)
+            for node in [account] + self.ancestors(account):
+                setattr(node, attr, getattr(node, attr) + value)
+        return self
+
+    # ---------------------------------------------------------------
+    # Path maintenance
+    # ---------------------------------------------------------------
+
+    @staticmethod
+    def move_subtree(old_path, new_path, depth_delta):
+        """Re-prefix every descendant of a moved account with one UPDATE"""
+        Account.objects.filter(
+            path__startswith=old_path
+        ).exclude(
+            path=new_path
+        ).update(
+            path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+            depth=F('depth') + depth_delta
+        )
+
+    @staticmethod
+    def rebuild_paths():
+        """Recompute every path/depth from the parent links, returns the number of rows fixed"""
+        accounts = {account.id: account for account in Account.objects.all()}
+
+        def build(account, seen=()):
+            parent = accounts.get(account.parent_id)
+            if parent is None or parent.id in seen:
+                return f"{account.code}{Account.PATH_SEPARATOR}", 0
+            path, depth = build(parent, seen + (account.id,))
+            return f"{path}{account.code}{Account.PATH_SEPARATOR}", depth + 1
+
+        changed = []
+        for account in accounts.values():
+            path, depth = build(account)
+            if (account.path, account.depth) != (path, depth):
+                account.path, account.depth = path, depth
+                changed.append(account)
+
+        Account.objects.bulk_update(changed, ['path', 'depth'], batch_size=500)
+        return len(changed)
+
+
+def account_deleted(sender, instance, **kwargs):
+    # Children were detached with SET_NULL (a plain UPDATE), re-root their subtrees
+    if instance.path and Account.objects.filter(path__startswith=instance.path).exists():
+        AccountTree.rebuild_paths()
+
+
+def connect_signals():
+    post_delete.connect(account_deleted, sender=Account, dispatch_uid='account-tree-delete')
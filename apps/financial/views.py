@@ -8,9 +8,15 @@ from django.core.paginator import Paginator
 from django.db.models import Sum, Count, Q
 from django.http import JsonResponse, HttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from collections import Counter
 from datetime import datetime, timedelta
 from decimal import Decimal
 
+from apps.core.snapshots import DashboardSnapshotCache
+from .balances import LedgerBalanceService
+from .reports import FinancialReportService
+from .tree import AccountTree
 from .models import (
     Account, AccountType, JournalEntry, JournalEntryLine,
     Invoice, InvoiceItem, Payment, Budget, FinancialPeriod
@@ -21,24 +27,20 @@ from .forms import (
 )
 
 
-@login_required
-def financial_dashboard(request):
-    """Financial Dashboard"""
-    today = timezone.now().date()
+def _financial_dashboard_stats(today):
+    """Figures behind the financial dashboard (cached as a snapshot)"""
     last_30_days = today - timedelta(days=30)
     
     # Summary Stats
-    total_revenue = JournalEntryLine.objects.filter(
-        account__account_type=AccountType.REVENUE,
-        journal_entry__is_posted=True,
-        journal_entry__entry_date__gte=last_30_days
-    ).aggregate(total=Sum('credit_amount'))['total'] or 0
-    
-    total_expenses = JournalEntryLine.objects.filter(
-        account__account_type=AccountType.EXPENSE,
+    totals = JournalEntryLine.objects.filter(
         journal_entry__is_posted=True,
         journal_entry__entry_date__gte=last_30_days
-    ).aggregate(total=Sum('debit_amount'))['total'] or 0
+    ).aggregate(
+        revenue=Sum('credit_amount', filter=Q(account__account_type=AccountType.REVENUE)),
+        expenses=Sum('debit_amount', filter=Q(account__account_type=AccountType.EXPENSE)),
+    )
+    total_revenue = totals['revenue'] or 0
+    total_expenses = totals['expenses'] or 0
     
     net_income = Decimal(total_revenue) - Decimal(total_expenses)
     
@@ -47,40 +49,46 @@ def financial_dashboard(request):
         account_type=AccountType.ASSET,
         name__icontains='cash'
     )
-    cash_balance = sum([acc.get_balance() for acc in cash_accounts])
+    cash_balances = LedgerBalanceService.get_balances(cash_accounts)
+    cash_balance = sum([
+        acc.signed_balance(*cash_balances.get(acc.id, (0, 0))) for acc in cash_accounts
+    ])
     
     # Invoices stats
-    outstanding_invoices = Invoice.objects.filter(
-        status__in=['issued', 'partial']
-    ).aggregate(total=Sum('total_amount'))['total'] or 0
+    invoices = Invoice.objects.filter(status__in=['issued', 'partial']).aggregate(
+        outstanding=Sum('total_amount'),
+        overdue=Count('id', filter=Q(due_date__lt=today)),
+    )
     
-    overdue_invoices = Invoice.objects.filter(
-        due_date__lt=today,
-        status__in=['issued', 'partial']
-    ).count()
+    return {
+        'total_revenue': total_revenue,
+        'total_expenses': total_expenses,
+        'net_income': net_income,
+        'cash_balance': cash_balance,
+        'outstanding_invoices': invoices['outstanding'] or 0,
+        'overdue_invoices': invoices['overdue'],
+    }
+
+
+@login_required
+def financial_dashboard(request):
+    """Financial Dashboard"""
+    today = timezone.now().date()
+    context = DashboardSnapshotCache.get(
+        'financial', f'financial_dashboard:{today.isoformat()}', lambda: _financial_dashboard_stats(today)
+    ).copy()
     
     # Recent transactions
-    recent_entries = JournalEntry.objects.filter(
+    context['recent_entries'] = JournalEntry.objects.filter(
         is_posted=True
     ).order_by('-entry_date')[:10]
     
     # Recent invoices
-    recent_invoices = Invoice.objects.order_by('-invoice_date')[:5]
+    context['recent_invoices'] = Invoice.objects.order_by('-invoice_date')[:5]
     
     # Recent payments
-    recent_payments = Payment.objects.order_by('-payment_date')[:5]
+    context['recent_payments'] = Payment.objects.order_by('-payment_date')[:5]
     
-    context = {
-        'total_revenue': total_revenue,
-        'total_expenses': total_expenses,
-        'net_income': net_income,
-        'cash_balance': cash_balance,
-        'outstanding_invoices': outstanding_invoices,
-        'overdue_invoices': overdue_invoices,
-        'recent_entries': recent_entries,
-        'recent_invoices': recent_invoices,
-        'recent_payments': recent_payments,
-    }
     return render(request, 'financial/dashboard.html', context)
 
 
@@ -109,31 +117,30 @@ def account_list(request):
     elif is_active == '0':
         queryset = queryset.filter(is_active=False)
     
-    # Get all accounts grouped by type
+    # Whole (filtered) chart in one query, then grouped by type in memory
+    tree = AccountTree.load(queryset)
+    balances = LedgerBalanceService.get_balances()
+    for account in tree:
+        account.balance = account.signed_balance(*balances.get(account.id, (0, 0)))
+    tree.rollup({account.id: account.balance for account in tree}, attr='subtree_balance')
+    
     accounts_by_type = {}
     for acc_type in ['asset', 'liability', 'equity', 'revenue', 'expense']:
-        accounts = queryset.filter(
-            account_type=acc_type,
-            parent=None
-        ).prefetch_related('children').order_by('code')
-        if accounts.exists():
+        accounts = [account for account in tree.roots if account.account_type == acc_type]
+        if accounts:
             accounts_by_type[acc_type] = accounts
     
     # Count by type (from filtered queryset)
-    asset_count = queryset.filter(account_type='asset').count()
-    liability_count = queryset.filter(account_type='liability').count()
-    equity_count = queryset.filter(account_type='equity').count()
-    revenue_count = queryset.filter(account_type='revenue').count()
-    expense_count = queryset.filter(account_type='expense').count()
+    type_counts = Counter(account.account_type for account in tree)
     
     context = {
         'accounts_by_type': accounts_by_type,
-        'total_accounts': queryset.count(),
-        'asset_count': asset_count,
-        'liability_count': liability_count,
-        'equity_count': equity_count,
-        'revenue_count': revenue_count,
-        'expense_count': expense_count,
+        'total_accounts': len(tree.accounts),
+        'asset_count': type_counts['asset'],
+        'liability_count': type_counts['liability'],
+        'equity_count': type_counts['equity'],
+        'revenue_count': type_counts['revenue'],
+        'expense_count': type_counts['expense'],
     }
     return render(request, 'financial/account_list.html', context)
 
@@ -377,41 +384,41 @@ def payment_print(request, pk):
 
 
 # Financial Reports
+def _report_date(value, default):
+    """Parse a YYYY-MM-DD report parameter, falling back to default"""
+    try:
+        return parse_date(value or '') or default
+    except ValueError:
+        return default
+
+
+def _report_filters(request):
+    """Property filter shared by the financial reports"""
+    from apps.properties.models import Property
+    
+    properties = Property.objects.filter(is_active=True).order_by('title')
+    property_id = request.GET.get('property')
+    selected_property = properties.filter(pk=property_id).first() if property_id and property_id.isdigit() else None
+    return properties, selected_property
+
+
 @login_required
 def report_trial_balance(request):
     """Trial Balance Report"""
     form = FinancialReportForm(request.GET or None)
+    properties, selected_property = _report_filters(request)
     
-    accounts = Account.objects.filter(is_active=True).order_by('code')
-    report_data = []
-    total_debit = Decimal('0.00')
-    total_credit = Decimal('0.00')
-    
-    for account in accounts:
-        balance = account.get_balance()
-        if balance != 0:
-            if account.account_type in [AccountType.ASSET, AccountType.EXPENSE]:
-                debit = balance if balance > 0 else 0
-                credit = abs(balance) if balance < 0 else 0
-            else:
-                credit = balance if balance > 0 else 0
-                debit = abs(balance) if balance < 0 else 0
-            
-            report_data.append({
-                'account': account,
-                'debit': debit,
-                'credit': credit,
-            })
-            total_debit += Decimal(str(debit))
-            total_credit += Decimal(str(credit))
+    today = timezone.now()
+    as_of_date = _report_date(request.GET.get('as_of_date'), today.date())
     
-    context = {
+    context = FinancialReportService.trial_balance(as_of_date, property=selected_property)
+    context.update({
         'form': form,
-        'report_data': report_data,
-        'total_debit': total_debit,
-        'total_credit': total_credit,
-        'is_balanced': total_debit == total_credit,
-    }
+        'as_of_date': as_of_date,
+        'properties': properties,
+        'selected_property': selected_property,
+        'today': today,
+    })
     return render(request, 'financial/report_trial_balance.html', context)
 
 
@@ -419,111 +426,45 @@ def report_trial_balance(request):
 def report_profit_loss(request):
     """Profit & Loss Statement"""
     form = FinancialReportForm(request.GET or None)
+    properties, selected_property = _report_filters(request)
     
     # Get date range
+    today = timezone.now()
     if form.is_valid():
         start_date = form.cleaned_data['start_date']
         end_date = form.cleaned_data['end_date']
     else:
-        end_date = timezone.now().date()
-        start_date = end_date.replace(day=1)
-    
-    # Revenue
-    revenue_accounts = Account.objects.filter(account_type=AccountType.REVENUE)
-    total_revenue = Decimal('0.00')
-    revenue_data = []
-    
-    for account in revenue_accounts:
-        lines = JournalEntryLine.objects.filter(
-            account=account,
-            journal_entry__is_posted=True,
-            journal_entry__entry_date__range=[start_date, end_date]
-        )
-        amount = lines.aggregate(total=Sum('credit_amount'))['total'] or 0
-        if amount > 0:
-            revenue_data.append({'account': account, 'amount': amount})
-            total_revenue += Decimal(str(amount))
-    
-    # Expenses
-    expense_accounts = Account.objects.filter(account_type=AccountType.EXPENSE)
-    total_expenses = Decimal('0.00')
-    expense_data = []
-    
-    for account in expense_accounts:
-        lines = JournalEntryLine.objects.filter(
-            account=account,
-            journal_entry__is_posted=True,
-            journal_entry__entry_date__range=[start_date, end_date]
-        )
-        amount = lines.aggregate(total=Sum('debit_amount'))['total'] or 0
-        if amount > 0:
-            expense_data.append({'account': account, 'amount': amount})
-            total_expenses += Decimal(str(amount))
-    
-    net_income = total_revenue - total_expenses
+        end_date = _report_date(request.GET.get('to_date'), today.date())
+        start_date = _report_date(request.GET.get('from_date'), end_date.replace(day=1))
     
-    context = {
+    context = FinancialReportService.profit_loss(start_date, end_date, property=selected_property)
+    context.update({
         'form': form,
         'start_date': start_date,
         'end_date': end_date,
-        'revenue_data': revenue_data,
-        'expense_data': expense_data,
-        'total_revenue': total_revenue,
-        'total_expenses': total_expenses,
-        'net_income': net_income,
-    }
+        'from_date': start_date,
+        'to_date': end_date,
+        'properties': properties,
+        'selected_property': selected_property,
+        'today': today,
+    })
     return render(request, 'financial/report_profit_loss.html', context)
 
 
 @login_required
 def report_balance_sheet(request):
     """Balance Sheet"""
-    report_date = timezone.now().date()
-    
-    # Assets
-    asset_accounts = Account.objects.filter(account_type=AccountType.ASSET)
-    total_assets = Decimal('0.00')
-    asset_data = []
-    
-    for account in asset_accounts:
-        balance = account.get_balance()
-        if balance != 0:
-            asset_data.append({'account': account, 'amount': balance})
-            total_assets += balance
-    
-    # Liabilities
-    liability_accounts = Account.objects.filter(account_type=AccountType.LIABILITY)
-    total_liabilities = Decimal('0.00')
-    liability_data = []
-    
-    for account in liability_accounts:
-        balance = account.get_balance()
-        if balance != 0:
-            liability_data.append({'account': account, 'amount': balance})
-            total_liabilities += balance
-    
-    # Equity
-    equity_accounts = Account.objects.filter(account_type=AccountType.EQUITY)
-    total_equity = Decimal('0.00')
-    equity_data = []
-    
-    for account in equity_accounts:
-        balance = account.get_balance()
-        if balance != 0:
-            equity_data.append({'account': account, 'amount': balance})
-            total_equity += balance
-    
-    total_liabilities_equity = total_liabilities + total_equity
+    properties, selected_property = _report_filters(request)
     
-    context = {
+    today = timezone.now()
+    report_date = _report_date(request.GET.get('as_of_date'), today.date())
+    
+    context = FinancialReportService.balance_sheet(report_date, property=selected_property)
+    context.update({
         'report_date': report_date,
-        'asset_data': asset_data,
-        'liability_data': liability_data,
-        'equity_data': equity_data,
-        'total_assets': total_assets,
-        'total_liabilities': total_liabilities,
-        'total_equity': total_equity,
-        'total_liabilities_equity': total_liabilities_equity,
-        'is_balanced': total_assets == total_liabilities_equity,
-    }
+        'as_of_date': report_date,
+        'properties': properties,
+        'selected_property': selected_property,
+        'today': today,
+    })
     return render(request, 'financial/report_balance_sheet.html', context)
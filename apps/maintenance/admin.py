@@ -25,7 +25,7 @@ class MaintenanceRequestAdmin(admin.ModelAdmin):
     ]
     list_filter = ['status', 'priority', 'category', 'request_date']
     search_fields = ['request_number', 'property__code', 'description']
-    readonly_fields = ['request_number', 'created_at', 'updated_at']
+    readonly_fields = ['request_number', 'request_date', 'created_at', 'updated_at']
     inlines = [MaintenanceAttachmentInline]
     
     fieldsets = (
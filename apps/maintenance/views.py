@@ -4,10 +4,11 @@ from datetime import timedelta
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db.models import Case, Count, IntegerField, Q, Sum, When
+from django.db.models import Case, Count, IntegerField, Sum, When
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 
+from apps.core.search import get_search_index
 from .forms import (
     MaintenanceAttachmentForm,
     MaintenanceRequestForm,
@@ -28,14 +29,7 @@ def maintenance_list(request):
         data = search_form.cleaned_data
 
         if data.get('search'):
-            term = data['search']
-            queryset = queryset.filter(
-                Q(request_number__icontains=term)
-                | Q(title__icontains=term)
-                | Q(description__icontains=term)
-                | Q(property__title__icontains=term)
-                | Q(property__code__icontains=term)
-            )
+            queryset = get_search_index('maintenance').filter(queryset, data['search'])
 
         if data.get('status'):
             queryset = queryset.filter(status=data['status'])
@@ -5,8 +5,9 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q, Count
+from django.db.models import Count
 
+from apps.core.search import get_search_index
 from .models import Owner
 from .forms import OwnerForm, OwnerSearchForm
 
@@ -21,12 +22,7 @@ def owner_list(request):
         filters = search_form.cleaned_data
         search = filters.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search)
-                | Q(email__icontains=search)
-                | Q(phone__icontains=search)
-                | Q(national_id__icontains=search)
-            )
+            queryset = get_search_index('owner').filter(queryset, search)
         
         if filters.get('city'):
             queryset = queryset.filter(city__icontains=filters['city'])
@@ -12,6 +12,7 @@ from .models import (
     PropertyInspection,
     PropertyExpense,
     PropertyRevenue,
+    PropertyMetricsRun,
 )
 
 
@@ -167,3 +168,17 @@ class PropertyRevenueAdmin(admin.ModelAdmin):
     list_filter = ['revenue_type', 'revenue_date']
     search_fields = ['property__code', 'property__title', 'source']
     readonly_fields = ['created_at']
+
+
+@admin.register(PropertyMetricsRun)
+class PropertyMetricsRunAdmin(admin.ModelAdmin):
+    list_display = ['started_at', 'status', 'since', 'properties_scanned', 'rows_changed', 'duration_ms']
+    list_filter = ['status']
+    readonly_fields = [
+        'started_at', 'finished_at', 'since', 'status', 'properties_scanned',
+        'rows_changed', 'duration_ms', 'error'
+    ]
+    ordering = ['-started_at']
+
+    def has_add_permission(self, request):
+        return False
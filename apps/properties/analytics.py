@@ -0,0 +1,320 @@
+"""
+Portfolio Analytics for Origin App
+Occupancy, vacancy days, gross / net yield, ROI and cap rate per property and
+per month for the whole portfolio. Each chunk of properties loads its
+columns once (property figures, contract date ranges, the monthly financials
+rollup and the latest valuations, one query each), then every property is
+computed with interval arithmetic on date ordinals: its occupying contracts
+are merged into disjoint ranges, clipped to the period and split at month
+boundaries. No query runs per property or per contract.
+
+Results can be written back to Property.occupancy_rate and average_roi with
+bulk_update (PortfolioAnalytics.recompute). PropertyMetricsJob wraps that in
+a logged run (PropertyMetricsRun), nightly for the whole portfolio or, with
+`since`, only for the properties with activity after that time.
+"""
+import time
+from bisect import bisect_right
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Property, PropertyMetricsRun, PropertyMonthlyFinancials, PropertyValuation
+
+
+# Contract statuses during which the property is let
+OCCUPYING_STATUSES = ('active', 'expired', 'renewed')
+
+# Properties loaded and written per chunk
+CHUNK_SIZE = 2000
+
+# Property.occupancy_rate / average_roi are DecimalField(max_digits=5, decimal_places=2)
+PERCENT = Decimal('0.01')
+PERCENT_LIMIT = Decimal('999.99')
+
+
+# ===================================================================
+# INTERVAL ARITHMETIC (half-open [start, end) ranges of date ordinals)
+# ===================================================================
+
+def merge_intervals(intervals):
+    """Disjoint, sorted union of `intervals`; overlapping or touching ranges are joined"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def clip_intervals(intervals, start, end):
+    """Parts of disjoint sorted `intervals` inside [start, end)"""
+    return [
+        (max(interval_start, start), min(interval_end, end))
+        for interval_start, interval_end in intervals
+        if interval_start < end and interval_end > start
+    ]
+
+
+def interval_gaps(intervals, start, end):
+    """Ranges of [start, end) not covered by disjoint sorted `intervals`"""
+    gaps = []
+    cursor = start
+    for interval_start, interval_end in clip_intervals(intervals, start, end):
+        if interval_start > cursor:
+            gaps.append((cursor, interval_start))
+        cursor = max(cursor, interval_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def covered_days(intervals):
+    return sum(end - start for start, end in intervals)
+
+
+def month_bounds(start, end):
+    """Ordinals of the first day of every month touching [start, end), plus `end`"""
+    day = date.fromordinal(start).replace(day=1)
+    bounds = []
+    while day.toordinal() < end:
+        bounds.append(day.toordinal())
+        day = (day + timedelta(days=32)).replace(day=1)
+    bounds.append(end)
+    return bounds
+
+
+def days_per_month(intervals, bounds):
+    """Covered days of disjoint `intervals` in each month of `bounds` (see month_bounds)"""
+    days = [0] * (len(bounds) - 1)
+    for start, end in intervals:
+        index = max(bisect_right(bounds, start) - 1, 0)
+        while index < len(days) and bounds[index] < end:
+            days[index] += min(end, bounds[index + 1]) - max(start, bounds[index])
+            index += 1
+    return days
+
+
+def percent(value):
+    """Float percentage as a Decimal fitting the Property percentage fields"""
+    value = Decimal(str(value)).quantize(PERCENT, rounding=ROUND_HALF_UP)
+    return max(min(value, PERCENT_LIMIT), -PERCENT_LIMIT)
+
+
+# ===================================================================
+# PORTFOLIO
+# ===================================================================
+
+class PortfolioFrame:
+    """
+    Columns of one chunk of properties, aligned by position in `property_ids`
+    """
+
+    def __init__(self, property_ids, current, investments, values, contracts, monthly, lifetime_net):
+        self.property_ids = property_ids
+        self.current = current              # stored (occupancy_rate, average_roi)
+        self.investments = investments      # purchase price, else market value
+        self.values = values                # latest valuation, else market value, else purchase price
+        self.contracts = contracts          # {property_id: [(start, end)]} occupying date ranges
+        self.monthly = monthly              # {property_id: {(year, month): (revenue, expenses)}}
+        self.lifetime_net = lifetime_net    # {property_id: revenue - expenses, all time}
+
+
+class PortfolioAnalytics:
+    """
+    Service class for portfolio-wide property metrics
+    """
+
+    @staticmethod
+    def default_period(today=None):
+        """The current month and the 11 before it, up to and including today"""
+        today = today or timezone.now().date()
+        month = today.month - 11
+        year = today.year + (month - 1) // 12
+        start = date(year, (month - 1) % 12 + 1, 1)
+        return start, today + timedelta(days=1)
+
+    @staticmethod
+    def load(property_ids):
+        """PortfolioFrame of `property_ids`, in four queries"""
+        from apps.contracts.models import Contract
+
+        rows = list(
+            Property.objects.filter(pk__in=property_ids).order_by('pk').values_list(
+                'pk', 'purchase_price', 'market_value', 'occupancy_rate', 'average_roi'
+            )
+        )
+        property_ids = [row[0] for row in rows]
+        current = [(occupancy_rate, average_roi) for *_, occupancy_rate, average_roi in rows]
+
+        latest_valuation = dict(
+            PropertyValuation.objects.filter(property_id__in=property_ids)
+            .order_by('property_id', 'valuation_date', 'pk')
+            .values_list('property_id', 'valuation_amount')
+        )
+        investments = [purchase or market or Decimal('0') for _, purchase, market, *_ in rows]
+        values = [
+            latest_valuation.get(pk) or market or purchase or Decimal('0')
+            for pk, purchase, market, *_ in rows
+        ]
+
+        contracts = {pk: [] for pk in property_ids}
+        contract_rows = Contract.objects.filter(
+            property_id__in=property_ids,
+            status__in=OCCUPYING_STATUSES,
+        ).order_by().values_list('property_id', 'start_date', 'end_date')
+        for property_id, start, end in contract_rows:
+            # end_date is the last day of the lease
+            contracts[property_id].append((start.toordinal(), end.toordinal() + 1))
+
+        monthly = {pk: {} for pk in property_ids}
+        lifetime_net = {pk: Decimal('0') for pk in property_ids}
+        rollup_rows = PropertyMonthlyFinancials.objects.filter(
+            property_id__in=property_ids
+        ).order_by().values_list('property_id', 'year', 'month', 'revenue', 'expenses')
+        for property_id, year, month, revenue, expenses in rollup_rows:
+            monthly[property_id][(year, month)] = (revenue, expenses)
+            lifetime_net[property_id] += revenue - expenses
+
+        return PortfolioFrame(property_ids, current, investments, values, contracts, monthly, lifetime_net)
+
+    @staticmethod
+    def compute(frame, start=None, end=None):
+        """
+        {property_id: metrics} over the dates [start, end), by default
+        PortfolioAnalytics.default_period(). Yields and ROI are percentages,
+        annualised over the period; `roi` is all-time net income over the
+        investment.
+        """
+        if start is None or end is None:
+            start, end = PortfolioAnalytics.default_period()
+        start, end = start.toordinal(), end.toordinal()
+        period_days = end - start
+        annual = Decimal(365) / Decimal(period_days)
+        bounds = month_bounds(start, end)
+        months = [(date.fromordinal(bound).year, date.fromordinal(bound).month) for bound in bounds[:-1]]
+        # The first month only counts from `start`
+        month_days = [bounds[index + 1] - max(bounds[index], start) for index in range(len(months))]
+
+        results = {}
+        for position, property_id in enumerate(frame.property_ids):
+            occupied = clip_intervals(merge_intervals(frame.contracts[property_id]), start, end)
+            occupied_days = covered_days(occupied)
+            occupied_per_month = days_per_month(occupied, bounds)
+
+            figures = frame.monthly[property_id]
+            revenue = sum((figures.get(month, (0, 0))[0] for month in months), Decimal('0'))
+            expenses = sum((figures.get(month, (0, 0))[1] for month in months), Decimal('0'))
+            net_income = revenue - expenses
+
+            investment = frame.investments[position]
+            value = frame.values[position]
+            results[property_id] = {
+                'occupied_days': occupied_days,
+                'vacant_days': period_days - occupied_days,
+                'occupancy_rate': occupied_days / period_days * 100,
+                'monthly_occupancy': [
+                    {'year': year, 'month': month, 'occupancy_rate': days / total * 100}
+                    for (year, month), days, total in zip(months, occupied_per_month, month_days)
+                ],
+                'revenue': revenue,
+                'expenses': expenses,
+                'net_income': net_income,
+                'gross_yield': float(revenue * annual / value * 100) if value else 0.0,
+                'cap_rate': float(net_income * annual / value * 100) if value else 0.0,
+                'net_yield': float(net_income * annual / investment * 100) if investment else 0.0,
+                'roi': float(frame.lifetime_net[property_id] / investment * 100) if investment else 0.0,
+            }
+        return results
+
+    @staticmethod
+    def recompute(property_ids=None, start=None, end=None, chunk_size=CHUNK_SIZE):
+        """
+        Compute the metrics of the given properties (all by default) chunk by
+        chunk and bulk_update occupancy_rate and average_roi (the annualised
+        net yield on the investment) where they changed. Returns the number
+        of properties updated.
+        """
+        if property_ids is None:
+            property_ids = Property.objects.order_by('pk').values_list('pk', flat=True)
+        property_ids = list(property_ids)
+
+        updated = 0
+        for offset in range(0, len(property_ids), chunk_size):
+            frame = PortfolioAnalytics.load(property_ids[offset:offset + chunk_size])
+            metrics = PortfolioAnalytics.compute(frame, start, end)
+            changed = []
+            for property_id, current in zip(frame.property_ids, frame.current):
+                figures = metrics[property_id]
+                fresh = (percent(figures['occupancy_rate']), percent(figures['net_yield']))
+                if current != fresh:
+                    changed.append(Property(pk=property_id, occupancy_rate=fresh[0], average_roi=fresh[1]))
+            Property.objects.bulk_update(changed, ['occupancy_rate', 'average_roi'])
+            updated += len(changed)
+
+        if updated:
+            # bulk_update sends no signals, refresh the property dashboard ourselves
+            from apps.core.snapshots import DashboardSnapshotCache
+            transaction.on_commit(lambda: DashboardSnapshotCache.invalidate('properties'))
+        return updated
+
+
+class PropertyMetricsJob:
+    """
+    Logged recomputation of the stored property metrics
+    """
+
+    @staticmethod
+    def active_since(since):
+        """
+        Ids of the properties whose contracts, revenues / expenses (through
+        the rollup), valuations or prices changed after `since`
+        """
+        from apps.contracts.models import Contract
+
+        property_ids = set(Property.objects.filter(updated_at__gte=since).values_list('pk', flat=True))
+        for queryset in (
+            Contract.objects.filter(updated_at__gte=since),
+            PropertyMonthlyFinancials.objects.filter(updated_at__gte=since),
+            PropertyValuation.objects.filter(created_at__gte=since),
+        ):
+            property_ids.update(queryset.order_by().values_list('property_id', flat=True).distinct())
+        return sorted(property_ids)
+
+    @staticmethod
+    def last_success():
+        """Start of the last successful run, None before the first one"""
+        run = PropertyMetricsRun.objects.filter(status='success').order_by('-started_at').first()
+        return run.started_at if run else None
+
+    @staticmethod
+    def run(since=None, chunk_size=CHUNK_SIZE):
+        """
+        Recompute every property, or with `since` only the active ones, and
+        return the PropertyMetricsRun. Occupancy also moves as days pass, so
+        incremental runs complement the nightly full run rather than
+        replace it.
+        """
+        run = PropertyMetricsRun.objects.create(since=since)
+        started = time.perf_counter()
+        try:
+            if since is None:
+                property_ids = list(Property.objects.order_by('pk').values_list('pk', flat=True))
+            else:
+                property_ids = PropertyMetricsJob.active_since(since)
+            run.properties_scanned = len(property_ids)
+            run.rows_changed = PortfolioAnalytics.recompute(property_ids, chunk_size=chunk_size)
+            run.status = 'success'
+        except Exception as e:
+            run.status = 'failed'
+            run.error = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            run.finished_at = timezone.now()
+            run.duration_ms = int((time.perf_counter() - started) * 1000)
+            run.save()
+        return run
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class PropertiesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.properties'
+    verbose_name = 'Properties'
+
+    def ready(self):
+        """Keep the monthly financials rollup in step with revenues and expenses"""
+        from apps.properties import financials
+        financials.connect_signals()
@@ -0,0 +1,364 @@
+"""
+Property Financials for Origin App
+Revenue and expense totals of a property grouped by (year, month, type). The
+financial report, the API financial summary and the property detail
+serializer derive every figure from this timeseries in Python.
+
+The totals live in the PropertyMonthlyFinancials rollup, one row per
+property and month. PropertyRevenue / PropertyExpense signals recompute the
+month a record is saved to or deleted from, so portfolio figures cost
+properties x months rather than one row per transaction.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from .models import PropertyExpense, PropertyMonthlyFinancials, PropertyRevenue
+
+
+ZERO = Decimal('0.00')
+
+REVENUE = 'revenue'
+EXPENSE = 'expense'
+
+# kind: (model, date field, type field)
+SOURCES = {
+    REVENUE: (PropertyRevenue, 'revenue_date', 'revenue_type'),
+    EXPENSE: (PropertyExpense, 'expense_date', 'expense_type'),
+}
+
+
+class FinancialTimeseries:
+    """
+    Totals of one property keyed by (kind, year, month, type)
+    """
+
+    def __init__(self):
+        self.buckets = {}
+
+    def add(self, kind, year, month, type_, amount):
+        key = (kind, year, month, type_)
+        self.buckets[key] = self.buckets.get(key, ZERO) + (amount or ZERO)
+
+    def total(self, kind, year=None, month=None):
+        return sum(
+            (
+                amount for (bucket_kind, bucket_year, bucket_month, _), amount in self.buckets.items()
+                if bucket_kind == kind
+                and (year is None or bucket_year == year)
+                and (month is None or bucket_month == month)
+            ),
+            ZERO,
+        )
+
+    def net(self, year=None, month=None):
+        return self.total(REVENUE, year, month) - self.total(EXPENSE, year, month)
+
+    def monthly(self, year):
+        """Revenue, expense and profit of each month of `year`"""
+        months = []
+        for month in range(1, 13):
+            revenue = self.total(REVENUE, year, month)
+            expense = self.total(EXPENSE, year, month)
+            months.append({
+                'month': month,
+                'revenue': float(revenue),
+                'expense': float(expense),
+                'profit': float(revenue - expense),
+            })
+        return months
+
+    def by_type(self, kind, year=None):
+        """[{'<kind>_type': type, 'total': amount}], largest first"""
+        totals = {}
+        for (bucket_kind, bucket_year, _, type_), amount in self.buckets.items():
+            if bucket_kind == kind and (year is None or bucket_year == year):
+                totals[type_] = totals.get(type_, ZERO) + amount
+        field = SOURCES[kind][2]
+        return [
+            {field: type_, 'total': total}
+            for type_, total in sorted(totals.items(), key=lambda item: item[1], reverse=True)
+        ]
+
+    def roi(self, investment, year=None):
+        """Net income over `investment`, in percent (0 without an investment)"""
+        if not investment or investment <= 0:
+            return 0
+        return float(self.net(year)) / float(investment) * 100
+
+
+class PropertyFinancialService:
+    """
+    Service class for per-property revenue / expense figures
+    """
+
+    @staticmethod
+    def load(property_ids):
+        """{property_id: FinancialTimeseries}, read from the monthly rollup in one query"""
+        property_ids = list(property_ids)
+        series = {property_id: FinancialTimeseries() for property_id in property_ids}
+        rows = PropertyMonthlyFinancials.objects.filter(property_id__in=property_ids).values_list(
+            'property_id', 'year', 'month', 'revenue_by_type', 'expense_by_type'
+        )
+        for property_id, year, month, revenue_by_type, expense_by_type in rows:
+            for kind, by_type in ((REVENUE, revenue_by_type), (EXPENSE, expense_by_type)):
+                for type_, amount in by_type.items():
+                    series[property_id].add(kind, year, month, type_, Decimal(amount))
+        return series
+
+    @staticmethod
+    def from_records(revenues, expenses):
+        """FinancialTimeseries of already loaded PropertyRevenue / PropertyExpense rows"""
+        series = FinancialTimeseries()
+        for kind, records in ((REVENUE, revenues), (EXPENSE, expenses)):
+            _, date_field, type_field = SOURCES[kind]
+            for record in records:
+                day = getattr(record, date_field)
+                series.add(kind, day.year, day.month, getattr(record, type_field), record.amount)
+        return series
+
+    @staticmethod
+    def for_property(property_obj):
+        """
+        FinancialTimeseries of one property, from its prefetched revenues and
+        expenses when the caller loaded them, else from the rollup
+        """
+        prefetched = getattr(property_obj, '_prefetched_objects_cache', {})
+        if 'revenues' in prefetched and 'expenses' in prefetched:
+            return PropertyFinancialService.from_records(property_obj.revenues.all(), property_obj.expenses.all())
+        return PropertyFinancialService.load([property_obj.pk])[property_obj.pk]
+
+    @staticmethod
+    def investment(property_obj):
+        return property_obj.purchase_price or property_obj.market_value or 0
+
+    @staticmethod
+    def report(property_obj, series=None, today=None):
+        """Figures of the property financial report"""
+        series = series or PropertyFinancialService.for_property(property_obj)
+        today = today or timezone.now().date()
+        current_year = today.year
+        last_year = current_year - 1
+        investment = PropertyFinancialService.investment(property_obj)
+
+        total_revenue = series.total(REVENUE)
+        total_expenses = series.total(EXPENSE)
+        current_year_revenue = series.total(REVENUE, current_year)
+        current_year_expense = series.total(EXPENSE, current_year)
+        last_year_revenue = series.total(REVENUE, last_year)
+        last_year_expense = series.total(EXPENSE, last_year)
+
+        return {
+            'total_revenue': float(total_revenue),
+            'total_expenses': float(total_expenses),
+            'total_profit': float(total_revenue - total_expenses),
+            'current_year_revenue': float(current_year_revenue),
+            'current_year_expense': float(current_year_expense),
+            'current_year_profit': float(current_year_revenue - current_year_expense),
+            'last_year_revenue': float(last_year_revenue),
+            'last_year_expense': float(last_year_expense),
+            'last_year_profit': float(last_year_revenue - last_year_expense),
+            'current_roi': round(series.roi(investment, current_year), 2),
+            'lifetime_roi': round(series.roi(investment), 2),
+            'monthly_data': series.monthly(current_year),
+            'expense_by_type': series.by_type(EXPENSE, current_year),
+            'revenue_by_type': series.by_type(REVENUE, current_year),
+            'current_year': current_year,
+            'last_year': last_year,
+        }
+
+
+class FinancialRollupService:
+    """
+    Service class for the PropertyMonthlyFinancials rollup
+    """
+
+    @staticmethod
+    def grouped(kind, **filters):
+        """{(property_id, year, month): {type: total}} of the `kind` records matching `filters`"""
+        model, date_field, type_field = SOURCES[kind]
+        rows = model.objects.filter(**filters).order_by().values(
+            'property_id',
+            year=ExtractYear(date_field),
+            month=ExtractMonth(date_field),
+            type=F(type_field),
+        ).annotate(total=Sum('amount'))
+
+        buckets = {}
+        for row in rows:
+            key = (row['property_id'], row['year'], row['month'])
+            buckets.setdefault(key, {})[row['type']] = Decimal(row['total'] or ZERO)
+        return buckets
+
+    @staticmethod
+    def build(property_id, year, month, revenue_by_type, expense_by_type):
+        """Unsaved PropertyMonthlyFinancials of per-type totals"""
+        return PropertyMonthlyFinancials(
+            property_id=property_id,
+            year=year,
+            month=month,
+            revenue=sum(revenue_by_type.values(), ZERO),
+            expenses=sum(expense_by_type.values(), ZERO),
+            revenue_by_type={type_: str(amount.quantize(ZERO)) for type_, amount in revenue_by_type.items()},
+            expense_by_type={type_: str(amount.quantize(ZERO)) for type_, amount in expense_by_type.items()},
+        )
+
+    @staticmethod
+    def refresh(property_id, year, month):
+        """
+        Recompute one property month from its records (deleted when it has
+        none). The month's row is created if needed and locked before the
+        records are summed, so concurrent saves to the same month recompute
+        one after the other and the last one sees every record.
+        """
+        start = date(year, month, 1)
+        end = date(year + month // 12, month % 12 + 1, 1)
+        with transaction.atomic():
+            PropertyMonthlyFinancials.objects.get_or_create(property_id=property_id, year=year, month=month)
+            row = PropertyMonthlyFinancials.objects.select_for_update().get(
+                property_id=property_id, year=year, month=month
+            )
+
+            totals = {}
+            for kind, (_, date_field, _) in SOURCES.items():
+                grouped = FinancialRollupService.grouped(
+                    kind,
+                    property_id=property_id,
+                    **{f'{date_field}__gte': start, f'{date_field}__lt': end},
+                )
+                totals[kind] = grouped.get((property_id, year, month), {})
+
+            if not totals[REVENUE] and not totals[EXPENSE]:
+                row.delete()
+                return None
+
+            fresh = FinancialRollupService.build(property_id, year, month, totals[REVENUE], totals[EXPENSE])
+            for field in ('revenue', 'expenses', 'revenue_by_type', 'expense_by_type'):
+                setattr(row, field, getattr(fresh, field))
+            row.save()
+        return row
+
+    @staticmethod
+    def rebuild(property_ids=None, batch_size=500):
+        """
+        Replace the rollup of the given properties (all by default) from one
+        grouped query per record model; returns the number of rows written
+        """
+        filters = {} if property_ids is None else {'property_id__in': list(property_ids)}
+        revenues = FinancialRollupService.grouped(REVENUE, **filters)
+        expenses = FinancialRollupService.grouped(EXPENSE, **filters)
+        rows = [
+            FinancialRollupService.build(*key, revenues.get(key, {}), expenses.get(key, {}))
+            for key in sorted(set(revenues) | set(expenses))
+        ]
+        with transaction.atomic():
+            PropertyMonthlyFinancials.objects.filter(**filters).delete()
+            PropertyMonthlyFinancials.objects.bulk_create(rows, batch_size=batch_size)
+        return len(rows)
+
+    # ---------------------------------------------------------------
+    # Portfolio figures
+    # ---------------------------------------------------------------
+
+    @staticmethod
+    def totals(**filters):
+        """Revenue and expenses of the rollup rows matching `filters`"""
+        totals = PropertyMonthlyFinancials.objects.filter(**filters).aggregate(
+            revenue=Sum('revenue'),
+            expenses=Sum('expenses'),
+        )
+        return {
+            'revenue': totals['revenue'] or ZERO,
+            'expenses': totals['expenses'] or ZERO,
+        }
+
+    @staticmethod
+    def monthly(since):
+        """[{year, month, revenue, expenses}] of the portfolio from the month of `since` on"""
+        rows = (
+            PropertyMonthlyFinancials.objects.filter(year__gte=since.year)
+            .exclude(year=since.year, month__lt=since.month)
+            .values('year', 'month')
+            .annotate(revenue=Sum('revenue'), expenses=Sum('expenses'))
+            .order_by('year', 'month')
+        )
+        return list(rows)
+
+    @staticmethod
+    def breakdown(field, limit=None, labels=(), **filters):
+        """
+        [{`field`, *`labels`, revenue, expenses, net}] of the portfolio grouped
+        by a Property field (e.g. 'city', 'owner_id'), highest net first;
+        `labels` are Property fields shown with each group that are determined
+        by `field` (e.g. 'owner__name' for 'owner_id'), so they do not split it
+        """
+        fields = (field,) + tuple(labels)
+        rows = (
+            PropertyMonthlyFinancials.objects.filter(**filters)
+            .values(*[f'property__{name}' for name in fields])
+            .annotate(revenue=Sum('revenue'), expenses=Sum('expenses'))
+            .annotate(net=F('revenue') - F('expenses'))
+            .order_by('-net')
+        )
+        rows = rows[:limit] if limit else rows
+        return [
+            {
+                **{name: row[f'property__{name}'] for name in fields},
+                'revenue': row['revenue'],
+                'expenses': row['expenses'],
+                'net': row['net'],
+            }
+            for row in rows
+        ]
+
+
+# ===================================================================
+# ROLLUP MAINTENANCE
+# ===================================================================
+
+def _date_field(model):
+    return SOURCES[REVENUE if model is PropertyRevenue else EXPENSE][1]
+
+
+def _month(instance):
+    day = getattr(instance, _date_field(type(instance)))
+    return instance.property_id, day.year, day.month
+
+
+def _record_changing(sender, instance, raw=False, **kwargs):
+    """Remember the month an edited record was in, it may move out of it"""
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list('property_id', _date_field(sender)).first()
+    instance._rollup_previous_month = (previous[0], previous[1].year, previous[1].month) if previous else None
+
+
+def _record_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    current = _month(instance)
+    FinancialRollupService.refresh(*current)
+    previous = getattr(instance, '_rollup_previous_month', None)
+    if previous and previous != current:
+        FinancialRollupService.refresh(*previous)
+
+
+def _record_deleted(sender, instance, origin=None, **kwargs):
+    # Records deleted along with their property (or its owner) take the
+    # property's rollup rows with them
+    if origin is not None and getattr(origin, 'model', type(origin)) is not sender:
+        return
+    FinancialRollupService.refresh(*_month(instance))
+
+
+def connect_signals():
+    for model in (PropertyRevenue, PropertyExpense):
+        label = model._meta.label_lower
+        pre_save.connect(_record_changing, sender=model, dispatch_uid=f'rollup-{label}-pre-save')
+        post_save.connect(_record_saved, sender=model, dispatch_uid=f'rollup-{label}-save')
+        post_delete.connect(_record_deleted, sender=model, dispatch_uid=f'rollup-{label}-delete')
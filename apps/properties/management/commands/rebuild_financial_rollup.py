@@ -0,0 +1,18 @@
+"""
+Management command to rebuild the monthly property financials rollup
+Usage: python manage.py rebuild_financial_rollup [--property ID ...]
+"""
+from django.core.management.base import BaseCommand
+
+from apps.properties.financials import FinancialRollupService
+
+
+class Command(BaseCommand):
+    help = 'Recompute PropertyMonthlyFinancials from the revenue and expense records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--property', type=int, action='append', help='Only rebuild this property id (repeatable)')
+
+    def handle(self, *args, **options):
+        count = FinancialRollupService.rebuild(options['property'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Wrote {count} property months'))
@@ -0,0 +1,75 @@
+import re
+
+from django.db import migrations
+
+# Frozen copy of the property search index layout and normalization as of
+# this migration, later changes to apps.core.search do not apply here
+SEARCH_TABLE = 'properties_search'
+SEARCH_FIELDS = ['code', 'title', 'address', 'city', 'district']
+
+ARABIC_DIACRITICS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+ARABIC_FOLDING = str.maketrans({
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    'ٱ': 'ا',
+    'ى': 'ي',
+    'ئ': 'ي',
+    'ؤ': 'و',
+    'ة': 'ه',
+    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
+    '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
+})
+TOKEN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN.findall(ARABIC_DIACRITICS.sub('', text or '').translate(ARABIC_FOLDING).casefold())
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in ('sqlite', 'postgresql'):
+        # Other databases search with icontains filters, no index table
+        return
+
+    Property = apps.get_model('properties', 'Property')
+    rows = [
+        (row[0], ' '.join(' '.join(tokenize(value)) for value in row[1:]))
+        for row in Property.objects.values_list('pk', *SEARCH_FIELDS).order_by('pk')
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+                f"USING fts5(document, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+            cursor.executemany(f'INSERT INTO {SEARCH_TABLE} (rowid, document) VALUES (%s, %s)', rows)
+        else:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} '
+                f'(property_id bigint PRIMARY KEY, document tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)'
+            )
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (property_id, document) VALUES (%s, to_tsvector('simple', %s))",
+                rows
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0004_property_created_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
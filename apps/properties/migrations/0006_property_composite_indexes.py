@@ -0,0 +1,35 @@
+# Generated by Django 5.0 on 2026-10-18 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0002_contract_status_end_date_index'),
+        ('owners', '0002_remove_owner_tax_number_owner_mobile_owner_tax_id'),
+        ('properties', '0005_property_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='property',
+            name='properties__status_6427a0_idx',
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['status', 'rental_price_monthly'], name='properties__status_ad123d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['status', 'created_at'], name='properties__status_8e4eb2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertyexpense',
+            index=models.Index(fields=['property', 'expense_date'], name='properties__propert_0fb22d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertyrevenue',
+            index=models.Index(fields=['property', 'revenue_date'], name='properties__propert_e0271b_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.0 on 2026-10-18 07:21
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def populate_rollup(apps, schema_editor):
+    PropertyMonthlyFinancials = apps.get_model('properties', 'PropertyMonthlyFinancials')
+    buckets = {}
+    for model_name, date_field, type_field, kind in (
+        ('PropertyRevenue', 'revenue_date', 'revenue_type', 'revenue'),
+        ('PropertyExpense', 'expense_date', 'expense_type', 'expense'),
+    ):
+        rows = apps.get_model('properties', model_name).objects.order_by().values(
+            'property_id',
+            year=ExtractYear(date_field),
+            month=ExtractMonth(date_field),
+            type=F(type_field),
+        ).annotate(total=Sum('amount'))
+        for row in rows:
+            bucket = buckets.setdefault((row['property_id'], row['year'], row['month']), {'revenue': {}, 'expense': {}})
+            bucket[kind][row['type']] = row['total']
+
+    PropertyMonthlyFinancials.objects.bulk_create([
+        PropertyMonthlyFinancials(
+            property_id=property_id,
+            year=year,
+            month=month,
+            revenue=sum(bucket['revenue'].values()),
+            expenses=sum(bucket['expense'].values()),
+            revenue_by_type={type_: str(Decimal(amount).quantize(Decimal('0.00'))) for type_, amount in bucket['revenue'].items()},
+            expense_by_type={type_: str(Decimal(amount).quantize(Decimal('0.00'))) for type_, amount in bucket['expense'].items()},
+        )
+        for (property_id, year, month), bucket in sorted(buckets.items())
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0006_property_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyMonthlyFinancials',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Year')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Month')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Revenue')),
+                ('expenses', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Expenses')),
+                ('revenue_by_type', models.JSONField(blank=True, default=dict, verbose_name='Revenue by Type')),
+                ('expense_by_type', models.JSONField(blank=True, default=dict, verbose_name='Expenses by Type')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_financials', to='properties.property', verbose_name='Property')),
+            ],
+            options={
+                'verbose_name': 'Property Monthly Financials',
+                'verbose_name_plural': 'Property Monthly Financials',
+                'ordering': ['property', 'year', 'month'],
+                'indexes': [models.Index(fields=['year', 'month'], name='properties__year_6aa95c_idx')],
+                'unique_together': {('property', 'year', 'month')},
+            },
+        ),
+        migrations.RunPython(populate_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0 on 2026-10-18 07:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0007_property_monthly_financials'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyMetricsRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True, verbose_name='Started At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+                ('since', models.DateTimeField(blank=True, help_text='Incremental run: only properties with activity after this time', null=True, verbose_name='Since')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('success', 'Success'), ('failed', 'Failed')], default='running', max_length=20, verbose_name='Status')),
+                ('properties_scanned', models.PositiveIntegerField(default=0, verbose_name='Properties Scanned')),
+                ('rows_changed', models.PositiveIntegerField(default=0, verbose_name='Rows Changed')),
+                ('duration_ms', models.PositiveIntegerField(blank=True, null=True, verbose_name='Duration (ms)')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+            ],
+            options={
+                'verbose_name': 'Property Metrics Run',
+                'verbose_name_plural': 'Property Metrics Runs',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
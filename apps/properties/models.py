@@ -176,9 +176,12 @@ class Property(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['code']),
-            models.Index(fields=['status']),
+            # List filters: status with a rent range, or status sorted by newest
+            models.Index(fields=['status', 'rental_price_monthly']),
+            models.Index(fields=['status', 'created_at']),
             models.Index(fields=['city']),
             models.Index(fields=['is_active']),
+            models.Index(fields=['created_at', 'id']),
         ]
 
     def __str__(self):
@@ -496,6 +499,9 @@ class PropertyExpense(models.Model):
         verbose_name = _('Property Expense')
         verbose_name_plural = _('Property Expenses')
         ordering = ['-expense_date']
+        indexes = [
+            models.Index(fields=['property', 'expense_date']),
+        ]
 
     def __str__(self):
         return f"{self.property.code} - {self.expense_type}"
@@ -544,6 +550,93 @@ class PropertyRevenue(models.Model):
         verbose_name = _('Property Revenue')
         verbose_name_plural = _('Property Revenues')
         ordering = ['-revenue_date']
+        indexes = [
+            models.Index(fields=['property', 'revenue_date']),
+        ]
 
     def __str__(self):
         return f"{self.property.code} - {self.revenue_type}"
+
+
+class PropertyMonthlyFinancials(models.Model):
+    """
+    Revenue and expense totals of one property for one calendar month.
+    A rollup of PropertyRevenue / PropertyExpense kept current by their
+    save / delete signals (see apps.properties.financials), rebuilt with
+    `manage.py rebuild_financial_rollup`.
+    """
+    property = models.ForeignKey(
+        Property,
+        on_delete=models.CASCADE,
+        related_name='monthly_financials',
+        verbose_name=_('Property')
+    )
+    year = models.PositiveSmallIntegerField(_('Year'))
+    month = models.PositiveSmallIntegerField(_('Month'))
+    revenue = models.DecimalField(
+        _('Revenue'),
+        max_digits=15,
+        decimal_places=2,
+        default=0
+    )
+    expenses = models.DecimalField(
+        _('Expenses'),
+        max_digits=15,
+        decimal_places=2,
+        default=0
+    )
+    # {revenue_type / expense_type: amount as a decimal string}
+    revenue_by_type = models.JSONField(_('Revenue by Type'), default=dict, blank=True)
+    expense_by_type = models.JSONField(_('Expenses by Type'), default=dict, blank=True)
+    updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('Property Monthly Financials')
+        verbose_name_plural = _('Property Monthly Financials')
+        ordering = ['property', 'year', 'month']
+        unique_together = ['property', 'year', 'month']
+        indexes = [
+            models.Index(fields=['year', 'month']),
+        ]
+
+    def __str__(self):
+        return f"{self.property.code} - {self.year}-{self.month:02d}"
+
+
+class PropertyMetricsRun(models.Model):
+    """
+    Log of one recomputation of Property.occupancy_rate and average_roi
+    (see apps.properties.analytics.PropertyMetricsJob)
+    """
+    STATUS_CHOICES = [
+        ('running', _('Running')),
+        ('success', _('Success')),
+        ('failed', _('Failed')),
+    ]
+
+    started_at = models.DateTimeField(_('Started At'), auto_now_add=True)
+    finished_at = models.DateTimeField(_('Finished At'), null=True, blank=True)
+    since = models.DateTimeField(
+        _('Since'),
+        null=True,
+        blank=True,
+        help_text=_('Incremental run: only properties with activity after this time')
+    )
+    status = models.CharField(
+        _('Status'),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='running'
+    )
+    properties_scanned = models.PositiveIntegerField(_('Properties Scanned'), default=0)
+    rows_changed = models.PositiveIntegerField(_('Rows Changed'), default=0)
+    duration_ms = models.PositiveIntegerField(_('Duration (ms)'), null=True, blank=True)
+    error = models.TextField(_('Error'), blank=True)
+
+    class Meta:
+        verbose_name = _('Property Metrics Run')
+        verbose_name_plural = _('Property Metrics Runs')
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"{self.started_at:%Y-%m-%d %H:%M} - {self.get_status_display()}"
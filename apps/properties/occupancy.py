@@ -0,0 +1,269 @@
+"""
+Occupancy Timeline for Origin App
+Per-property interval trees over contract date ranges (start_date to
+end_date inclusive, statuses in OCCUPYING_STATUSES), answering:
+
+- is the property occupied on a date, and under which contracts
+- vacancy gaps within a date range
+- overlapping (double-booked) contracts
+
+in logarithmic time once built; portfolio occupancy on a date is a single
+COUNT query (PortfolioOccupancy). Used by the occupancy history page, its
+JSON timeline, and contract validation to reject double bookings.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from .analytics import OCCUPYING_STATUSES, clip_intervals, covered_days, interval_gaps, merge_intervals
+
+
+# A contract in one of these statuses may not overlap an occupying contract
+BOOKING_STATUSES = ('draft',) + OCCUPYING_STATUSES
+
+# Contract fields the double-booking check depends on; edits leaving them
+# alone are not checked, so a contract that already overlaps stays editable
+BOOKING_FIELDS = ('property', 'start_date', 'end_date', 'status')
+
+
+def contract_range(contract):
+    """Half-open [start, end) ordinals of a contract, end_date being its last day"""
+    return contract.start_date.toordinal(), contract.end_date.toordinal() + 1
+
+
+class IntervalTree:
+    """
+    Static interval tree over half-open (start, end, payload) ranges. The
+    ranges sorted by start form an implicit balanced binary tree (the middle
+    of every slice is the root of that slice), each node holding the largest
+    end of its subtree, so an overlap query visits O(log n + k) nodes.
+    """
+
+    def __init__(self, intervals):
+        self.intervals = sorted(intervals, key=lambda interval: (interval[0], interval[1]))
+        self.max_end = [0] * len(self.intervals)
+        self._build(0, len(self.intervals))
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def _build(self, lo, hi):
+        if lo >= hi:
+            return 0
+        mid = (lo + hi) // 2
+        self.max_end[mid] = max(self.intervals[mid][1], self._build(lo, mid), self._build(mid + 1, hi))
+        return self.max_end[mid]
+
+    def _search(self, lo, hi, start, end, found):
+        if lo >= hi:
+            return
+        mid = (lo + hi) // 2
+        if self.max_end[mid] <= start:
+            # Nothing in this subtree ends after `start`
+            return
+        self._search(lo, mid, start, end, found)
+        if self.intervals[mid][0] < end:
+            if self.intervals[mid][1] > start:
+                found.append(mid)
+            self._search(mid + 1, hi, start, end, found)
+
+    def positions(self, start, end):
+        """Positions (in start order) of the ranges overlapping [start, end)"""
+        found = []
+        self._search(0, len(self.intervals), start, end, found)
+        return found
+
+    def overlapping(self, start, end):
+        """Ranges overlapping [start, end), ordered by start"""
+        return [self.intervals[position] for position in self.positions(start, end)]
+
+    def at(self, day):
+        """Ranges containing the ordinal `day`"""
+        return self.overlapping(day, day + 1)
+
+    def overlaps(self):
+        """Pairs of ranges overlapping each other, each pair once"""
+        pairs = []
+        for position, (start, end, _payload) in enumerate(self.intervals):
+            for other in self.positions(start, end):
+                if other > position:
+                    pairs.append((self.intervals[position], self.intervals[other]))
+        return pairs
+
+
+class OccupancyTimeline:
+    """
+    Occupancy of one property from its contracts
+    """
+
+    def __init__(self, contracts):
+        self.contracts = list(contracts)
+        self.tree = IntervalTree(
+            contract_range(contract) + (contract,)
+            for contract in self.contracts
+            if contract.status in OCCUPYING_STATUSES
+        )
+        # Disjoint occupied ranges, overlapping contracts counted once
+        self.occupied = merge_intervals((start, end) for start, end, _contract in self.tree.intervals)
+        self._starts = [start for start, _end in self.occupied]
+
+    @staticmethod
+    def for_property(property_id):
+        from apps.contracts.models import Contract
+
+        return OccupancyTimeline(
+            Contract.objects.filter(property_id=property_id).select_related('client').order_by('start_date', 'pk')
+        )
+
+    def _occupied_within(self, start, end):
+        lo = max(bisect_right(self._starts, start) - 1, 0)
+        hi = bisect_left(self._starts, end)
+        return clip_intervals(self.occupied[lo:hi], start, end)
+
+    def is_occupied(self, day):
+        day = day.toordinal()
+        index = bisect_right(self._starts, day) - 1
+        return index >= 0 and self.occupied[index][1] > day
+
+    def contracts_on(self, day):
+        return [contract for _start, _end, contract in self.tree.at(day.toordinal())]
+
+    def occupied_days(self, start, end):
+        """Occupied days from `start` up to, not including, `end`"""
+        return covered_days(self._occupied_within(start.toordinal(), end.toordinal()))
+
+    def gaps(self, start, end):
+        """[(first vacant day, first day let again)] from `start` up to, not including, `end`"""
+        start, end = start.toordinal(), end.toordinal()
+        return [
+            (date.fromordinal(gap_start), date.fromordinal(gap_end))
+            for gap_start, gap_end in interval_gaps(self._occupied_within(start, end), start, end)
+        ]
+
+    def conflicts(self, start_date, end_date, exclude=None):
+        """Occupying contracts overlapping start_date..end_date (inclusive), except `exclude` (a pk)"""
+        start, end = start_date.toordinal(), end_date.toordinal() + 1
+        return [
+            contract for _start, _end, contract in self.tree.overlapping(start, end)
+            if exclude is None or contract.pk != exclude
+        ]
+
+    def double_bookings(self):
+        """[(contract, contract)] of occupying contracts overlapping each other"""
+        return [(first[2], second[2]) for first, second in self.tree.overlaps()]
+
+    def span(self):
+        """From the first contract start up to and including today"""
+        end = timezone.now().date() + timedelta(days=1)
+        start = min((contract.start_date for contract in self.contracts), default=end)
+        return start, end
+
+    def as_json(self, start=None, end=None):
+        """Timeline of [start, end), by default the span() extended to the last contract end"""
+        if start is None or end is None:
+            start, end = self.span()
+            end = max([end] + [contract.end_date + timedelta(days=1) for contract in self.contracts])
+        days = (end - start).days
+        occupied_days = self.occupied_days(start, end)
+        return {
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'occupied_days': occupied_days,
+            'occupancy_rate': round(occupied_days / days * 100, 2) if days > 0 else 0,
+            'occupied_today': self.is_occupied(timezone.now().date()),
+            'contracts': [
+                {
+                    'id': contract.pk,
+                    'contract_number': contract.contract_number,
+                    'client': contract.client.name if contract.client_id else None,
+                    'start': contract.start_date.isoformat(),
+                    'end': contract.end_date.isoformat(),
+                    'status': contract.status,
+                    'occupying': contract.status in OCCUPYING_STATUSES,
+                }
+                for contract in self.contracts
+                if contract.start_date < end and contract.end_date >= start
+            ],
+            'occupied': [
+                {'start': date.fromordinal(range_start).isoformat(), 'end': date.fromordinal(range_end).isoformat()}
+                for range_start, range_end in self._occupied_within(start.toordinal(), end.toordinal())
+            ],
+            'vacancies': [
+                {'start': gap_start.isoformat(), 'end': gap_end.isoformat(), 'days': (gap_end - gap_start).days}
+                for gap_start, gap_end in self.gaps(start, end)
+            ],
+            'double_bookings': [
+                [first.contract_number, second.contract_number]
+                for first, second in self.double_bookings()
+            ],
+        }
+
+    @staticmethod
+    def for_properties(property_ids):
+        """{property_id: OccupancyTimeline} of the occupying contracts, in one query"""
+        from apps.contracts.models import Contract
+
+        contracts = {property_id: [] for property_id in property_ids}
+        rows = Contract.objects.filter(
+            property_id__in=property_ids,
+            status__in=OCCUPYING_STATUSES,
+        ).order_by('start_date', 'pk')
+        for contract in rows:
+            contracts[contract.property_id].append(contract)
+        return {property_id: OccupancyTimeline(rows) for property_id, rows in contracts.items()}
+
+    def booking_message(self, start_date, end_date, exclude=None):
+        """Validation message when start_date..end_date double-books the property, else None"""
+        conflicts = self.conflicts(start_date, end_date, exclude)
+        if not conflicts:
+            return None
+        conflict = conflicts[0]
+        return _('The property is already let from %(start)s to %(end)s under contract %(number)s.') % {
+            'start': conflict.start_date,
+            'end': conflict.end_date,
+            'number': conflict.contract_number,
+        }
+
+    @staticmethod
+    def booking_error(property_id, start_date, end_date, status, exclude=None):
+        """
+        Validation message when a contract with these values would double-book
+        the property, else None
+        """
+        if not (property_id and start_date and end_date) or status not in BOOKING_STATUSES:
+            return None
+        return OccupancyTimeline.for_property(property_id).booking_message(start_date, end_date, exclude)
+
+
+class PortfolioOccupancy:
+    """
+    Occupied properties of the portfolio on one date: the properties with an
+    occupying contract covering it, counted by the database
+    """
+
+    @staticmethod
+    def occupied_count(day):
+        """One COUNT(DISTINCT property_id), overlapping contracts of a property count once"""
+        from apps.contracts.models import Contract
+
+        return Contract.objects.filter(
+            status__in=OCCUPYING_STATUSES,
+            start_date__lte=day,
+            end_date__gte=day,
+        ).aggregate(count=Count('property_id', distinct=True))['count']
+
+    @staticmethod
+    def on(day):
+        """{total_properties, occupied_properties, occupancy_rate} on `day`"""
+        from .models import Property
+
+        total = Property.objects.count()
+        occupied = PortfolioOccupancy.occupied_count(day)
+        return {
+            'total_properties': total,
+            'occupied_properties': occupied,
+            'occupancy_rate': round(occupied / total * 100, 2) if total else 0,
+        }
@@ -0,0 +1,28 @@
+"""
+Background tasks for Properties module
+"""
+from celery import shared_task
+from django.conf import settings
+
+from apps.core.tasks import claim_task, release_task
+
+
+@shared_task
+def recompute_property_metrics(since_last_run=False):
+    """
+    Nightly recomputation of Property.occupancy_rate and average_roi (see
+    CELERY_BEAT_SCHEDULE); with `since_last_run` only properties with
+    activity since the last successful run. Overlapping runs are skipped.
+    """
+    from .analytics import PropertyMetricsJob
+
+    key = 'recompute-property-metrics'
+    if not claim_task(key, timeout=settings.PROPERTY_METRICS_LOCK_TIMEOUT):
+        return None
+
+    try:
+        since = PropertyMetricsJob.last_success() if since_last_run else None
+        run = PropertyMetricsJob.run(since=since)
+    finally:
+        release_task(key)
+    return {'scanned': run.properties_scanned, 'changed': run.rows_changed, 'duration_ms': run.duration_ms}
@@ -0,0 +1,208 @@
+"""
+Portfolio analytics tests for Origin App
+PortfolioAnalytics.compute against a brute-force walk over every day of the
+period, and the figures PortfolioAnalytics.recompute stores: occupancy rate
+and the annualised net yield as average_roi, clamped to ±999.99.
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+
+from apps.clients.models import Client
+from apps.contracts.models import Contract
+from apps.owners.models import Owner
+from apps.properties.analytics import OCCUPYING_STATUSES, PortfolioAnalytics
+from apps.properties.models import Property, PropertyExpense, PropertyRevenue, PropertyType, PropertyValuation
+
+
+def brute_force(prop, start, end):
+    """The metrics of `prop` over [start, end), one day at a time"""
+    days = [start + timedelta(days=offset) for offset in range((end - start).days)]
+    leases = [
+        (contract.start_date, contract.end_date)
+        for contract in Contract.objects.filter(property=prop, status__in=OCCUPYING_STATUSES)
+    ]
+    occupied = {day for day in days if any(first <= day <= last for first, last in leases)}
+    months = sorted({(day.year, day.month) for day in days})
+
+    def total(records, date_field, in_period=True):
+        return sum(
+            (
+                record.amount for record in records
+                if not in_period or (getattr(record, date_field).year, getattr(record, date_field).month) in months
+            ),
+            Decimal('0'),
+        )
+
+    revenues, expenses = list(prop.revenues.all()), list(prop.expenses.all())
+    revenue = total(revenues, 'revenue_date')
+    net_income = revenue - total(expenses, 'expense_date')
+    lifetime_net = total(revenues, 'revenue_date', False) - total(expenses, 'expense_date', False)
+
+    latest = prop.valuations.order_by('valuation_date', 'pk').last()
+    value = (latest and latest.valuation_amount) or prop.market_value or prop.purchase_price
+    investment = prop.purchase_price or prop.market_value
+    annual = 365 / len(days)
+
+    return {
+        'occupied_days': len(occupied),
+        'vacant_days': len(days) - len(occupied),
+        'occupancy_rate': len(occupied) / len(days) * 100,
+        'monthly_occupancy': [
+            {
+                'year': year,
+                'month': month,
+                'occupancy_rate': (
+                    len([day for day in occupied if (day.year, day.month) == (year, month)])
+                    / len([day for day in days if (day.year, day.month) == (year, month)]) * 100
+                ),
+            }
+            for year, month in months
+        ],
+        'revenue': revenue,
+        'net_income': net_income,
+        'gross_yield': float(revenue) * annual / float(value) * 100 if value else 0.0,
+        'cap_rate': float(net_income) * annual / float(value) * 100 if value else 0.0,
+        'net_yield': float(net_income) * annual / float(investment) * 100 if investment else 0.0,
+        'roi': float(lifetime_net) / float(investment) * 100 if investment else 0.0,
+    }
+
+
+class PortfolioAnalyticsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = Owner.objects.create(name='Analytics Owner', phone='01000000000', national_id='29001010000001')
+        cls.property_type = PropertyType.objects.create(name='Apartment')
+        cls.client_record = Client.objects.create(
+            name='Analytics Tenant', phone='01000000001', national_id='29001010000002', address='Cairo'
+        )
+
+    @classmethod
+    def property(cls, code, **values):
+        return Property.objects.create(
+            title=f'Analytics Flat {code}',
+            code=code,
+            property_type=cls.property_type,
+            owner=cls.owner,
+            address='1 Nile Street',
+            city='Cairo',
+            area_sqm=Decimal('120'),
+            **values
+        )
+
+    def contract(self, number, prop, start_date, end_date, status='active'):
+        return Contract.objects.create(
+            contract_number=number,
+            property=prop,
+            client=self.client_record,
+            start_date=start_date,
+            end_date=end_date,
+            rent_amount=Decimal('5000'),
+            status=status,
+        )
+
+    def assertMetricsMatch(self, metrics, expected):
+        for field in ('occupied_days', 'vacant_days', 'revenue', 'net_income'):
+            self.assertEqual(metrics[field], expected[field], field)
+        for field in ('occupancy_rate', 'gross_yield', 'cap_rate', 'net_yield', 'roi'):
+            self.assertAlmostEqual(metrics[field], expected[field], places=6, msg=field)
+        self.assertEqual(len(metrics['monthly_occupancy']), len(expected['monthly_occupancy']))
+        for month, expected_month in zip(metrics['monthly_occupancy'], expected['monthly_occupancy']):
+            self.assertEqual((month['year'], month['month']), (expected_month['year'], expected_month['month']))
+            self.assertAlmostEqual(month['occupancy_rate'], expected_month['occupancy_rate'], places=6)
+
+    def test_compute_matches_brute_force(self):
+        rnd = random.Random(22)
+
+        def random_day(first_year=2024, last_year=2027):
+            return date(rnd.randint(first_year, last_year), rnd.randint(1, 12), rnd.randint(1, 28))
+
+        def random_amount(low=1, high=10000000):
+            return Decimal(rnd.randint(low, high)) / 100
+
+        properties = []
+        for number in range(6):
+            prop = self.property(
+                f'ANA-{number}',
+                purchase_price=rnd.choice([None, random_amount(100000, 500000000)]),
+                market_value=rnd.choice([None, random_amount(100000, 500000000)]),
+            )
+            properties.append(prop)
+            for index in range(rnd.randint(0, 6)):
+                start_date = random_day(2024, 2026)
+                self.contract(
+                    f'ANA-{number}-{index}',
+                    prop,
+                    start_date,
+                    start_date + timedelta(days=rnd.randint(0, 400)),
+                    status=rnd.choice(['active', 'expired', 'renewed', 'terminated', 'draft']),
+                )
+            for _ in range(rnd.randint(0, 12)):
+                PropertyRevenue.objects.create(property=prop, revenue_date=random_day(), amount=random_amount())
+                PropertyExpense.objects.create(property=prop, expense_date=random_day(), amount=random_amount())
+            for _ in range(rnd.randint(0, 3)):
+                PropertyValuation.objects.create(
+                    property=prop, valuation_date=random_day(), valuation_amount=random_amount(100000, 500000000)
+                )
+        # Figures without an investment or a value at all
+        properties.append(self.property('ANA-EMPTY'))
+
+        frame = PortfolioAnalytics.load([prop.pk for prop in properties])
+        periods = [
+            PortfolioAnalytics.default_period(date(2026, 10, 18)),
+            (date(2025, 2, 14), date(2025, 2, 15)),
+            (date(2024, 11, 17), date(2026, 3, 3)),
+            (date(2025, 12, 31), date(2026, 1, 1)),
+        ]
+        for start, end in periods:
+            metrics = PortfolioAnalytics.compute(frame, start, end)
+            for prop in properties:
+                with self.subTest(period=(start, end), property=prop.code):
+                    self.assertMetricsMatch(metrics[prop.pk], brute_force(prop, start, end))
+
+    def test_default_period_is_the_last_twelve_months(self):
+        self.assertEqual(
+            PortfolioAnalytics.default_period(date(2026, 10, 18)), (date(2025, 11, 1), date(2026, 10, 19))
+        )
+        self.assertEqual(
+            PortfolioAnalytics.default_period(date(2026, 1, 31)), (date(2025, 2, 1), date(2026, 2, 1))
+        )
+
+    def test_recompute_stores_occupancy_and_net_yield(self):
+        prop = self.property('ANA-R', purchase_price=Decimal('1000000'), market_value=Decimal('1500000'))
+        self.contract('ANA-R-1', prop, date(2026, 1, 1), date(2026, 3, 31))
+        PropertyRevenue.objects.create(property=prop, revenue_date=date(2026, 2, 1), amount=Decimal('30000'))
+        PropertyExpense.objects.create(property=prop, expense_date=date(2026, 2, 5), amount=Decimal('5000'))
+        # Outside the period: only in the lifetime roi
+        PropertyRevenue.objects.create(property=prop, revenue_date=date(2020, 2, 1), amount=Decimal('90000'))
+        start, end = date(2026, 1, 1), date(2026, 7, 1)
+
+        metrics = PortfolioAnalytics.compute(PortfolioAnalytics.load([prop.pk]), start, end)[prop.pk]
+        self.assertEqual(metrics['occupied_days'], 90)
+        # 25000 over 181 days on a 1000000 investment, annualised
+        self.assertAlmostEqual(metrics['net_yield'], 25000 * 365 / 181 / 1000000 * 100)
+        self.assertAlmostEqual(metrics['roi'], 11.5)
+
+        self.assertEqual(PortfolioAnalytics.recompute([prop.pk], start, end), 1)
+        prop.refresh_from_db()
+        self.assertEqual(prop.occupancy_rate, Decimal('49.72'))
+        self.assertEqual(prop.average_roi, Decimal('5.04'))
+        # Unchanged figures are not written again
+        self.assertEqual(PortfolioAnalytics.recompute([prop.pk], start, end), 0)
+
+    def test_recompute_clamps_to_the_percentage_field(self):
+        gain = self.property('ANA-GAIN', purchase_price=Decimal('100'))
+        loss = self.property('ANA-LOSS', purchase_price=Decimal('100'))
+        PropertyRevenue.objects.create(property=gain, revenue_date=date(2026, 2, 1), amount=Decimal('50000'))
+        PropertyExpense.objects.create(property=loss, expense_date=date(2026, 2, 1), amount=Decimal('50000'))
+
+        PortfolioAnalytics.recompute([gain.pk, loss.pk], date(2026, 1, 1), date(2027, 1, 1))
+
+        gain.refresh_from_db()
+        loss.refresh_from_db()
+        self.assertEqual(gain.average_roi, Decimal('999.99'))
+        self.assertEqual(loss.average_roi, Decimal('-999.99'))
+        self.assertEqual(gain.occupancy_rate, Decimal('0.00'))
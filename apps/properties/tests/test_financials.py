@@ -0,0 +1,182 @@
+"""
+Monthly financial rollup tests for Origin App
+The PropertyMonthlyFinancials rows kept up to date by the revenue and expense
+signals must always equal a FinancialRollupService.rebuild() from the records.
+"""
+import random
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.owners.models import Owner
+from apps.properties.financials import FinancialRollupService
+from apps.properties.models import (
+    Property,
+    PropertyExpense,
+    PropertyMonthlyFinancials,
+    PropertyRevenue,
+    PropertyType,
+)
+
+
+def rollup():
+    """Every rollup row as comparable tuples"""
+    return sorted(PropertyMonthlyFinancials.objects.values_list(
+        'property_id', 'year', 'month', 'revenue', 'expenses', 'revenue_by_type', 'expense_by_type'
+    ))
+
+
+class FinancialRollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = Owner.objects.create(name='Rollup Owner', phone='01000000000', national_id='29001010000001')
+        property_type = PropertyType.objects.create(name='Apartment')
+        cls.properties = [
+            Property.objects.create(
+                title=f'Rollup Flat {number}',
+                code=f'ROL-{number}',
+                property_type=property_type,
+                owner=owner,
+                address='1 Nile Street',
+                city='Cairo',
+                area_sqm=Decimal('120'),
+            )
+            for number in range(3)
+        ]
+        cls.first, cls.second = cls.properties[:2]
+        cls.owner = owner
+
+    def month(self, prop, year, month):
+        return PropertyMonthlyFinancials.objects.filter(property=prop, year=year, month=month).first()
+
+    def assertRollupMatchesRebuild(self):
+        live = rollup()
+        FinancialRollupService.rebuild()
+        self.assertEqual(live, rollup())
+
+    def test_saved_records_are_rolled_up_by_type(self):
+        PropertyRevenue.objects.create(
+            property=self.first, revenue_date=date(2026, 5, 3), revenue_type='rent', amount=Decimal('5000')
+        )
+        PropertyRevenue.objects.create(
+            property=self.first, revenue_date=date(2026, 5, 20), revenue_type='parking', amount=Decimal('10.50')
+        )
+        PropertyExpense.objects.create(
+            property=self.first, expense_date=date(2026, 5, 31), expense_type='tax', amount=Decimal('300')
+        )
+
+        row = self.month(self.first, 2026, 5)
+        self.assertEqual((row.revenue, row.expenses), (Decimal('5010.50'), Decimal('300.00')))
+        self.assertEqual(row.revenue_by_type, {'rent': '5000.00', 'parking': '10.50'})
+        self.assertEqual(row.expense_by_type, {'tax': '300.00'})
+        self.assertRollupMatchesRebuild()
+
+    def test_moving_a_record_to_another_month(self):
+        revenue = PropertyRevenue.objects.create(
+            property=self.first, revenue_date=date(2026, 5, 3), amount=Decimal('100')
+        )
+        revenue.revenue_date = date(2026, 6, 1)
+        revenue.save()
+
+        self.assertIsNone(self.month(self.first, 2026, 5))
+        self.assertEqual(self.month(self.first, 2026, 6).revenue, Decimal('100'))
+        self.assertRollupMatchesRebuild()
+
+    def test_moving_a_record_to_another_property(self):
+        PropertyExpense.objects.create(property=self.first, expense_date=date(2026, 5, 3), amount=Decimal('40'))
+        expense = PropertyExpense.objects.create(
+            property=self.first, expense_date=date(2026, 5, 9), amount=Decimal('60')
+        )
+        expense.property = self.second
+        expense.save()
+
+        self.assertEqual(self.month(self.first, 2026, 5).expenses, Decimal('40'))
+        self.assertEqual(self.month(self.second, 2026, 5).expenses, Decimal('60'))
+        self.assertRollupMatchesRebuild()
+
+    def test_queryset_delete(self):
+        PropertyRevenue.objects.create(property=self.first, revenue_date=date(2026, 5, 3), amount=Decimal('100'))
+        PropertyRevenue.objects.create(property=self.first, revenue_date=date(2026, 6, 3), amount=Decimal('200'))
+        PropertyExpense.objects.create(property=self.first, expense_date=date(2026, 6, 9), amount=Decimal('50'))
+
+        PropertyRevenue.objects.filter(property=self.first).delete()
+
+        self.assertIsNone(self.month(self.first, 2026, 5))
+        row = self.month(self.first, 2026, 6)
+        self.assertEqual((row.revenue, row.expenses), (Decimal('0.00'), Decimal('50.00')))
+
+        PropertyExpense.objects.filter(property=self.first).delete()
+        self.assertFalse(PropertyMonthlyFinancials.objects.filter(property=self.first).exists())
+        self.assertRollupMatchesRebuild()
+
+    def test_cascade_delete_from_property(self):
+        for prop in (self.first, self.second):
+            PropertyRevenue.objects.create(property=prop, revenue_date=date(2026, 5, 3), amount=Decimal('100'))
+            PropertyExpense.objects.create(property=prop, expense_date=date(2026, 5, 9), amount=Decimal('30'))
+        first_pk = self.first.pk
+
+        Property.objects.get(pk=first_pk).delete()
+
+        self.assertFalse(PropertyMonthlyFinancials.objects.filter(property_id=first_pk).exists())
+        self.assertEqual(self.month(self.second, 2026, 5).revenue, Decimal('100'))
+        self.assertRollupMatchesRebuild()
+
+    def test_refresh_repairs_a_drifted_month(self):
+        PropertyRevenue.objects.create(property=self.first, revenue_date=date(2026, 5, 3), amount=Decimal('100'))
+        PropertyMonthlyFinancials.objects.filter(property=self.first).update(revenue=Decimal('1'))
+        PropertyMonthlyFinancials.objects.create(property=self.second, year=2026, month=5, revenue=Decimal('9'))
+
+        self.assertEqual(FinancialRollupService.refresh(self.first.pk, 2026, 5).revenue, Decimal('100.00'))
+        self.assertIsNone(FinancialRollupService.refresh(self.second.pk, 2026, 5))
+        self.assertIsNone(FinancialRollupService.refresh(self.second.pk, 2026, 6))
+        self.assertIsNone(self.month(self.second, 2026, 5))
+        self.assertIsNone(self.month(self.second, 2026, 6))
+        self.assertRollupMatchesRebuild()
+
+    def test_owner_rename_invalidates_the_property_dashboard(self):
+        # The dashboard's owner income rows are labelled with the owner name
+        with mock.patch('apps.core.snapshots.DashboardSnapshotCache.invalidate') as invalidate:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.owner.name = 'Renamed Owner'
+                self.owner.save()
+        self.assertIn('properties', invalidate.call_args.args)
+
+    def test_refresh_matches_rebuild_after_random_edits(self):
+        rnd = random.Random(11)
+        models = {
+            PropertyRevenue: ('revenue_date', 'revenue_type', ['rent', 'service', 'parking', 'other']),
+            PropertyExpense: ('expense_date', 'expense_type', ['maintenance', 'utilities', 'tax', 'other']),
+        }
+
+        def random_values(model):
+            date_field, type_field, types = models[model]
+            return {
+                'property': rnd.choice(self.properties),
+                date_field: date(rnd.choice([2025, 2026]), rnd.randint(1, 12), rnd.randint(1, 28)),
+                type_field: rnd.choice(types),
+                'amount': Decimal(rnd.randint(1, 100000)) / 100,
+            }
+
+        for _ in range(200):
+            model = rnd.choice(list(models))
+            records = list(model.objects.all())
+            action = rnd.random()
+            if not records or action < 0.4:
+                model.objects.create(**random_values(model))
+            elif action < 0.8:
+                record = rnd.choice(records)
+                for field, value in random_values(model).items():
+                    if rnd.random() < 0.5:
+                        setattr(record, field, value)
+                record.save()
+            elif action < 0.9:
+                rnd.choice(records).delete()
+            else:
+                date_field = models[model][0]
+                model.objects.filter(**{f'{date_field}__month': rnd.randint(1, 12)}).delete()
+
+        self.assertTrue(PropertyMonthlyFinancials.objects.exists())
+        self.assertRollupMatchesRebuild()
@@ -0,0 +1,178 @@
+"""
+Property metrics job tests for Origin App
+PropertyMetricsJob picks the properties with activity since a time (their
+own edits, contracts, revenues / expenses through the rollup, valuations)
+and logs every run as a PropertyMetricsRun; `recompute_property_metrics
+--since` turns a date, a datetime or "last" into that time.
+"""
+import io
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.clients.models import Client
+from apps.contracts.models import Contract
+from apps.owners.models import Owner
+from apps.properties.analytics import PropertyMetricsJob
+from apps.properties.management.commands.recompute_property_metrics import Command
+from apps.properties.models import (
+    Property,
+    PropertyMetricsRun,
+    PropertyMonthlyFinancials,
+    PropertyRevenue,
+    PropertyType,
+    PropertyValuation,
+)
+
+
+class PropertyMetricsJobTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = Owner.objects.create(name='Metrics Owner', phone='01000000000', national_id='29001010000001')
+        property_type = PropertyType.objects.create(name='Apartment')
+        cls.client_record = Client.objects.create(
+            name='Metrics Tenant', phone='01000000001', national_id='29001010000002', address='Cairo'
+        )
+        cls.properties = [
+            Property.objects.create(
+                title=f'Metrics Flat {number}',
+                code=f'MET-{number}',
+                property_type=property_type,
+                owner=owner,
+                address='1 Nile Street',
+                city='Cairo',
+                area_sqm=Decimal('120'),
+                purchase_price=Decimal('1000000'),
+            )
+            for number in range(5)
+        ]
+        for prop in cls.properties:
+            Contract.objects.create(
+                contract_number=f'MET-C-{prop.pk}',
+                property=prop,
+                client=cls.client_record,
+                start_date=date(2025, 1, 1),
+                end_date=date(2025, 12, 31),
+                rent_amount=Decimal('5000'),
+                status='expired',
+            )
+            PropertyRevenue.objects.create(property=prop, revenue_date=date(2025, 3, 1), amount=Decimal('5000'))
+            PropertyValuation.objects.create(
+                property=prop, valuation_date=date(2025, 1, 1), valuation_amount=Decimal('1200000')
+            )
+
+        # Everything above happened a week ago
+        cls.last_week = timezone.now() - timedelta(days=7)
+        Property.objects.update(updated_at=cls.last_week)
+        Contract.objects.update(updated_at=cls.last_week)
+        PropertyMonthlyFinancials.objects.update(updated_at=cls.last_week)
+        PropertyValuation.objects.update(created_at=cls.last_week)
+        cls.since = cls.last_week + timedelta(days=1)
+
+    def test_active_since(self):
+        edited, let, earning, valued, _ = self.properties
+        self.assertEqual(PropertyMetricsJob.active_since(self.since), [])
+
+        Property.objects.filter(pk=edited.pk).update(updated_at=timezone.now())
+        contract = Contract.objects.get(property=let)
+        contract.rent_amount = Decimal('5500')
+        contract.save()
+        PropertyRevenue.objects.create(property=earning, revenue_date=date(2025, 4, 1), amount=Decimal('100'))
+        PropertyValuation.objects.create(
+            property=valued, valuation_date=date(2026, 1, 1), valuation_amount=Decimal('1300000')
+        )
+
+        self.assertEqual(
+            PropertyMetricsJob.active_since(self.since), sorted([edited.pk, let.pk, earning.pk, valued.pk])
+        )
+        self.assertEqual(len(PropertyMetricsJob.active_since(self.last_week)), 5)
+
+    def test_full_and_incremental_runs_are_logged(self):
+        run = PropertyMetricsJob.run()
+        self.assertEqual((run.status, run.since, run.properties_scanned), ('success', None, 5))
+        self.assertEqual(run.rows_changed, 5)
+        self.assertIsNotNone(run.finished_at)
+        self.assertIsNotNone(run.duration_ms)
+
+        PropertyRevenue.objects.create(
+            property=self.properties[0], revenue_date=date(2025, 4, 1), amount=Decimal('100')
+        )
+        run = PropertyMetricsJob.run(since=self.since)
+        self.assertEqual((run.status, run.since), ('success', self.since))
+        # bulk_update leaves updated_at alone, the full run itself is no activity
+        self.assertEqual(run.properties_scanned, 1)
+        self.assertEqual(PropertyMetricsRun.objects.filter(status='success').count(), 2)
+
+    def test_failed_run_is_logged_and_raised(self):
+        with mock.patch(
+            'apps.properties.analytics.PortfolioAnalytics.recompute', side_effect=RuntimeError('disk full')
+        ):
+            with self.assertRaises(RuntimeError):
+                PropertyMetricsJob.run()
+
+        run = PropertyMetricsRun.objects.get()
+        self.assertEqual(run.status, 'failed')
+        self.assertEqual(run.error, 'RuntimeError: disk full')
+        self.assertEqual(run.properties_scanned, 5)
+        self.assertIsNotNone(run.finished_at)
+        # A failed run is not where the next `--since last` starts
+        self.assertIsNone(PropertyMetricsJob.last_success())
+
+    def test_last_success(self):
+        first = PropertyMetricsRun.objects.create(status='success')
+        PropertyMetricsRun.objects.create(status='failed')
+        PropertyMetricsRun.objects.filter(pk=first.pk).update(started_at=self.last_week)
+        second = PropertyMetricsRun.objects.create(status='success')
+        PropertyMetricsRun.objects.create(status='failed')
+
+        self.assertEqual(PropertyMetricsJob.last_success(), second.started_at)
+
+
+class ParseSinceTests(TestCase):
+
+    def parse_since(self, value):
+        return Command().parse_since(value)
+
+    def test_dates_and_datetimes(self):
+        self.assertIsNone(self.parse_since(None))
+        self.assertIsNone(self.parse_since(''))
+
+        # Naive values are local time
+        since = self.parse_since('2026-10-01')
+        self.assertTrue(timezone.is_aware(since))
+        self.assertEqual(timezone.localtime(since).replace(tzinfo=None), datetime(2026, 10, 1))
+        self.assertEqual(
+            timezone.localtime(self.parse_since('2026-10-01T08:30')).replace(tzinfo=None), datetime(2026, 10, 1, 8, 30)
+        )
+        self.assertEqual(
+            self.parse_since('2026-10-01T08:30:00+00:00'),
+            datetime.fromisoformat('2026-10-01T08:30:00+00:00'),
+        )
+
+    def test_invalid_value(self):
+        for value in ('yesterday', '2026-13-01', '01/10/2026'):
+            with self.subTest(value=value), self.assertRaises(CommandError):
+                self.parse_since(value)
+
+    def test_last(self):
+        # Nothing logged yet: everything is recomputed
+        self.assertIsNone(self.parse_since('last'))
+        PropertyMetricsRun.objects.create(status='failed')
+        self.assertIsNone(self.parse_since('last'))
+
+        run = PropertyMetricsRun.objects.create(status='success')
+        self.assertEqual(self.parse_since('last'), run.started_at)
+
+    def test_command_logs_the_since_it_ran_with(self):
+        stdout = io.StringIO()
+        call_command('recompute_property_metrics', '--since', '2026-10-01', stdout=stdout)
+        self.assertIn('(since 2026-10-01 00:00)', stdout.getvalue())
+        self.assertEqual(
+            timezone.localtime(PropertyMetricsRun.objects.get().since).replace(tzinfo=None), datetime(2026, 10, 1)
+        )
@@ -0,0 +1,259 @@
+"""
+Occupancy timeline tests for Origin App
+The interval tree against a brute-force scan, the portfolio occupancy count,
+and the booking rules built on the tree: contract end dates are inclusive,
+only occupying statuses block a date range, an edited contract never
+conflicts with itself, and edits leaving its dates, property and status
+alone are not checked at all.
+"""
+import random
+from datetime import date
+from decimal import Decimal
+
+from django.forms.models import model_to_dict
+from django.test import SimpleTestCase, TestCase
+
+from api.serializers.contract_serializers import ContractSerializer
+from apps.clients.models import Client
+from apps.contracts.forms import ContractForm
+from apps.contracts.models import Contract
+from apps.owners.models import Owner
+from apps.properties.models import Property, PropertyType
+from apps.properties.occupancy import IntervalTree, OccupancyTimeline, PortfolioOccupancy
+
+
+class CountingIntervalTree(IntervalTree):
+    """Interval tree counting the nodes an overlap query visits"""
+
+    visits = 0
+
+    def _search(self, lo, hi, start, end, found):
+        if lo < hi:
+            self.visits += 1
+        super()._search(lo, hi, start, end, found)
+
+
+class IntervalTreeTests(SimpleTestCase):
+
+    def test_matches_brute_force(self):
+        rnd = random.Random(7)
+        intervals = []
+        for payload in range(300):
+            start = rnd.randint(0, 1000)
+            intervals.append((start, start + rnd.randint(1, 60), payload))
+        tree = IntervalTree(intervals)
+
+        for _ in range(300):
+            start = rnd.randint(-10, 1100)
+            end = start + rnd.randint(1, 50)
+            self.assertEqual(
+                sorted(payload for _, _, payload in tree.overlapping(start, end)),
+                sorted(payload for s, e, payload in intervals if s < end and e > start),
+            )
+
+        pairs = {tuple(sorted((first[2], second[2]))) for first, second in tree.overlaps()}
+        brute = {
+            (first[2], second[2])
+            for first in intervals for second in intervals
+            if first[2] < second[2] and first[0] < second[1] and second[0] < first[1]
+        }
+        self.assertEqual(pairs, brute)
+        self.assertEqual(len(tree.overlaps()), len(brute))
+
+    def test_half_open_ranges(self):
+        tree = IntervalTree([(10, 20, 'a')])
+        self.assertEqual(tree.at(10), [(10, 20, 'a')])
+        self.assertEqual(tree.at(19), [(10, 20, 'a')])
+        self.assertEqual(tree.at(20), [])
+        self.assertEqual(tree.overlapping(0, 10), [])
+        self.assertEqual(tree.overlapping(20, 30), [])
+
+    def test_search_prunes_subtrees_ending_before_the_query(self):
+        # 1023 disjoint ranges, a perfectly balanced tree of depth 10
+        tree = CountingIntervalTree([(day * 10, day * 10 + 5, day) for day in range(1023)])
+
+        tree.visits = 0
+        self.assertEqual(tree.overlapping(20000, 20010), [])
+        self.assertEqual(tree.visits, 1)
+
+        tree.visits = 0
+        self.assertEqual(tree.at(5002), [(5000, 5005, 500)])
+        self.assertLessEqual(tree.visits, 2 * 10)
+
+    def test_empty_tree(self):
+        tree = IntervalTree([])
+        self.assertEqual(len(tree), 0)
+        self.assertEqual(tree.overlapping(0, 100), [])
+        self.assertEqual(tree.overlaps(), [])
+
+
+class PortfolioOccupancyTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = Owner.objects.create(name='Portfolio Owner', phone='01000000000', national_id='29001010000001')
+        property_type = PropertyType.objects.create(name='Apartment')
+        cls.client_record = Client.objects.create(
+            name='Portfolio Tenant', phone='01000000001', national_id='29001010000002', address='Cairo'
+        )
+        cls.properties = [
+            Property.objects.create(
+                title=f'Portfolio Flat {number}',
+                code=f'POR-{number}',
+                property_type=property_type,
+                owner=owner,
+                address='1 Nile Street',
+                city='Cairo',
+                area_sqm=Decimal('120'),
+            )
+            for number in range(4)
+        ]
+
+    def contract(self, number, prop, start_date, end_date, status='active'):
+        return Contract.objects.create(
+            contract_number=number,
+            property=prop,
+            client=self.client_record,
+            start_date=start_date,
+            end_date=end_date,
+            rent_amount=Decimal('5000'),
+            status=status,
+        )
+
+    def test_occupied_count(self):
+        first, second, third, _ = self.properties
+        self.contract('POR-A', first, date(2026, 1, 1), date(2026, 6, 30))
+        self.contract('POR-B', first, date(2026, 3, 1), date(2026, 12, 31))
+        self.contract('POR-C', second, date(2026, 2, 1), date(2026, 2, 28))
+        self.contract('POR-D', third, date(2026, 1, 1), date(2026, 12, 31), status='terminated')
+
+        self.assertEqual(PortfolioOccupancy.occupied_count(date(2025, 12, 31)), 0)
+        self.assertEqual(PortfolioOccupancy.occupied_count(date(2026, 1, 1)), 1)
+        # Overlapping contracts of one property count once
+        self.assertEqual(PortfolioOccupancy.occupied_count(date(2026, 4, 1)), 1)
+        self.assertEqual(PortfolioOccupancy.occupied_count(date(2026, 2, 28)), 2)
+        self.assertEqual(PortfolioOccupancy.occupied_count(date(2026, 3, 1)), 1)
+        self.assertEqual(PortfolioOccupancy.occupied_count(date(2026, 12, 31)), 1)
+        self.assertEqual(PortfolioOccupancy.occupied_count(date(2027, 1, 1)), 0)
+
+        with self.assertNumQueries(1):
+            PortfolioOccupancy.occupied_count(date(2026, 2, 15))
+        self.assertEqual(PortfolioOccupancy.on(date(2026, 2, 15)), {
+            'total_properties': 4,
+            'occupied_properties': 2,
+            'occupancy_rate': 50.0,
+        })
+
+    def test_no_properties(self):
+        Property.objects.all().delete()
+        self.assertEqual(PortfolioOccupancy.on(date(2026, 1, 1))['occupancy_rate'], 0)
+
+
+class OccupancyTimelineTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = Owner.objects.create(name='Occupancy Owner', phone='01000000000', national_id='29001010000001')
+        property_type = PropertyType.objects.create(name='Apartment')
+        cls.property = Property.objects.create(
+            title='Occupancy Flat',
+            code='OCC-001',
+            property_type=property_type,
+            owner=owner,
+            address='1 Nile Street',
+            city='Cairo',
+            area_sqm=Decimal('120'),
+        )
+        cls.client_record = Client.objects.create(
+            name='Occupancy Tenant', phone='01000000001', national_id='29001010000002', address='Cairo'
+        )
+        cls.lease = cls.contract('OCC-LEASE', date(2026, 1, 1), date(2026, 6, 30))
+
+    @classmethod
+    def contract(cls, number, start_date, end_date, status='active'):
+        return Contract.objects.create(
+            contract_number=number,
+            property=cls.property,
+            client=cls.client_record,
+            start_date=start_date,
+            end_date=end_date,
+            rent_amount=Decimal('5000'),
+            status=status,
+        )
+
+    def booking_error(self, start_date, end_date, status='active', exclude=None):
+        return OccupancyTimeline.booking_error(self.property.pk, start_date, end_date, status, exclude)
+
+    def test_end_date_is_inclusive(self):
+        timeline = OccupancyTimeline.for_property(self.property.pk)
+        self.assertTrue(timeline.is_occupied(date(2026, 6, 30)))
+        self.assertFalse(timeline.is_occupied(date(2026, 7, 1)))
+        self.assertEqual(timeline.occupied_days(date(2026, 6, 1), date(2026, 8, 1)), 30)
+        self.assertEqual(timeline.gaps(date(2026, 6, 1), date(2026, 8, 1)), [(date(2026, 7, 1), date(2026, 8, 1))])
+
+    def test_overlapping_contract_is_rejected(self):
+        error = self.booking_error(date(2026, 6, 1), date(2026, 12, 31))
+        self.assertIsNotNone(error)
+        self.assertIn('OCC-LEASE', error)
+
+    def test_contract_starting_on_the_last_day_overlaps(self):
+        self.assertIsNotNone(self.booking_error(date(2026, 6, 30), date(2026, 12, 31)))
+
+    def test_touching_contracts_do_not_overlap(self):
+        self.assertIsNone(self.booking_error(date(2026, 7, 1), date(2026, 12, 31)))
+        self.assertIsNone(self.booking_error(date(2025, 7, 1), date(2025, 12, 31)))
+
+    def test_nested_contracts_overlap(self):
+        self.assertIsNotNone(self.booking_error(date(2026, 3, 1), date(2026, 3, 31)))
+        self.assertIsNotNone(self.booking_error(date(2025, 12, 1), date(2026, 12, 31)))
+
+        nested = self.contract('OCC-NESTED', date(2026, 3, 1), date(2026, 3, 31))
+        timeline = OccupancyTimeline.for_property(self.property.pk)
+        self.assertEqual(timeline.double_bookings(), [(self.lease, nested)])
+        self.assertEqual(timeline.contracts_on(date(2026, 3, 15)), [self.lease, nested])
+        # Counted once in the occupied days
+        self.assertEqual(timeline.occupied_days(date(2026, 1, 1), date(2026, 7, 1)), 181)
+
+    def test_edited_contract_does_not_conflict_with_itself(self):
+        self.assertIsNotNone(self.booking_error(date(2026, 1, 1), date(2026, 9, 30)))
+        self.assertIsNone(self.booking_error(date(2026, 1, 1), date(2026, 9, 30), exclude=self.lease.pk))
+
+    def test_only_draft_and_occupying_statuses_are_checked(self):
+        self.assertIsNotNone(self.booking_error(date(2026, 2, 1), date(2026, 2, 28), status='draft'))
+        self.assertIsNone(self.booking_error(date(2026, 2, 1), date(2026, 2, 28), status='terminated'))
+
+    def test_terminated_and_draft_contracts_do_not_block(self):
+        self.contract('OCC-TERMINATED', date(2026, 7, 1), date(2026, 12, 31), status='terminated')
+        self.contract('OCC-DRAFT', date(2027, 1, 1), date(2027, 6, 30), status='draft')
+        self.assertIsNone(self.booking_error(date(2026, 7, 1), date(2027, 6, 30)))
+
+        timeline = OccupancyTimeline.for_property(self.property.pk)
+        self.assertFalse(timeline.is_occupied(date(2026, 8, 1)))
+        self.assertEqual(timeline.double_bookings(), [])
+
+    def test_missing_values_are_left_to_field_validation(self):
+        self.assertIsNone(OccupancyTimeline.booking_error(None, date(2026, 2, 1), date(2026, 2, 28), 'active'))
+        self.assertIsNone(self.booking_error(None, date(2026, 2, 28)))
+
+    def test_editing_a_double_booked_contract_checks_only_booking_changes(self):
+        # Double booked before the check existed
+        nested = self.contract('OCC-NESTED', date(2026, 3, 1), date(2026, 3, 31))
+
+        def form(**changes):
+            # A fresh instance each time, form validation writes the cleaned values to it
+            instance = Contract.objects.get(pk=nested.pk)
+            data = {**model_to_dict(instance, fields=ContractForm.Meta.fields), **changes}
+            return ContractForm({key: '' if value is None else value for key, value in data.items()}, instance=instance)
+
+        self.assertTrue(form(rent_amount='5500').is_valid())
+        changed = form(end_date=date(2026, 4, 15))
+        self.assertFalse(changed.is_valid())
+        self.assertIn('OCC-LEASE', str(changed.errors['start_date']))
+
+        def serializer(**changes):
+            return ContractSerializer(Contract.objects.get(pk=nested.pk), data=changes, partial=True)
+
+        self.assertTrue(serializer(rent_amount='5500', status='active').is_valid())
+        changed = serializer(end_date='2026-04-15')
+        self.assertFalse(changed.is_valid())
+        self.assertIn('OCC-LEASE', str(changed.errors['start_date']))
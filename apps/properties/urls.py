@@ -63,5 +63,7 @@ urlpatterns = [
     path('<int:pk>/financial-report/', views.property_financial_report, name='financial_report'),
     path('compare/', views.property_comparison, name='comparison'),
     path('<int:pk>/occupancy-history/', views.property_occupancy_history, name='occupancy_history'),
+    path('<int:pk>/occupancy-timeline/', views.property_occupancy_timeline, name='occupancy_timeline'),
+    path('occupancy/', views.portfolio_occupancy, name='portfolio_occupancy'),
     path('<int:pk>/maintenance-history/', views.property_maintenance_history, name='maintenance_history'),
 ]
@@ -1,7 +1,7 @@
 """
 Views for Properties app
 """
-from datetime import timedelta
+from datetime import date, timedelta
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
@@ -9,8 +9,14 @@ from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q, Count, Sum, Avg
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from urllib.parse import urlencode
 from django.http import JsonResponse
+from apps.core.pagination import KeysetPaginator
+from apps.core.search import get_search_index
+from apps.core.snapshots import DashboardSnapshotCache
+from .financials import FinancialRollupService, PropertyFinancialService
+from .occupancy import OccupancyTimeline, PortfolioOccupancy
 from .models import (
     Property,
     PropertyType,
@@ -35,6 +41,28 @@ from .forms import (
     PropertyRevenueForm,
 )
 
+# Keyset pagination keys of the sorts that support it (last key unique)
+KEYSET_SORT_KEYS = {
+    '-created_at': ('-created_at', '-pk'),
+    'created_at': ('created_at', 'pk'),
+    'code': ('code',),
+}
+
+
+def _property_list_summary():
+    """Figures behind the property list summary cards, in one query (cached as a snapshot)."""
+    summary = Property.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        available=Count('id', filter=Q(status='available')),
+        rented=Count('id', filter=Q(status='rented')),
+        maintenance=Count('id', filter=Q(status='maintenance')),
+        total_value=Sum('market_value'),
+    )
+    summary['total_value'] = summary['total_value'] or 0
+    return summary
+
+
 @login_required
 def property_list(request):
     """List all properties with advanced filtering and display options."""
@@ -46,12 +74,7 @@ def property_list(request):
         filters = search_form.cleaned_data
         search = filters.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(code__icontains=search)
-                | Q(title__icontains=search)
-                | Q(address__icontains=search)
-                | Q(city__icontains=search)
-            )
+            queryset = get_search_index('property').filter(queryset, search)
 
         if filters.get('property_type'):
             queryset = queryset.filter(property_type=filters['property_type'])
@@ -92,11 +115,10 @@ def property_list(request):
     display_mode = request.GET.get('display', 'table')
     per_page = 12 if display_mode == 'grid' else 20
 
-    paginator = Paginator(queryset, per_page)
-    page_obj = paginator.get_page(request.GET.get('page'))
-
     query_params = request.GET.copy()
     query_params.pop('page', None)
+    query_params.pop('after', None)
+    query_params.pop('before', None)
     query_params_table = query_params.copy()
     query_params_table['display'] = 'table'
     query_params_grid = query_params.copy()
@@ -104,13 +126,22 @@ def property_list(request):
 
     pagination_query = query_params.copy()
 
-    # Statistics for summary cards
-    total_properties = Property.objects.count()
-    available_count = Property.objects.filter(status='available').count()
-    rented_count = Property.objects.filter(status='rented').count()
-    maintenance_count = Property.objects.filter(status='maintenance').count()
-    total_value = Property.objects.aggregate(total=Sum('market_value'))['total'] or 0
-    
+    # Opt-in keyset pagination (?pagination=cursor) on the created_at / code
+    # sorts: no COUNT and no OFFSET, every page costs the same
+    keyset_keys = KEYSET_SORT_KEYS.get(sort_mapping.get(sort_option, '-created_at'))
+    cursor_pagination = request.GET.get('pagination') == 'cursor' and keyset_keys is not None
+    if cursor_pagination:
+        page_obj = KeysetPaginator(queryset, keyset_keys, per_page).get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+    else:
+        paginator = Paginator(queryset, per_page)
+        page_obj = paginator.get_page(request.GET.get('page'))
+
+    # Statistics for summary cards (one aggregate, cached between requests)
+    summary = DashboardSnapshotCache.get('properties', 'property_list_summary', _property_list_summary)
+
     # Property types for filter dropdown
     property_types = PropertyType.objects.filter(is_active=True)
 
@@ -119,14 +150,15 @@ def property_list(request):
         'search_form': search_form,
         'display_mode': display_mode,
         'sort_option': sort_option,
-        'total_properties': total_properties,
-        'total_count': total_properties,
-        'active_count': Property.objects.filter(is_active=True).count(),
-        'available_count': available_count,
-        'rented_count': rented_count,
-        'maintenance_count': maintenance_count,
-        'total_value': total_value,
+        'total_properties': summary['total'],
+        'total_count': summary['total'],
+        'active_count': summary['active'],
+        'available_count': summary['available'],
+        'rented_count': summary['rented'],
+        'maintenance_count': summary['maintenance'],
+        'total_value': summary['total_value'],
         'property_types': property_types,
+        'cursor_pagination': cursor_pagination,
         'filter_applied': any(v for k, v in request.GET.items() if k not in ['page']),
         'table_querystring': query_params_table.urlencode(),
         'grid_querystring': query_params_grid.urlencode(),
@@ -135,9 +167,8 @@ def property_list(request):
     return render(request, 'properties/list.html', context)
 
 
-@login_required
-def property_dashboard(request):
-    """Analytics dashboard for properties."""
+def _property_dashboard_stats():
+    """Figures behind the property analytics dashboard (cached as a snapshot)."""
     properties = Property.objects.all()
 
     status_breakdown_qs = (
@@ -155,25 +186,24 @@ def property_dashboard(request):
     )
     type_distribution = list(type_distribution_qs)
 
-    average_occupancy = properties.aggregate(avg=Avg('occupancy_rate'))['avg'] or 0
-    average_roi = properties.aggregate(avg=Avg('average_roi'))['avg'] or 0
+    averages = properties.aggregate(
+        occupancy=Avg('occupancy_rate'),
+        roi=Avg('average_roi'),
+    )
+    average_occupancy = averages['occupancy'] or 0
+    average_roi = averages['roi'] or 0
 
-    # Revenue trend (last 6 months)
+    # Revenue trend (last 6 months), read from the monthly rollup
     six_months_ago = timezone.now().date().replace(day=1)
-    monthly_revenue_qs = (
-        PropertyRevenue.objects.filter(revenue_date__gte=six_months_ago - timedelta(days=180))
-        .values('revenue_date__year', 'revenue_date__month')
-        .annotate(total=Sum('amount'))
-        .order_by('revenue_date__year', 'revenue_date__month')
-    )
     monthly_revenue = [
         {
-            'revenue_date__year': item['revenue_date__year'],
-            'revenue_date__month': item['revenue_date__month'],
-            'total': float(item['total']) if item['total'] is not None else 0,
+            'revenue_date__year': item['year'],
+            'revenue_date__month': item['month'],
+            'total': float(item['revenue']),
         }
-        for item in monthly_revenue_qs
+        for item in FinancialRollupService.monthly(six_months_ago - timedelta(days=180))
     ]
+    totals = FinancialRollupService.totals()
 
     top_roi_properties_qs = (
         properties.filter(average_roi__isnull=False)
@@ -182,16 +212,16 @@ def property_dashboard(request):
     )
     top_roi_properties = list(top_roi_properties_qs)
 
-    upcoming_inspections = (
-        PropertyInspection.objects.filter(next_inspection_date__isnull=False)
-        .order_by('next_inspection_date')[:5]
+    counts = properties.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        available=Count('id', filter=Q(status='available')),
     )
+    total_properties = counts['total']
+    active_properties = counts['active']
+    available_properties = counts['available']
 
-    total_properties = properties.count()
-    active_properties = properties.filter(is_active=True).count()
-    available_properties = properties.filter(status='available').count()
-
-    context = {
+    return {
         'total_properties': total_properties,
         'active_properties': active_properties,
         'available_properties': available_properties,
@@ -201,12 +231,27 @@ def property_dashboard(request):
         'average_roi': round(average_roi, 2) if average_roi else 0,
         'monthly_revenue': monthly_revenue,
         'top_roi_properties': top_roi_properties,
-        'upcoming_inspections': upcoming_inspections,
-        'total_revenue': float(PropertyRevenue.objects.aggregate(total=Sum('amount'))['total'] or 0),
-        'total_expenses': float(PropertyExpense.objects.aggregate(total=Sum('amount'))['total'] or 0),
+        'total_revenue': float(totals['revenue']),
+        'total_expenses': float(totals['expenses']),
+        'city_profitability': FinancialRollupService.breakdown('city', limit=5),
+        'owner_income': FinancialRollupService.breakdown('owner_id', limit=5, labels=('owner__name',)),
         'active_percentage': round((active_properties / total_properties) * 100, 1) if total_properties else 0,
         'available_percentage': round((available_properties / total_properties) * 100, 1) if total_properties else 0,
     }
+
+
+@login_required
+def property_dashboard(request):
+    """Analytics dashboard for properties."""
+    day = timezone.now().date().isoformat()
+    context = DashboardSnapshotCache.get(
+        'properties', f'property_dashboard:{day}', _property_dashboard_stats
+    ).copy()
+
+    context['upcoming_inspections'] = (
+        PropertyInspection.objects.filter(next_inspection_date__isnull=False)
+        .order_by('next_inspection_date')[:5]
+    )
     return render(request, 'properties/dashboard.html', context)
 
 
@@ -761,115 +806,10 @@ def property_gallery(request, pk):
 def property_financial_report(request, pk):
     """Comprehensive financial report for a property."""
     property_obj = get_object_or_404(Property, pk=pk)
-    
-    # Calculate date ranges
-    today = timezone.now().date()
-    current_year_start = today.replace(month=1, day=1)
-    last_year_start = current_year_start.replace(year=current_year_start.year - 1)
-    last_year_end = current_year_start - timedelta(days=1)
-    
-    # Current year financial data
-    current_year_revenues = PropertyRevenue.objects.filter(
-        property=property_obj,
-        revenue_date__gte=current_year_start
-    )
-    current_year_expenses = PropertyExpense.objects.filter(
-        property=property_obj,
-        expense_date__gte=current_year_start
-    )
-    
-    # Last year financial data
-    last_year_revenues = PropertyRevenue.objects.filter(
-        property=property_obj,
-        revenue_date__gte=last_year_start,
-        revenue_date__lte=last_year_end
-    )
-    last_year_expenses = PropertyExpense.objects.filter(
-        property=property_obj,
-        expense_date__gte=last_year_start,
-        expense_date__lte=last_year_end
-    )
-    
-    # All-time totals
-    total_revenue = PropertyRevenue.objects.filter(property=property_obj).aggregate(
-        total=Sum('amount')
-    )['total'] or 0
-    
-    total_expenses = PropertyExpense.objects.filter(property=property_obj).aggregate(
-        total=Sum('amount')
-    )['total'] or 0
-    
-    # Current year totals
-    current_year_revenue_total = current_year_revenues.aggregate(total=Sum('amount'))['total'] or 0
-    current_year_expense_total = current_year_expenses.aggregate(total=Sum('amount'))['total'] or 0
-    current_year_profit = current_year_revenue_total - current_year_expense_total
-    
-    # Last year totals
-    last_year_revenue_total = last_year_revenues.aggregate(total=Sum('amount'))['total'] or 0
-    last_year_expense_total = last_year_expenses.aggregate(total=Sum('amount'))['total'] or 0
-    last_year_profit = last_year_revenue_total - last_year_expense_total
-    
-    # ROI Calculation
-    investment = property_obj.purchase_price or property_obj.market_value or 0
-    if investment > 0:
-        current_roi = (float(current_year_profit) / float(investment)) * 100
-        lifetime_roi = ((float(total_revenue) - float(total_expenses)) / float(investment)) * 100
-    else:
-        current_roi = 0
-        lifetime_roi = 0
-    
-    # Monthly breakdown for current year
-    monthly_data = []
-    for month in range(1, 13):
-        month_revenues = current_year_revenues.filter(
-            revenue_date__month=month
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
-        month_expenses = current_year_expenses.filter(
-            expense_date__month=month
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
-        monthly_data.append({
-            'month': month,
-            'revenue': float(month_revenues),
-            'expense': float(month_expenses),
-            'profit': float(month_revenues - month_expenses),
-        })
-    
-    # Expense breakdown by type
-    expense_by_type = PropertyExpense.objects.filter(
-        property=property_obj,
-        expense_date__gte=current_year_start
-    ).values('expense_type').annotate(
-        total=Sum('amount')
-    ).order_by('-total')
-    
-    # Revenue breakdown by type
-    revenue_by_type = PropertyRevenue.objects.filter(
-        property=property_obj,
-        revenue_date__gte=current_year_start
-    ).values('revenue_type').annotate(
-        total=Sum('amount')
-    ).order_by('-total')
-    
+
     context = {
         'property': property_obj,
-        'total_revenue': float(total_revenue),
-        'total_expenses': float(total_expenses),
-        'total_profit': float(total_revenue - total_expenses),
-        'current_year_revenue': float(current_year_revenue_total),
-        'current_year_expense': float(current_year_expense_total),
-        'current_year_profit': float(current_year_profit),
-        'last_year_revenue': float(last_year_revenue_total),
-        'last_year_expense': float(last_year_expense_total),
-        'last_year_profit': float(last_year_profit),
-        'current_roi': round(current_roi, 2),
-        'lifetime_roi': round(lifetime_roi, 2),
-        'monthly_data': monthly_data,
-        'expense_by_type': expense_by_type,
-        'revenue_by_type': revenue_by_type,
-        'current_year': today.year,
-        'last_year': today.year - 1,
+        **PropertyFinancialService.report(property_obj),
     }
     return render(request, 'properties/financial_report.html', context)
 
@@ -911,40 +851,22 @@ def property_occupancy_history(request, pk):
         property=property_obj
     ).select_related('client').order_by('-start_date')
     
-    # Calculate occupancy metrics
-    total_days = 0
-    occupied_days = 0
-    
-    for contract in contracts:
-        start = contract.start_date
-        end = contract.end_date or timezone.now().date()
-        duration = (end - start).days
-        total_days += duration
-        if contract.status in ['active', 'expired']:
-            occupied_days += duration
-    
-    if total_days > 0:
-        occupancy_rate = (occupied_days / total_days) * 100
-    else:
-        occupancy_rate = 0
-    
-    # Calculate vacancy periods
+    # Occupancy from the first contract to today, overlapping contracts
+    # counted once; vacancies are the gaps between occupied periods
+    timeline = OccupancyTimeline(contracts)
+    span_start, span_end = timeline.span()
+    span_days = (span_end - span_start).days
+    occupancy_rate = (timeline.occupied_days(span_start, span_end) / span_days) * 100 if span_days > 0 else 0
+
     vacancy_periods = []
-    sorted_contracts = list(contracts.order_by('start_date'))
-    
-    for i, contract in enumerate(sorted_contracts):
-        if i < len(sorted_contracts) - 1:
-            next_contract = sorted_contracts[i + 1]
-            end_date = contract.end_date or timezone.now().date()
-            
-            if end_date < next_contract.start_date:
-                vacancy_days = (next_contract.start_date - end_date).days
-                vacancy_periods.append({
-                    'start': end_date,
-                    'end': next_contract.start_date,
-                    'days': vacancy_days,
-                })
-    
+    if timeline.occupied:
+        first_let = date.fromordinal(timeline.occupied[0][0])
+        last_end = date.fromordinal(timeline.occupied[-1][1])
+        vacancy_periods = [
+            {'start': start, 'end': end, 'days': (end - start).days}
+            for start, end in timeline.gaps(first_let, last_end)
+        ]
+
     context = {
         'property': property_obj,
         'contracts': contracts,
@@ -953,10 +875,53 @@ def property_occupancy_history(request, pk):
         'active_contracts': contracts.filter(status='active').count(),
         'vacancy_periods': vacancy_periods,
         'total_vacancy_days': sum(v['days'] for v in vacancy_periods),
+        'double_bookings': timeline.double_bookings(),
     }
     return render(request, 'properties/occupancy_history.html', context)
 
 
+def _query_date(request, name):
+    """ISO date of the `name` query parameter, None when absent, ValueError when invalid"""
+    value = request.GET.get(name)
+    if not value:
+        return None
+    # parse_date returns None on malformed input and raises on impossible dates
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(f'Invalid date: {value}')
+    return day
+
+
+@login_required
+def property_occupancy_timeline(request, pk):
+    """JSON occupancy timeline of a property (?start=&end= ISO dates, end excluded)."""
+    property_obj = get_object_or_404(Property, pk=pk)
+    error = {'error': 'start and end must both be given, start before end'}
+    try:
+        start = _query_date(request, 'start')
+        end = _query_date(request, 'end')
+    except ValueError:
+        return JsonResponse(error, status=400)
+    if (start is None) != (end is None) or (start and end <= start):
+        return JsonResponse(error, status=400)
+
+    timeline = OccupancyTimeline.for_property(property_obj.pk)
+    return JsonResponse({
+        'property': {'id': property_obj.pk, 'code': property_obj.code, 'title': property_obj.title},
+        **timeline.as_json(start, end),
+    })
+
+
+@login_required
+def portfolio_occupancy(request):
+    """JSON portfolio occupancy on ?date= (ISO date, today by default)."""
+    try:
+        day = _query_date(request, 'date') or timezone.now().date()
+    except ValueError:
+        return JsonResponse({'error': 'date must be an ISO date'}, status=400)
+    return JsonResponse({'date': day.isoformat(), **PortfolioOccupancy.on(day)})
+
+
 @login_required
 def property_maintenance_history(request, pk):
     """Complete maintenance history for a property."""
@@ -144,9 +144,9 @@ class SalesContractAdmin(admin.ModelAdmin):
         progress = obj.get_payment_progress_percentage()
         color = 'green' if progress == 100 else 'orange' if progress > 50 else 'red'
         return format_html(
-            '<span style="color: {};">{:.1f}%</span>',
+            '<span style="color: {};">{}%</span>',
             color,
-            progress
+            f'{progress:.1f}'
         )
     payment_progress.short_description = 'Payment Progress'
     
@@ -8,6 +8,7 @@ from django.db import models
 from datetime import timedelta
 from decimal import Decimal
 
+from api.filters import IndexedSearchFilter
 from apps.sales.models import (
     Buyer,
     PropertyReservation,
@@ -33,7 +34,7 @@ class BuyerViewSet(viewsets.ModelViewSet):
     queryset = Buyer.objects.all()
     serializer_class = BuyerSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     filterset_fields = ['buyer_type', 'is_qualified', 'is_active', 'financing_approved']
     search_fields = ['name', 'email', 'phone', 'national_id']
     ordering_fields = ['created_at', 'name', 'credit_score']
@@ -2,6 +2,9 @@
 Signals for Sales module - Financial Integration
 Auto-create journal entries when sales payments are recorded
 """
+import logging
+
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
@@ -10,33 +13,44 @@ from decimal import Decimal
 from apps.sales.models import SalesPayment
 from apps.financial.models import JournalEntry, JournalEntryLine, Account
 
+logger = logging.getLogger(__name__)
+
 
 @receiver(post_save, sender=SalesPayment)
 def create_journal_entry_for_sales_payment(sender, instance, created, **kwargs):
     """
-    Auto-create journal entry when sales payment is completed
-    
-    Accounting Entry:
-    Debit: Bank/Cash Account (Asset)
-    Credit: Sales Revenue Account (Revenue)
+    Queue the journal entry of a completed sales payment (posted by
+    apps.sales.tasks.create_sales_payment_journal_entry after commit)
     """
     # Only process completed payments
     if instance.status != 'completed':
         return
     
-    # Check if journal entry already exists for this payment
-    existing_entry = JournalEntry.objects.filter(
-        reference=f"SALES-PAY-{instance.receipt_number}"
-    ).first()
+    from apps.sales.tasks import create_sales_payment_journal_entry
+    payment_id = instance.pk
+    transaction.on_commit(lambda: create_sales_payment_journal_entry.delay(payment_id))
+
+
+def post_sales_payment(payment):
+    """
+    Create the journal entry of a completed sales payment
     
-    if existing_entry:
-        # Already has a journal entry, skip
-        return
+    Accounting Entry:
+    Debit: Bank/Cash Account (Asset)
+    Credit: Sales Revenue Account (Revenue)
+    
+    Returns the new entry, or None if the payment already has one.
+    """
+    reference = f"SALES-PAY-{payment.receipt_number}"
     
-    try:
+    with transaction.atomic():
+        # Check if journal entry already exists for this payment
+        if JournalEntry.objects.filter(reference=reference).exists():
+            return None
+        
         # Get or create accounts
         # 1. Bank/Cash Account (Asset) - Debit
-        bank_account = get_or_create_bank_account(instance.payment_method)
+        bank_account = get_or_create_bank_account(payment.payment_method)
         
         # 2. Sales Revenue Account - Credit
         revenue_account = get_or_create_sales_revenue_account()
@@ -47,12 +61,12 @@ def create_journal_entry_for_sales_payment(sender, instance, created, **kwargs):
         # Create Journal Entry
         journal_entry = JournalEntry.objects.create(
             entry_number=entry_number,
-            entry_date=instance.payment_date,
+            entry_date=payment.payment_date,
             entry_type='automated',
-            reference=f"SALES-PAY-{instance.receipt_number}",
-            description=f"Sales payment from {instance.sales_contract.buyer.name} for contract {instance.sales_contract.contract_number}",
-            property=instance.sales_contract.property,
-            created_by=instance.received_by,
+            reference=reference,
+            description=f"Sales payment from {payment.sales_contract.buyer.name} for contract {payment.sales_contract.contract_number}",
+            property=payment.sales_contract.property,
+            created_by=payment.received_by,
             is_posted=True,
             posted_at=timezone.now()
         )
@@ -61,9 +75,9 @@ def create_journal_entry_for_sales_payment(sender, instance, created, **kwargs):
         JournalEntryLine.objects.create(
             journal_entry=journal_entry,
             account=bank_account,
-            debit_amount=instance.amount,
+            debit_amount=payment.amount,
             credit_amount=Decimal('0.00'),
-            description=f"Receipt: {instance.receipt_number} - {instance.get_payment_type_display()}"
+            description=f"Receipt: {payment.receipt_number} - {payment.get_payment_type_display()}"
         )
         
         # Create Credit Line (Sales Revenue)
@@ -71,14 +85,12 @@ def create_journal_entry_for_sales_payment(sender, instance, created, **kwargs):
             journal_entry=journal_entry,
             account=revenue_account,
             debit_amount=Decimal('0.00'),
-            credit_amount=instance.amount,
-            description=f"Sales revenue from contract {instance.sales_contract.contract_number}"
+            credit_amount=payment.amount,
+            description=f"Sales revenue from contract {payment.sales_contract.contract_number}"
         )
-        
-        print(f"✅ Journal Entry {entry_number} created for payment {instance.receipt_number}")
-        
-    except Exception as e:
-        print(f"❌ Error creating journal entry for payment {instance.receipt_number}: {str(e)}")
+    
+    logger.info('Journal entry %s created for payment %s', entry_number, payment.receipt_number)
+    return journal_entry
 
 
 def get_or_create_bank_account(payment_method):
@@ -108,7 +120,7 @@ def get_or_create_bank_account(payment_method):
     )
     
     if created:
-        print(f"✅ Created account: {code} - {name}")
+        logger.info('Created account %s - %s', code, name)
     
     return account
 
@@ -129,7 +141,7 @@ def get_or_create_sales_revenue_account():
     )
     
     if created:
-        print(f"✅ Created account: 4010 - Property Sales Revenue")
+        logger.info('Created account 4010 - Property Sales Revenue')
     
     return account
 
@@ -0,0 +1,38 @@
+"""
+Background tasks for Sales module - Financial Integration
+"""
+from celery import shared_task
+from django.db import OperationalError
+
+from apps.core.tasks import claim_task, release_task, retry_unless_eager
+
+
+@shared_task(bind=True, max_retries=5)
+def create_sales_payment_journal_entry(self, payment_id):
+    """
+    Post the journal entry of a completed sales payment, at most once per
+    payment (the entry reference SALES-PAY-<receipt> is checked as well)
+    """
+    from apps.sales.models import SalesPayment
+    from apps.sales.signals import post_sales_payment
+
+    payment = SalesPayment.objects.select_related(
+        'sales_contract__buyer', 'sales_contract__property'
+    ).filter(pk=payment_id, status='completed').first()
+    if payment is None:
+        return None
+
+    key = f'sales-payment-journal-entry:{payment_id}'
+    if not claim_task(key):
+        return None
+
+    try:
+        journal_entry = post_sales_payment(payment)
+    except OperationalError as e:
+        # A locked or unreachable database; a constraint error would fail again
+        release_task(key)
+        retry_unless_eager(self, e)
+    except Exception:
+        release_task(key)
+        raise
+    return journal_entry.entry_number if journal_entry else None
@@ -3,8 +3,8 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils.translation import gettext as _
 from django.core.paginator import Paginator
-from django.db.models import Q
 
+from apps.core.search import get_search_index
 from apps.sales.models import Buyer
 from apps.sales.forms import BuyerForm, BuyerSearchForm
 
@@ -23,12 +23,7 @@ def buyer_list(request):
         is_active = form.cleaned_data.get('is_active')
         
         if search:
-            buyers = buyers.filter(
-                Q(name__icontains=search) |
-                Q(email__icontains=search) |
-                Q(phone__icontains=search) |
-                Q(national_id__icontains=search)
-            )
+            buyers = get_search_index('buyer').filter(buyers, search)
         
         if buyer_type:
             buyers = buyers.filter(buyer_type=buyer_type)
@@ -4,34 +4,28 @@ from django.db.models import Sum, Count, Q, Avg
 from django.utils import timezone
 from datetime import timedelta
 
+from apps.core.snapshots import DashboardSnapshotCache
 from apps.sales.models import Buyer, PropertyReservation, SalesContract, SalesPayment
 
 
-@login_required
-def sales_dashboard(request):
-    """Sales module dashboard with statistics and charts"""
-    
-    # Date ranges
-    today = timezone.now().date()
+def _sales_dashboard_stats(today):
+    """Figures behind the sales dashboard (cached as a snapshot)"""
     this_month_start = today.replace(day=1)
-    last_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
     this_year_start = today.replace(month=1, day=1)
     
     # Buyers statistics
-    total_buyers = Buyer.objects.count()
-    qualified_buyers = Buyer.objects.filter(is_qualified=True, is_active=True).count()
-    new_buyers_this_month = Buyer.objects.filter(created_at__gte=this_month_start).count()
+    buyers_stats = Buyer.objects.aggregate(
+        total=Count('id'),
+        qualified=Count('id', filter=Q(is_qualified=True, is_active=True)),
+        this_month=Count('id', filter=Q(created_at__gte=this_month_start)),
+    )
     
     # Reservations statistics
-    total_reservations = PropertyReservation.objects.count()
-    active_reservations = PropertyReservation.objects.filter(
-        status__in=['pending', 'approved'],
-        expiry_date__gte=today
-    ).count()
-    expired_reservations = PropertyReservation.objects.filter(
-        status='pending',
-        expiry_date__lt=today
-    ).count()
+    reservations_stats = PropertyReservation.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(status__in=['pending', 'approved'], expiry_date__gte=today)),
+        expired=Count('id', filter=Q(status='pending', expiry_date__lt=today)),
+    )
     
     # Contracts statistics
     contracts_stats = SalesContract.objects.aggregate(
@@ -51,14 +45,6 @@ def sales_dashboard(request):
         this_year_amount=Sum('amount', filter=Q(payment_date__gte=this_year_start)),
     )
     
-    # Recent activities
-    recent_buyers = Buyer.objects.order_by('-created_at')[:5]
-    recent_contracts = SalesContract.objects.select_related('property', 'buyer').order_by('-created_at')[:5]
-    recent_payments = SalesPayment.objects.select_related('sales_contract').order_by('-payment_date')[:10]
-    pending_reservations = PropertyReservation.objects.filter(
-        status='pending'
-    ).select_related('property', 'buyer').order_by('-created_at')[:5]
-    
     # Overdue installments
     overdue_installments = SalesContract.objects.filter(
         has_installments=True,
@@ -86,16 +72,16 @@ def sales_dashboard(request):
             'total': sales['total'] or 0,
         })
     
-    context = {
+    return {
         # Buyers
-        'total_buyers': total_buyers,
-        'qualified_buyers': qualified_buyers,
-        'new_buyers_this_month': new_buyers_this_month,
+        'total_buyers': buyers_stats['total'] or 0,
+        'qualified_buyers': buyers_stats['qualified'] or 0,
+        'new_buyers_this_month': buyers_stats['this_month'] or 0,
         
         # Reservations
-        'total_reservations': total_reservations,
-        'active_reservations': active_reservations,
-        'expired_reservations': expired_reservations,
+        'total_reservations': reservations_stats['total'] or 0,
+        'active_reservations': reservations_stats['active'] or 0,
+        'expired_reservations': reservations_stats['expired'] or 0,
         
         # Contracts
         'total_contracts': contracts_stats['total'] or 0,
@@ -114,14 +100,28 @@ def sales_dashboard(request):
         # Alerts
         'overdue_installments': overdue_installments,
         
-        # Recent activities
-        'recent_buyers': recent_buyers,
-        'recent_contracts': recent_contracts,
-        'recent_payments': recent_payments,
-        'pending_reservations': pending_reservations,
-        
         # Charts data
         'monthly_sales': monthly_sales,
     }
+
+
+@login_required
+def sales_dashboard(request):
+    """Sales module dashboard with statistics and charts"""
+    
+    today = timezone.now().date()
+    context = DashboardSnapshotCache.get(
+        'sales', f'sales_dashboard:{today.isoformat()}', lambda: _sales_dashboard_stats(today)
+    ).copy()
+    
+    # Recent activities
+    context.update({
+        'recent_buyers': Buyer.objects.order_by('-created_at')[:5],
+        'recent_contracts': SalesContract.objects.select_related('property', 'buyer').order_by('-created_at')[:5],
+        'recent_payments': SalesPayment.objects.select_related('sales_contract').order_by('-payment_date')[:10],
+        'pending_reservations': PropertyReservation.objects.filter(
+            status='pending'
+        ).select_related('property', 'buyer').order_by('-created_at')[:5],
+    })
     
     return render(request, 'sales/dashboard.html', context)
@@ -4,6 +4,7 @@ Django settings for Origin App Real Estate Management System.
 
 from pathlib import Path
 import os
+from celery.schedules import crontab
 from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -60,8 +61,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'apps.core.middleware.QueryProfilingMiddleware',  # per-view SQL statistics, see PERF_PROFILING_*
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add WhiteNoise for static files
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'apps.core.middleware.SessionMiddleware',  # SessionMiddleware + @session_save_exempt
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,6 +90,7 @@ TEMPLATES = [
                 'django.template.context_processors.i18n',
                 'django.template.context_processors.media',
                 'django.template.context_processors.static',
+                'apps.core.context_processors.notifications',
             ],
         },
     },
@@ -230,6 +233,25 @@ if not DEBUG:
 SESSION_COOKIE_AGE = 86400  # 24 hours
 SESSION_SAVE_EVERY_REQUEST = True
 
+# Cache
+# The local-memory cache is per process; deployments running several gunicorn
+# workers should point CACHE_BACKEND at a shared cache (file-based or Redis)
+# so dashboard snapshot invalidation reaches every worker.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='origin-app'),
+    }
+}
+
+# Dashboard statistics snapshots (see apps/core/snapshots.py)
+DASHBOARD_SNAPSHOTS = {
+    'ENABLED': config('DASHBOARD_SNAPSHOTS_ENABLED', default=True, cast=bool),
+    'MAX_AGE': config('DASHBOARD_SNAPSHOTS_MAX_AGE', default=600, cast=int),
+    'TIMEOUT': 86400,
+    'STALE_WHILE_REVALIDATE': config('DASHBOARD_SNAPSHOTS_SWR', default=True, cast=bool),
+}
+
 # Message Framework
 from django.contrib.messages import constants as messages
 MESSAGE_TAGS = {
@@ -253,8 +275,105 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 EMAIL_HOST = 'localhost'
 EMAIL_PORT = 1025
 EMAIL_USE_TLS = False
+# Seconds an SMTP connection attempt may block (emails sent from the web process too)
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=10, cast=int)
 DEFAULT_FROM_EMAIL = 'noreply@originapp.com'
 
+# Celery (background tasks: notification emails and fan-out, automated journal entries)
+# - no broker (default): tasks run eagerly in the web process right after the transaction commits
+# - CELERY_BROKER_URL=filesystem:// : local broker in BASE_DIR/celery_broker, no Redis needed
+# - CELERY_BROKER_URL=redis://... : tasks run in `celery -A config worker` and `beat` processes, which
+#   must share the web database; the SQLite file does not (see the core.W001 check)
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='')
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=not CELERY_BROKER_URL, cast=bool)
+# Off by default: a failed eager task is logged and does not fail the request that queued it
+CELERY_TASK_EAGER_PROPAGATES = config('CELERY_TASK_EAGER_PROPAGATES', default=False, cast=bool)
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_ACCEPT_CONTENT = ['json']
+CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default=None)
+CELERY_TIMEZONE = TIME_ZONE
+if CELERY_BROKER_URL.startswith('filesystem://'):
+    CELERY_BROKER_FOLDER = Path(config('CELERY_BROKER_FOLDER', default=str(BASE_DIR / 'celery_broker')))
+    for folder in ('queue', 'processed'):
+        (CELERY_BROKER_FOLDER / folder).mkdir(parents=True, exist_ok=True)
+    CELERY_BROKER_TRANSPORT_OPTIONS = {
+        'data_folder_in': str(CELERY_BROKER_FOLDER / 'queue'),
+        'data_folder_out': str(CELERY_BROKER_FOLDER / 'queue'),
+        'data_folder_processed': str(CELERY_BROKER_FOLDER / 'processed'),
+    }
+
+# Seconds a task idempotency key is remembered
+TASK_IDEMPOTENCY_TIMEOUT = 7 * 24 * 3600
+
+# Scheduled notification emails (digests, quiet hours, scheduled_for), sent by
+# `celery -A config beat` or `python manage.py dispatch_notifications` from cron
+NOTIFICATION_DISPATCH_INTERVAL = config('NOTIFICATION_DISPATCH_INTERVAL', default=300, cast=int)
+NOTIFICATION_DIGEST_HOUR = config('NOTIFICATION_DIGEST_HOUR', default=8, cast=int)
+NOTIFICATION_DIGEST_WEEKDAY = config('NOTIFICATION_DIGEST_WEEKDAY', default=6, cast=int)  # Monday=0, Sunday=6
+# Nightly jobs run at a fixed time of day (CELERY_TIMEZONE), whenever beat was started
+CONTRACT_EXPIRY_HOUR = config('CONTRACT_EXPIRY_HOUR', default=1, cast=int)
+PROPERTY_METRICS_HOUR = config('PROPERTY_METRICS_HOUR', default=2, cast=int)
+CELERY_BEAT_SCHEDULE = {
+    'dispatch-scheduled-notifications': {
+        'task': 'apps.core.tasks.dispatch_scheduled_notifications',
+        'schedule': NOTIFICATION_DISPATCH_INTERVAL,
+    },
+    'reconcile-unread-counts': {
+        'task': 'apps.core.tasks.reconcile_unread_counts',
+        'schedule': 3600,
+    },
+    'archive-notifications': {
+        'task': 'apps.core.tasks.archive_notifications',
+        'schedule': 24 * 3600,
+    },
+    'recompute-property-metrics': {
+        'task': 'apps.properties.tasks.recompute_property_metrics',
+        'schedule': crontab(hour=PROPERTY_METRICS_HOUR, minute=0),
+    },
+    'process-contract-expiry': {
+        'task': 'apps.contracts.tasks.process_contract_expiry',
+        'schedule': crontab(hour=CONTRACT_EXPIRY_HOUR, minute=0),
+    },
+}
+
+# Property.occupancy_rate / average_roi recomputation (recompute_property_metrics):
+# seconds a running job keeps other runs from starting
+PROPERTY_METRICS_LOCK_TIMEOUT = config('PROPERTY_METRICS_LOCK_TIMEOUT', default=3600, cast=int)
+
+# Contract expiry sweep (process_contract_expiry): days ahead scanned for
+# expiry notices (the longest renewal notice window honoured), and seconds a
+# running sweep keeps other runs from starting
+CONTRACT_EXPIRY_HORIZON_DAYS = config('CONTRACT_EXPIRY_HORIZON_DAYS', default=90, cast=int)
+CONTRACT_EXPIRY_LOCK_TIMEOUT = config('CONTRACT_EXPIRY_LOCK_TIMEOUT', default=3600, cast=int)
+
+# Notification retention: read notifications older than their TTL (days) are
+# moved to NotificationArchive by `python manage.py archive_notifications`.
+# A TTL set for the notification type wins over one set for the priority.
+NOTIFICATION_RETENTION = {
+    'default': config('NOTIFICATION_RETENTION_DAYS', default=90, cast=int),
+    'types': {
+        'info': 30,
+        'success': 30,
+        'system': 30,
+    },
+    'priorities': {
+        'high': 180,
+        'urgent': 365,
+    },
+}
+
+# Global search (/search/): entities still unsearched once this many
+# milliseconds are spent are skipped and the response is marked partial
+GLOBAL_SEARCH_BUDGET_MS = config('GLOBAL_SEARCH_BUDGET_MS', default=250, cast=int)
+
+# Request SQL profiling, read at /ops/perf/ (staff only): every request when
+# enabled, otherwise this percentage of requests (0 turns it off)
+PERF_PROFILING_ENABLED = config('PERF_PROFILING_ENABLED', default=False, cast=bool)
+PERF_PROFILING_SAMPLE_PERCENT = config('PERF_PROFILING_SAMPLE_PERCENT', default=0.0, cast=float)
+PERF_PROFILING_WINDOW = 300  # seconds per statistics window
+PERF_PROFILING_WINDOWS = 12  # windows kept: one rolling hour
+
 # REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [